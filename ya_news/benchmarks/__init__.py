@@ -0,0 +1,39 @@
+"""
+Бенчмарки проекта YaNews.
+
+Запускаются из каталога ya_news как модули, например:
+python -m benchmarks.profanity
+
+Бенчмарки, которым нужна база, создают временную тестовую базу
+и удаляют её по завершении; рабочая база не затрагивается.
+"""
+import os
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(path=None):
+    """Временная база; path задаёт файл вместо базы в памяти."""
+    from django.db import connection
+    if path:
+        connection.settings_dict['TEST']['NAME'] = str(path)
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
@@ -0,0 +1,154 @@
+"""
+Пропускная способность одних и тех же маршрутов под WSGI и ASGI.
+
+Приложения вызываются в процессе, без сетевого сервера: WSGI — из пула
+потоков, как у многопоточного сервера, ASGI — конкурентными задачами
+в одном цикле событий. Задержка считается с момента, когда запрос
+взял поток WSGI или задача ASGI, поэтому у ASGI в неё входит ожидание
+свободного потока ORM-пула.
+
+python -m benchmarks.asgi_vs_wsgi --concurrency 300 --requests 3000
+"""
+import argparse
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import percentile, setup_django, test_database
+
+HOST = 'localhost'
+
+
+def seed(news_count, comments_per_news):
+    from django.contrib.auth import get_user_model
+
+    from news.models import Comment, News
+    author = get_user_model().objects.create(username='bench')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости. ' * 50)
+        for index in range(news_count)
+    )
+    news_list = list(News.objects.all())
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for news in news_list
+        for index in range(comments_per_news)
+    )
+    return ['/'] + [f'/news/{news.pk}/' for news in news_list]
+
+
+def wsgi_request(application, path):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': HOST,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+    }
+    statuses = []
+    started = time.perf_counter()
+    result = application(
+        environ, lambda status, headers: statuses.append(status)
+    )
+    try:
+        b''.join(result)
+    finally:
+        result.close()
+    assert statuses[0].startswith('200'), statuses
+    return time.perf_counter() - started
+
+
+async def asgi_request(application, path):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', HOST.encode())],
+        'server': (HOST, 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    statuses = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    started = time.perf_counter()
+    await application(scope, receive, send)
+    assert statuses == [200], statuses
+    return time.perf_counter() - started
+
+
+def run_wsgi(paths, total, concurrency):
+    from yanews.wsgi import application
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(
+            lambda index: wsgi_request(application, paths[index % len(paths)]),
+            range(total),
+        ))
+    return time.perf_counter() - started, latencies
+
+
+async def run_asgi(paths, total, concurrency):
+    from yanews.asgi import application
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with semaphore:
+            return await asgi_request(application, paths[index % len(paths)])
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(index) for index in range(total)))
+    return time.perf_counter() - started, latencies
+
+
+def report(name, elapsed, latencies):
+    latencies = sorted(latencies)
+    print(
+        f'{name:>5}: {len(latencies) / elapsed:8.1f} запросов/с, '
+        f'p50 {percentile(latencies, 0.5) * 1000:7.1f} мс, '
+        f'p99 {percentile(latencies, 0.99) * 1000:7.1f} мс'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=300)
+    parser.add_argument('--wsgi-threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--news', type=int, default=20)
+    parser.add_argument('--comments', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    settings.DEBUG = False
+    with test_database():
+        paths = seed(args.news, args.comments)
+        print(
+            f'{args.requests} запросов к {len(paths)} страницам, '
+            f'{args.concurrency} одновременных соединений'
+        )
+        report('WSGI', *run_wsgi(
+            paths, args.requests, min(args.concurrency, args.wsgi_threads)
+        ))
+        report('ASGI', *asyncio.run(
+            run_asgi(paths, args.requests, args.concurrency)
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Задержка первых запросов к свежему процессу.
+
+python -m benchmarks.cold_start
+
+Режимы, каждый в отдельном процессе:
+uncached — шаблоны без cached.Loader (как было с DEBUG = True);
+cached   — cached.Loader, без прогрева;
+warmup   — cached.Loader и warmup() при загрузке wsgi.py.
+
+Для каждого маршрута печатается время загрузки wsgi.py, первого
+и второго запроса. DEBUG выключается, как в продакшене.
+"""
+import argparse
+import importlib
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import setup_django, test_database
+
+MODES = ('uncached', 'cached', 'warmup')
+
+
+def configure(mode):
+    from django.conf import settings
+    from yanews.loadtest import production_settings
+    production_settings()
+    settings.WARMUP_ON_STARTUP = mode == 'warmup'
+    if mode == 'uncached':
+        options = settings.TEMPLATES[0]['OPTIONS']
+        options['loaders'] = options['loaders'][0][1]
+
+
+def seed():
+    from django.contrib.auth import get_user_model
+    from news.models import Comment, News
+    author = get_user_model().objects.create(username='Автор')
+    news = News.objects.create(title='Новость', text='Текст')
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Комментарий')
+        for _ in range(10)
+    )
+    return news
+
+
+def timed_request(application, path):
+    from yanews.loadtest import ANONYMOUS, call, make_environ
+    started = time.perf_counter()
+    status = call(application, make_environ('GET', path, None, ANONYMOUS))
+    assert status == 200, (path, status)
+    return (time.perf_counter() - started) * 1000
+
+
+def run(mode):
+    setup_django()
+    configure(mode)
+    with tempfile.TemporaryDirectory() as directory, test_database(
+        f'{directory}/cold.sqlite3'
+    ):
+        news = seed()
+        started = time.perf_counter()
+        application = importlib.import_module('yanews.wsgi').application
+        startup = (time.perf_counter() - started) * 1000
+        paths = {
+            'news:home': '/',
+            'news:detail': f'/news/{news.pk}/',
+            'users:login': '/auth/login/',
+        }
+        print(f'{mode:9} загрузка wsgi.py {startup:6.1f} мс')
+        for name, path in paths.items():
+            first = timed_request(application, path)
+            second = timed_request(application, path)
+            print(
+                f'{"":9} {name:12} первый {first:6.1f} мс, '
+                f'второй {second:5.1f} мс'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mode', choices=MODES)
+    args = parser.parse_args()
+    if args.mode:
+        run(args.mode)
+        return
+    for mode in MODES:
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.cold_start', '--mode', mode],
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Скорость и пиковая память import_news на сгенерированной ленте.
+
+python -m benchmarks.import_news --items 200000 --format json
+"""
+import argparse
+import json
+import resource
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks import setup_django, test_database
+
+
+def write_feed(file, items, output_format):
+    start = date(2020, 1, 1)
+    if output_format == 'json':
+        file.write('[\n')
+    for index in range(items):
+        item = {
+            'model': 'news.news',
+            'fields': {
+                'title': f'Новость {index}',
+                'date': (start + timedelta(days=index % 1000)).isoformat(),
+                'text': 'Текст новости. ' * 20,
+            },
+        }
+        separator = ',\n' if output_format == 'json' and index else ''
+        if output_format == 'ndjson':
+            separator = '\n' if index else ''
+        file.write(separator + json.dumps(item, ensure_ascii=False))
+    if output_format == 'json':
+        file.write('\n]')
+    file.flush()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+    # База в файле, чтобы пиковая память отражала только импорт.
+    with tempfile.NamedTemporaryFile(
+        'w', suffix=f'.{args.format}', encoding='utf-8'
+    ) as feed, tempfile.TemporaryDirectory() as directory, test_database(
+        f'{directory}/import.sqlite3'
+    ):
+        write_feed(feed, args.items, args.format)
+        before = peak_rss_mb()
+        call_command('import_news', feed.name, batch_size=args.batch_size)
+        print(
+            f'Пиковая память: {before:.0f} МБ до импорта, '
+            f'{peak_rss_mb():.0f} МБ после'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Сравнение проверки запрещённых слов: цикл с `in` против автомата.
+
+python -m benchmarks.profanity
+"""
+import random
+import timeit
+
+from news.profanity import WordMatcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+DICTIONARY_SIZES = (10, 1_000, 50_000)
+REPEAT = 20
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def loop_search(words, text):
+    """Прежняя реализация CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def main():
+    rng = random.Random(0)
+    text = ' '.join(random_word(rng, rng.randint(2, 9)) for _ in range(200))
+    print(f'Длина комментария: {len(text)} символов, повторов: {REPEAT}')
+    print(
+        f'{"слов":>8} {"цикл, мс":>10} {"автомат, мс":>12} '
+        f'{"сборка, мс":>11}'
+    )
+    for size in DICTIONARY_SIZES:
+        # Длинные слова почти не встречаются в случайном тексте:
+        # это худший случай для цикла, он проверяет весь словарь.
+        words = [random_word(rng, rng.randint(8, 12)) for _ in range(size)]
+        build = timeit.timeit(lambda: WordMatcher(words), number=1)
+        matcher = WordMatcher(words)
+        loop = timeit.timeit(lambda: loop_search(words, text), number=REPEAT)
+        automaton = timeit.timeit(lambda: matcher.search(text), number=REPEAT)
+        print(
+            f'{size:>8} {loop / REPEAT * 1000:>10.3f} '
+            f'{automaton / REPEAT * 1000:>12.3f} {build * 1000:>11.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
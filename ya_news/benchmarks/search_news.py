@@ -0,0 +1,103 @@
+"""
+Задержка полнотекстового поиска на большой таблице новостей.
+
+python -m benchmarks.search_news --items 1000000
+
+Новости вставляются напрямую через executemany, индекс заполняют
+те же триггеры, что и в рабочей базе. Словарь синтетический, частоты
+слов распределены по закону Ципфа, как в обычном тексте.
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks import percentile, setup_django, test_database
+
+ROOTS = (
+    'новост', 'выбор', 'город', 'погод', 'спорт', 'матч', 'банк', 'курс',
+    'школ', 'дорог', 'театр', 'музе', 'завод', 'рынк', 'врач', 'суд',
+)
+ENDINGS = ('', 'а', 'ы', 'у', 'ом', 'ами', 'ах', 'ов', 'е', 'и')
+STOP_WORDS = (
+    'в', 'и', 'не', 'на', 'что', 'с', 'по', 'как', 'это', 'из', 'за',
+    'от', 'для', 'о', 'к', 'же', 'то', 'все', 'так', 'его',
+)
+QUERIES = (
+    'новости', 'выборы в городе', 'погода', 'курс банка', 'театральный',
+    'слово17', 'слово2 слово3', 'несуществующее',
+)
+
+
+def vocabulary(size):
+    """Служебные слова — самые частые, словоформы ROOTS — в середине."""
+    words = list(STOP_WORDS)
+    words += [f'слово{index}' for index in range(size - len(words))]
+    forms = [root + ending for root in ROOTS for ending in ENDINGS]
+    for form in forms:
+        words.insert(random.randrange(50, 2000), form)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    return words, weights
+
+
+def seed(connection, items, batch_size=10_000):
+    random.seed(0)
+    words, weights = vocabulary(20_000)
+    start = date(2000, 1, 1)
+    with connection.cursor() as cursor:
+        for offset in range(0, items, batch_size):
+            rows = []
+            for index in range(offset, min(items, offset + batch_size)):
+                text = random.choices(words, weights, k=60)
+                rows.append((
+                    ' '.join(text[:4]).capitalize(),
+                    ' '.join(text),
+                    start + timedelta(days=index % 8000),
+                ))
+            cursor.executemany(
+                'INSERT INTO news_news (title, text, date, comment_count) '
+                'VALUES (%s, %s, %s, 0)',
+                rows,
+            )
+
+
+def measure(query, repeat):
+    from news.search import search_news
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = search_news(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f'{query!r:28} найдено {len(results):2}  '
+        f'p50 {percentile(timings, 0.5):7.2f} мс  '
+        f'p95 {percentile(timings, 0.95):7.2f} мс'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import transaction
+    with tempfile.TemporaryDirectory() as directory, test_database(
+        f'{directory}/search.sqlite3'
+    ) as connection:
+        started = time.perf_counter()
+        with transaction.atomic():
+            seed(connection, args.items)
+        print(
+            f'Вставлено {args.items} новостей с индексацией '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
+        for query in QUERIES:
+            measure(query, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Конкурентные чтения и записи в SQLite: стандартный бэкенд против
+yanews.sqlite3 с WAL, BEGIN IMMEDIATE и постоянными соединениями.
+
+python -m benchmarks.sqlite_concurrency --readers 8 --writers 4
+
+Каждый режим запускается в отдельном процессе со своей базой в файле.
+Читатели повторяют запросы страницы новости, писатели в транзакции
+читают новость и добавляют комментарий. Перед и после каждой операции
+вызывается close_old_connections, как в начале и конце HTTP-запроса,
+поэтому без CONN_MAX_AGE соединение открывается на каждую операцию.
+"""
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from benchmarks import setup_django, test_database
+
+MODES = ('stock', 'tuned')
+NEWS_COUNT = 100
+
+
+def use_stock_backend():
+    """Настройки базы, какими они были до yanews.sqlite3."""
+    from django.conf import settings
+    settings.DATABASES['default'].update(
+        ENGINE='django.db.backends.sqlite3',
+        OPTIONS={},
+        CONN_MAX_AGE=0,
+        CONN_HEALTH_CHECKS=False,
+    )
+
+
+def seed():
+    from django.contrib.auth import get_user_model
+    from news.models import Comment, News
+    author = get_user_model().objects.create(username='Автор')
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст')
+        for index in range(NEWS_COUNT)
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        Comment(news_id=news_id, author=author, text='Комментарий')
+        for news_id in news_ids
+        for _ in range(20)
+    )
+    return author, news_ids
+
+
+def read(news_id, author):
+    from news.models import Comment, News
+    News.objects.get(pk=news_id)
+    list(Comment.objects.filter(news_id=news_id).select_related('author')[:20])
+
+
+def write(news_id, author):
+    from django.db import transaction
+    from news.models import Comment, News
+    with transaction.atomic():
+        news = News.objects.get(pk=news_id)
+        Comment.objects.create(news=news, author=author, text='Новый')
+
+
+def worker(operation, deadline, author, news_ids, stats):
+    from django.db import OperationalError, close_old_connections, connection
+    done, errors = 0, Counter()
+    while time.monotonic() < deadline:
+        close_old_connections()
+        try:
+            operation(random.choice(news_ids), author)
+            done += 1
+        except OperationalError as error:
+            errors[str(error)] += 1
+        close_old_connections()
+    connection.close()
+    with stats['lock']:
+        stats[operation.__name__] += done
+        stats['errors'].update(errors)
+
+
+def run(mode, readers, writers, seconds):
+    setup_django()
+    if mode == 'stock':
+        use_stock_backend()
+    from django.db import connection
+    with tempfile.TemporaryDirectory() as directory, test_database(
+        f'{directory}/{mode}.sqlite3'
+    ):
+        author, news_ids = seed()
+        connection.close()
+        stats = {'lock': threading.Lock(), 'read': 0, 'write': 0,
+                 'errors': Counter()}
+        deadline = time.monotonic() + seconds
+        threads = [
+            threading.Thread(
+                target=worker,
+                args=(operation, deadline, author, news_ids, stats),
+            )
+            for operation, count in ((read, readers), (write, writers))
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    print(
+        f'{mode:6} ({connection.settings_dict["ENGINE"]}): '
+        f'чтений {stats["read"] / seconds:8.0f}/с, '
+        f'записей {stats["write"] / seconds:6.0f}/с, '
+        f'ошибок {sum(stats["errors"].values())}'
+    )
+    for message, count in stats['errors'].most_common():
+        print(f'    {count} × {message}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+    if args.mode:
+        run(args.mode, args.readers, args.writers, args.seconds)
+        return
+    for mode in MODES:
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.sqlite_concurrency',
+             '--mode', mode, '--readers', str(args.readers),
+             '--writers', str(args.writers), '--seconds', str(args.seconds)],
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
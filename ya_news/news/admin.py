@@ -1,15 +1,119 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
 
 from .models import Comment, News
 
 
+class LatestCommentsFormSet(BaseInlineFormSet):
+    """Только последние комментарии; остальные — в CommentAdmin."""
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            self._queryset = super().get_queryset()[
+                :settings.ADMIN_COMMENTS_INLINE_LIMIT
+            ]
+        return self._queryset
+
+
 class CommentInline(admin.StackedInline):
+    """
+    Комментарии на странице новости.
+
+    Автор только для чтения и загружается тем же запросом: поле выбора
+    пользователя строило бы список всех пользователей для каждой формы.
+    """
     model = Comment
+    formset = LatestCommentsFormSet
     extra = 0
+    fields = ('author', 'created', 'text')
+    readonly_fields = ('author', 'created')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author'
+        ).order_by('-created', '-id')
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
+    """
+    Число комментариев в списке берётся из счётчика News.comment_count,
+    поэтому список новостей не обращается к таблице комментариев.
+    """
+    list_display = ('title', 'date', 'comment_count')
+    readonly_fields = ('comments_link',)
     inlines = [
         CommentInline,
     ]
+
+    @admin.display(description='Комментарии')
+    def comments_link(self, news):
+        url = reverse('admin:news_comment_changelist')
+        return format_html(
+            '<a href="{}?news__id__exact={}">Все комментарии ({})</a>',
+            url, news.pk, news.comment_count,
+        )
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator, которому число объектов передаётся готовым."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.count = count
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """
+    Список комментариев без COUNT(*) по всей таблице.
+
+    Без фильтров число комментариев оценивается по MAX(id), при фильтре
+    по новости берётся из её счётчика. Оценка по MAX(id) завышена
+    на число удалённых комментариев, поэтому последние страницы
+    списка могут оказаться пустыми.
+
+    Новость существующего комментария менять нельзя: сигналы ведут
+    счётчики и версии карточек только при создании и удалении.
+    """
+    list_display = ('id', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    raw_id_fields = ('news', 'author')
+    ordering = ('-id',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    # Параметры списка, которые не фильтруют комментарии.
+    page_params = {'p', 'o'}
+
+    def get_readonly_fields(self, request, obj=None):
+        readonly_fields = super().get_readonly_fields(request, obj)
+        if obj is not None:
+            return (*readonly_fields, 'news')
+        return readonly_fields
+
+    def estimate_count(self, request):
+        filters = set(request.GET) - self.page_params
+        if not filters:
+            return Comment.objects.aggregate(last=Max('id'))['last'] or 0
+        news_id = request.GET.get('news__id__exact', '')
+        if filters == {'news__id__exact'} and news_id.isdigit():
+            return News.objects.filter(pk=news_id).values_list(
+                'comment_count', flat=True
+            ).first() or 0
+        return None
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, count=self.estimate_count(request),
+            orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+        )
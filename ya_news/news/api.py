@@ -0,0 +1,165 @@
+"""
+Потоковый API только для чтения: новости и комментарии в JSON и NDJSON.
+
+Ответ собирается из QuerySet.values().iterator(), поэтому выгрузка
+обсуждения любого размера идёт в постоянной памяти. Каждая запись
+содержит курсор; передайте курсор последней полученной записи
+в параметре after, чтобы продолжить с того же места. Параметр limit
+ограничивает число записей, но не больше API_MAX_LIMIT.
+
+Курсор и limit проверяются до начала ответа: ошибка в них — это 400,
+а не оборванный поток после заголовков 200.
+"""
+from datetime import date
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_safe
+
+from .models import Comment, News
+from .pagination import after, decode_cursor, format_cursor, parse_id
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+COMMENT_FIELDS = ('id', 'news_id', 'author_id', 'text', 'created')
+DATE_FORMAT = '%Y%m%d'
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def encode_news_cursor(row):
+    return f'{row["date"].strftime(DATE_FORMAT)}-{row["id"]}'
+
+
+def decode_news_cursor(cursor):
+    try:
+        day, pk = cursor.split('-')
+        return (
+            date(int(day[:4]), int(day[4:6]), int(day[6:])), parse_id(pk)
+        )
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def get_cursor(request, decode):
+    cursor = request.GET.get('after')
+    if cursor is None:
+        return None
+    position = decode(cursor)
+    if position is None:
+        raise BadRequest('Некорректный курсор.')
+    return position
+
+
+def get_limit(request):
+    limit = request.GET.get('limit')
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = 0
+    if limit <= 0:
+        raise BadRequest('limit должен быть положительным числом.')
+    return min(limit, settings.API_MAX_LIMIT)
+
+
+def get_format(request):
+    output_format = request.GET.get('format', 'json')
+    if output_format not in CONTENT_TYPES:
+        formats = ', '.join(CONTENT_TYPES)
+        raise BadRequest(f'Поддерживаются форматы: {formats}.')
+    return output_format
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def encode_rows(rows, output_format, with_cursor):
+    """
+    Кодирует строки пачками по API_CHUNK_SIZE.
+
+    Для JSON открывающая скобка уходит клиенту до выполнения запроса.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    ndjson = output_format == 'ndjson'
+    if not ndjson:
+        yield '['
+    separator = ''
+    for chunk in chunked(rows, settings.API_CHUNK_SIZE):
+        encoded = [
+            encoder.encode({**row, 'cursor': with_cursor(row)})
+            for row in chunk
+        ]
+        if ndjson:
+            yield '\n'.join(encoded) + '\n'
+        else:
+            yield separator + ','.join(encoded)
+            separator = ','
+    if not ndjson:
+        yield ']'
+
+
+def stream(request, queryset, fields, with_cursor):
+    output_format = get_format(request)
+    limit = get_limit(request)
+    if limit:
+        queryset = queryset[:limit]
+    rows = queryset.values(*fields).iterator(
+        chunk_size=settings.API_CHUNK_SIZE
+    )
+    return StreamingHttpResponse(
+        encode_rows(rows, output_format, with_cursor),
+        content_type=CONTENT_TYPES[output_format],
+    )
+
+
+def bad_request(error):
+    return JsonResponse({'error': str(error)}, status=400)
+
+
+@require_safe
+def news_list(request):
+    """Новости в порядке главной страницы: (-date, id)."""
+    try:
+        position = get_cursor(request, decode_news_cursor)
+        queryset = News.objects.order_by(F('date').desc(), 'id')
+        if position:
+            day, pk = position
+            queryset = queryset.filter(
+                Q(date__lt=day) | Q(date=day, pk__gt=pk)
+            )
+        return stream(request, queryset, NEWS_FIELDS, encode_news_cursor)
+    except BadRequest as error:
+        return bad_request(error)
+
+
+@require_safe
+def comment_list(request, pk):
+    """Комментарии к новости в порядке (created, id)."""
+    if not News.objects.filter(pk=pk).exists():
+        raise Http404
+    try:
+        position = get_cursor(request, decode_cursor)
+        queryset = Comment.objects.filter(news_id=pk).order_by('created', 'id')
+        if position:
+            queryset = queryset.filter(after(position))
+        return stream(
+            request,
+            queryset,
+            COMMENT_FIELDS,
+            lambda row: format_cursor(row['created'], row['id']),
+        )
+    except BadRequest as error:
+        return bad_request(error)
@@ -0,0 +1,23 @@
+from django.urls import path
+
+from news import api, async_views, views
+
+app_name = 'news'
+
+urlpatterns = [
+    path('', async_views.news_list, name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', async_views.news_detail, name='detail'),
+    path(
+        'delete_comment/<int:pk>/',
+        views.CommentDelete.as_view(),
+        name='delete'
+    ),
+    path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.news_list, name='api_news'),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.comment_list,
+        name='api_comments'
+    ),
+]
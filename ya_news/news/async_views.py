@@ -0,0 +1,160 @@
+"""
+Асинхронные версии страниц новостей для запуска под ASGI.
+
+Django 3.2 не умеет выполнять ORM в цикле событий, поэтому вся работа
+с базой идёт в отдельном ограниченном пуле потоков (ORM_EXECUTOR),
+а рендеринг шаблонов — через sync_to_async в пуле по умолчанию.
+В цикле событий остаются только условный GET и сборка ответа.
+Подключаются через yanews/asgi_urls.py. Декораторы Django 3.2
+синхронные, поэтому проверки метода и условный GET сделаны вручную.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+from django.http import (
+    HttpResponse, HttpResponseNotAllowed, HttpResponseRedirect
+)
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .cards import render_cards
+from .conditional import detail_etag, home_etag
+from .forms import CommentForm
+from .models import News
+from .pagination import comment_page_query, get_comment_page
+
+ORM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.NEWS_ASYNC_ORM_THREADS,
+    thread_name_prefix='news-orm',
+)
+
+
+def with_connection_cleanup(func, *args, **kwargs):
+    """Поток пула живёт дольше запроса: закрываем соединения так же,
+    как Django делает это по сигналам начала и конца запроса.
+    """
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_orm(func, *args, **kwargs):
+    """
+    run_in_executor, в отличие от sync_to_async, не переносит contextvars
+    в поток: копируем контекст, чтобы обёртки запросов middleware
+    (yanews/execute_wrappers.py) видели и ORM пула.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        ORM_EXECUTOR,
+        partial(context.run, with_connection_cleanup, func, *args, **kwargs),
+    )
+
+
+render = sync_to_async(render_to_string, thread_sensitive=False)
+
+
+def not_modified(request, etag):
+    return get_conditional_response(request, etag=quote_etag(etag))
+
+
+def with_etag(response, etag):
+    if etag is not None:
+        response['ETag'] = quote_etag(etag)
+    return response
+
+
+def load_home(request):
+    """
+    Пользователя загружаем здесь же: иначе шапка шаблона прочитала бы
+    сессию и auth_user в потоке рендеринга, вне пула ORM.
+    """
+    request.user.is_authenticated
+    news_list = list(News.objects.home_page())
+    return {'object_list': news_list, 'cards': render_cards(news_list)}
+
+
+def load_detail(request, pk, form=None):
+    """Загружает всё, что нужно шаблону, до рендеринга."""
+    news = get_object_or_404(News, pk=pk)
+    if request.user.is_authenticated and form is None:
+        form = CommentForm()
+    return {
+        'news': news,
+        'object': news,
+        'comments_page': get_comment_page(
+            news.comment_set.select_related('author'), request.GET
+        ),
+        'form': form,
+    }
+
+
+def save_comment(request, pk):
+    """Возвращает URL для редиректа или контекст с ошибками формы."""
+    news = get_object_or_404(News, pk=pk)
+    form = CommentForm(request.POST)
+    if not form.is_valid():
+        return None, load_detail(request, pk, form)
+    comment = form.save(commit=False)
+    comment.news = news
+    comment.author = request.user
+    comment.save()
+    url = (
+        reverse('news:detail', kwargs={'pk': pk})
+        + comment_page_query(comment)
+        + '#comments'
+    )
+    return url, None
+
+
+async def news_list(request):
+    """Список новостей."""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    etag = await run_orm(home_etag, request)
+    if etag is not None:
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+    context = await run_orm(load_home, request)
+    content = await render('news/home.html', context, request)
+    return with_etag(HttpResponse(content), etag)
+
+
+async def news_detail(request, pk):
+    """Новость с комментариями и публикация комментария."""
+    if request.method == 'POST':
+        return await news_comment(request, pk)
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD', 'POST'])
+    etag = await run_orm(detail_etag, request, pk)
+    if etag is not None:
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+    context = await run_orm(load_detail, request, pk)
+    content = await render('news/detail.html', context, request)
+    return with_etag(HttpResponse(content), etag)
+
+
+async def news_comment(request, pk):
+    is_authenticated = await run_orm(lambda: request.user.is_authenticated)
+    if not is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    url, context = await run_orm(save_comment, request, pk)
+    if url:
+        return HttpResponseRedirect(url)
+    content = await render('news/detail.html', context, request)
+    return HttpResponse(content)
@@ -0,0 +1,135 @@
+"""
+Кэш отрендеренных карточек новостей для главной страницы.
+
+Ключ карточки строится из поколения кэша, pk новости и её версии.
+Версия меняется сигналами при изменении новости или её комментариев,
+поэтому новый комментарий сбрасывает только карточку своей новости.
+Поколение сбрасывает сразу все карточки после массовых операций.
+
+Версии меняются после фиксации транзакции: откат ничего не сбрасывает,
+а читатель, успевший до фиксации, не положит старую карточку в кэш
+под новой версией.
+
+Версии и карточки хранятся в кэше по умолчанию. Кэш каждого процесса
+(LocMemCache) для этого не годится: новый комментарий сбросит
+карточку только в своём воркере. Поэтому NEWS_CARD_CACHE по умолчанию
+включён только с общим кэшем, а проверка check_card_cache
+предупреждает, если его включили вручную на кэше процесса.
+"""
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'news/includes/card.html'
+GENERATION_KEY = 'news-card:generation'
+HITS_KEY = 'news-card:hits'
+MISSES_KEY = 'news-card:misses'
+
+
+def version_key(news_id):
+    return f'news-card:{news_id}:version'
+
+
+def card_key(generation, news_id, version):
+    return f'news-card:{generation}:{news_id}:{version}'
+
+
+def new_version():
+    """Версия уникальна во времени, даже если старая вытеснена из кэша."""
+    return time.time_ns()
+
+
+def bump_card_version(news_id):
+    transaction.on_commit(
+        lambda: cache.set(version_key(news_id), new_version(), None)
+    )
+
+
+def invalidate_all_cards():
+    transaction.on_commit(
+        lambda: cache.set(GENERATION_KEY, new_version(), None)
+    )
+
+
+def get_card_versions(news_ids):
+    """
+    Возвращает поколение кэша и версии карточек.
+
+    Отсутствующие версии создаются, чтобы следующий запрос их нашёл.
+    """
+    keys = {version_key(news_id): news_id for news_id in news_ids}
+    found = cache.get_many([GENERATION_KEY, *keys])
+    missing = {key: new_version() for key in keys if key not in found}
+    if GENERATION_KEY not in found:
+        missing[GENERATION_KEY] = new_version()
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    versions = {news_id: found[key] for key, news_id in keys.items()}
+    return found[GENERATION_KEY], versions
+
+
+def count(key, delta):
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+
+def render_cards(news_list):
+    """Отдаёт HTML карточек, рендеря только отсутствующие в кэше."""
+    if not settings.NEWS_CARD_CACHE:
+        return [
+            mark_safe(render_to_string(CARD_TEMPLATE, {'news': news}))
+            for news in news_list
+        ]
+    generation, versions = get_card_versions(news.pk for news in news_list)
+    keys = [
+        card_key(generation, news.pk, versions[news.pk]) for news in news_list
+    ]
+    cached = cache.get_many(keys)
+    rendered = {}
+    for key, news in zip(keys, news_list):
+        if key not in cached:
+            rendered[key] = render_to_string(CARD_TEMPLATE, {'news': news})
+    if rendered:
+        cache.set_many(rendered, settings.NEWS_CARD_CACHE_TIMEOUT)
+    count(HITS_KEY, len(keys) - len(rendered))
+    count(MISSES_KEY, len(rendered))
+    cached.update(rendered)
+    return [mark_safe(cached[key]) for key in keys]
+
+
+def card_cache_stats():
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = stats.get(HITS_KEY, 0), stats.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+@checks.register(checks.Tags.caches)
+def check_card_cache(app_configs, **kwargs):
+    """Карточки на кэше процесса устаревают в остальных воркерах."""
+    from yanews.auth_cache import is_process_local
+
+    if settings.NEWS_CARD_CACHE and is_process_local(DEFAULT_CACHE_ALIAS):
+        return [checks.Warning(
+            'Карточки новостей кэшируются в кэше каждого процесса: '
+            'изменения видны только в том воркере, где они сделаны.',
+            hint='Настройте в CACHES общий кэш (Memcached, Redis) или '
+                 'выключите NEWS_CARD_CACHE.',
+            id='news.W001',
+        )]
+    return []
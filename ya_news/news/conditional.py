@@ -0,0 +1,66 @@
+"""
+Валидатор ETag для условных GET-запросов к страницам новостей.
+
+ETag считается дешёвыми запросами по индексам и версиям карточек
+из кэша до выполнения view, поэтому на совпавший If-None-Match сервер
+отвечает 304 без рендеринга шаблона. Версию карточки сигналы меняют
+при любом изменении новости и при создании, правке и удалении её
+комментариев, так что таблицу комментариев читать не нужно.
+
+Пользователь входит в ETag: от него зависят шапка страницы и ссылки
+на редактирование и удаление своих комментариев. Last-Modified
+страницы не отдают: в дату не закодировать ни пользователя, ни правку
+или удаление, и клиент, приславший только If-Modified-Since, получил
+бы устаревший ответ 304.
+
+Версии карточек живут в кэше по умолчанию. С кэшем процесса
+(LocMemCache) другой воркер не узнал бы об изменении и ответил бы 304
+на уже изменённую страницу, поэтому NEWS_ETAGS по умолчанию включён
+только с общим кэшем, а без него страницы отдаются без ETag.
+"""
+import hashlib
+
+from django.conf import settings
+
+from .cards import get_card_versions
+from .models import News
+
+
+def user_state(request):
+    user = request.user
+    return user.pk if user.is_authenticated else 'anonymous'
+
+
+def build_etag(request, news_rows):
+    """Хэш состояния набора строк (pk, date, comment_count)."""
+    news_ids = [row[0] for row in news_rows]
+    generation, versions = get_card_versions(news_ids)
+    state = (
+        generation,
+        news_rows,
+        [versions[news_id] for news_id in news_ids],
+        request.GET.urlencode(),
+        user_state(request),
+    )
+    return hashlib.md5(repr(state).encode()).hexdigest()
+
+
+def home_etag(request, *args, **kwargs):
+    if not settings.NEWS_ETAGS:
+        return None
+    return build_etag(
+        request,
+        list(News.objects.values_list(
+            'pk', 'date', 'comment_count'
+        )[:settings.NEWS_COUNT_ON_HOME_PAGE]),
+    )
+
+
+def detail_etag(request, pk, *args, **kwargs):
+    """Для несуществующей новости валидатора нет — view отдаст 404."""
+    if not settings.NEWS_ETAGS:
+        return None
+    news_rows = list(
+        News.objects.filter(pk=pk).values_list('pk', 'date', 'comment_count')
+    )
+    return build_etag(request, news_rows) if news_rows else None
@@ -1,7 +1,10 @@
 from django.core.exceptions import ValidationError
 from django.forms import ModelForm
 
+from yanews.server_timing import TimedFormMixin
+
 from .models import Comment
+from .profanity import ReloadableWordMatcher
 
 BAD_WORDS = (
     'редиска',
@@ -10,8 +13,10 @@ BAD_WORDS = (
 )
 WARNING = 'Не ругайтесь!'
 
+bad_words = ReloadableWordMatcher(BAD_WORDS)
+
 
-class CommentForm(ModelForm):
+class CommentForm(TimedFormMixin, ModelForm):
 
     class Meta:
         model = Comment
@@ -20,8 +25,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if bad_words.search(text):
+            raise ValidationError(WARNING)
         return text
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.cards import invalidate_all_cards
+from news.models import News, make_excerpt
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет анонсы новостей, загруженных в обход save(): '
+        'loaddata, QuerySet.update().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все анонсы, например после смены '
+                 'NEWS_EXCERPT_WORDS.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        queryset = News.objects.order_by('pk').only('pk', 'text', 'excerpt')
+        if not options['all']:
+            queryset = queryset.filter(excerpt='')
+        updated, last_pk = 0, 0
+        while batch := list(queryset.filter(pk__gt=last_pk)[:batch_size]):
+            changed = []
+            for news in batch:
+                excerpt = make_excerpt(news.text)
+                if news.excerpt != excerpt:
+                    news.excerpt = excerpt
+                    changed.append(news)
+            News.objects.bulk_update(changed, ['excerpt'])
+            updated += len(changed)
+            last_pk = batch[-1].pk
+        if updated:
+            invalidate_all_cards()
+        self.stdout.write(
+            self.style.SUCCESS(f'Анонсы обновлены у {updated} новостей.')
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.cards import card_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша карточек новостей.'
+
+    def handle(self, *args, **options):
+        stats = card_cache_stats()
+        self.stdout.write(
+            'Попаданий: {hits}, промахов: {misses}, '
+            'доля попаданий: {hit_ratio:.1%}'.format(**stats)
+        )
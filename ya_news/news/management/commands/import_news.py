@@ -0,0 +1,195 @@
+import json
+import re
+import time
+from datetime import date
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+
+from news.cards import bump_card_version
+from news.models import News
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+READ_SIZE = 64 * 1024
+# Столько символов в конце буфера может занимать оборванная лексема:
+# самая длинная — суррогатная пара \uXXXX\uXXXX и число.
+INCOMPLETE_TAIL = 16
+
+
+def incomplete(error, buffer):
+    """
+    Может ли ошибка объясняться тем, что элемент не дочитан.
+
+    Оборванный элемент даёт ошибку у конца буфера (литерал, число,
+    escape-последовательность) или незакрытую строку. Ошибка раньше — это
+    некорректный JSON, и дочитывать файл до конца незачем.
+    """
+    return (
+        error.msg.startswith('Unterminated string')
+        or len(buffer) - error.pos <= INCOMPLETE_TAIL
+    )
+
+
+def iter_json_array(stream):
+    """
+    Читает элементы JSON-массива по одному, не загружая файл целиком.
+
+    В памяти держится только текущий кусок файла.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position = stream.read(READ_SIZE), 0
+    # Сколько символов файла прочитано до начала buffer.
+    offset = 0
+    position = WHITESPACE.match(buffer, position).end()
+    if buffer[position:position + 1] != '[':
+        raise CommandError('Ожидался JSON-массив.')
+    position += 1
+    expect_item = True
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            offset += len(buffer)
+            buffer, position = stream.read(READ_SIZE), 0
+            if not buffer:
+                raise CommandError('Файл оборвался внутри JSON-массива.')
+            continue
+        char = buffer[position]
+        if char == ']':
+            return
+        if char == ',' and not expect_item:
+            position += 1
+            expect_item = True
+            continue
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            more = stream.read(READ_SIZE) if incomplete(error, buffer) else ''
+            if not more:
+                raise CommandError(
+                    f'Некорректный JSON на символе {offset + error.pos}: '
+                    f'{error.msg}.'
+                )
+            offset += position
+            buffer, position = buffer[position:] + more, 0
+            continue
+        expect_item = False
+        yield item
+
+
+def iter_ndjson(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                raise CommandError(f'Строка {line_number}: {error}')
+
+
+def iter_items(stream):
+    """Формат определяется по первому символу: '[' — JSON, иначе NDJSON."""
+    head = stream.read(1)
+    while head.isspace():
+        head = stream.read(1)
+    stream.seek(0)
+    return iter_json_array(stream) if head == '[' else iter_ndjson(stream)
+
+
+def to_fields(item):
+    """Принимает и формат фикстур (model/fields), и плоские объекты."""
+    fields = item.get('fields', item)
+    try:
+        return (
+            fields['title'],
+            date.fromisoformat(fields['date']) if fields.get('date')
+            else date.today(),
+            fields['text'],
+        )
+    except (KeyError, TypeError, ValueError) as error:
+        raise CommandError(f'Некорректная новость {item!r}: {error}')
+
+
+def batched(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует новости из JSON или NDJSON в формате '
+        'news/fixtures/news.json. Новость с тем же заголовком и датой '
+        'обновляется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSON или NDJSON.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько новостей вставлять в одной транзакции.'
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        self.created = self.updated = self.unchanged = 0
+        started = time.perf_counter()
+        with open(path, encoding='utf-8') as stream:
+            for batch in batched(iter_items(stream), batch_size):
+                self.import_batch(batch)
+                # При DEBUG=True Django копит текст запросов в памяти.
+                reset_queries()
+                if options['verbosity'] > 1:
+                    self.report(started, self.stderr)
+        self.report(started, self.stdout)
+
+    @transaction.atomic
+    def import_batch(self, items):
+        """
+        Вставляет новые новости и обновляет текст существующих.
+
+        Дубликаты внутри пачки схлопываются, побеждает последний.
+        """
+        incoming = {}
+        for item in items:
+            title, day, text = to_fields(item)
+            incoming[title, day] = text
+        # Ищем только по заголовку: с условием на дату SQLite выбирает
+        # индекс по дате и просматривает все новости за эти дни.
+        # Заголовки — по max_query_params за запрос: старые сборки
+        # SQLite не принимают больше 999 параметров.
+        existing = {}
+        titles = {title for title, _ in incoming}
+        for chunk in batched(titles, connection.features.max_query_params):
+            existing.update(
+                ((news.title, news.date), news)
+                for news in News.objects.filter(title__in=chunk).only(
+                    'id', 'title', 'date', 'text'
+                )
+                if (news.title, news.date) in incoming
+            )
+        new, changed = [], []
+        for (title, day), text in incoming.items():
+            news = existing.get((title, day))
+            if news is None:
+                new.append(News(title=title, date=day, text=text))
+            elif news.text != text:
+                news.text = text
+                changed.append(news)
+        News.objects.bulk_create(new)
+        News.objects.bulk_update(changed, ['text'])
+        for news in changed:
+            bump_card_version(news.pk)
+        self.created += len(new)
+        self.updated += len(changed)
+        self.unchanged += len(incoming) - len(new) - len(changed)
+
+    def report(self, started, output):
+        elapsed = time.perf_counter() - started
+        total = self.created + self.updated + self.unchanged
+        rate = total / elapsed if elapsed else 0
+        output.write(
+            f'Создано: {self.created}, обновлено: {self.updated}, '
+            f'без изменений: {self.unchanged}; '
+            f'{total} строк за {elapsed:.1f} с ({rate:.0f} строк/с)'
+        )
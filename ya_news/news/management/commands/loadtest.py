@@ -0,0 +1,102 @@
+from itertools import cycle
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from news.models import Comment, News
+from yanews.loadtest import LoadTestCommand, Scenario, Visitor
+
+SEARCH_WORDS = ('новость', 'текст', 'события', 'город')
+
+
+class Command(LoadTestCommand):
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument(
+            '--comments', type=int, default=10, help='Комментариев к новости'
+        )
+        parser.add_argument('--users', type=int, default=20)
+
+    def seed(self, **options):
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(username=f'loadtest{index}')
+            for index in range(options['users'])
+        )
+        users = list(User.objects.order_by('pk'))
+        News.objects.bulk_create(
+            News(
+                title=f'Новость {index}',
+                text=f'Текст новости {index} о событиях в городе.',
+            )
+            for index in range(options['news'])
+        )
+        news_ids = list(News.objects.values_list('pk', flat=True))
+        authors = cycle(users)
+        Comment.objects.bulk_create(
+            Comment(
+                news_id=news_id,
+                author=next(authors),
+                text=f'Комментарий {index}',
+            )
+            for news_id in news_ids
+            for index in range(options['comments'])
+        )
+        own_comments = {user.pk: [] for user in users}
+        for pk, author_id in Comment.objects.values_list('pk', 'author_id'):
+            own_comments[author_id].append(pk)
+        visitors = [
+            Visitor.login(user, comments=own_comments[user.pk])
+            for user in users
+        ]
+        return self.scenarios(news_ids), visitors
+
+    def scenarios(self, news_ids):
+        def detail(rng, visitor):
+            return reverse('news:detail', args=(rng.choice(news_ids),))
+
+        def own_comment(name):
+            def path(rng, visitor):
+                comment_id = rng.choice(visitor.objects['comments'])
+                return reverse(name, args=(comment_id,))
+            return path
+
+        def fixed(name):
+            return lambda rng, visitor: reverse(name)
+
+        return [
+            Scenario('news:home', 30, fixed('news:home')),
+            Scenario('news:home', 10, fixed('news:home'), user=True),
+            Scenario('news:detail', 25, detail),
+            Scenario('news:detail', 10, detail, user=True),
+            Scenario(
+                'news:detail', 3, detail, method='POST', user=True,
+                data=lambda rng, visitor: {'text': 'Нагрузочный комментарий'},
+                status=302,
+            ),
+            Scenario(
+                'news:search', 5,
+                lambda rng, visitor: reverse('news:search') + '?' + urlencode(
+                    {'q': rng.choice(SEARCH_WORDS)}
+                ),
+            ),
+            Scenario('news:edit', 2, own_comment('news:edit'), user=True),
+            Scenario(
+                'news:edit', 2, own_comment('news:edit'), method='POST',
+                user=True, status=302,
+                data=lambda rng, visitor: {'text': 'Исправленный комментарий'},
+            ),
+            Scenario('news:delete', 1, own_comment('news:delete'), user=True),
+            Scenario('news:api_news', 3, fixed('news:api_news')),
+            Scenario(
+                'news:api_comments', 3,
+                lambda rng, visitor: reverse(
+                    'news:api_comments', args=(rng.choice(news_ids),)
+                ),
+            ),
+            Scenario('users:login', 2, fixed('users:login')),
+            Scenario('users:signup', 1, fixed('users:signup')),
+        ]
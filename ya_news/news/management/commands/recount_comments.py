@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.cards import invalidate_all_cards
+from news.models import Comment, News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованный счётчик комментариев новостей.'
+
+    def handle(self, *args, **options):
+        counts = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(
+            total=Count('pk')
+        ).values('total')
+        updated = News.objects.update(
+            comment_count=Coalesce(Subquery(counts), 0)
+        )
+        invalidate_all_cards()
+        self.stdout.write(
+            self.style.SUCCESS(f'Счётчики пересчитаны для {updated} новостей.')
+        )
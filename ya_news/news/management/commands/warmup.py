@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from yanews.warmup import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует шаблоны, заполняет URL-резолверы и загружает '
+        'каталоги перевода.'
+    )
+
+    def handle(self, *args, **options):
+        for stage, result, duration in warmup():
+            self.stdout.write(f'{stage}: {result}, {duration:.1f} мс')
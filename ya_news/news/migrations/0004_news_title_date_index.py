@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['title', 'date'], name='news_title_date_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# Индекс FTS5 с внешним содержимым: тексты лежат только в news_news.
+# Триггер на обновление срабатывает лишь при смене заголовка или текста,
+# чтобы изменения счётчика комментариев не трогали индекс.
+# rank по умолчанию — bm25, где совпадение в заголовке весит в 10 раз
+# больше: ORDER BY rank FTS5 сортирует сам, без временного B-дерева.
+CREATE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE news_search USING fts5(
+        title, text,
+        content='news_news', content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER news_search_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_search(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_search_delete AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_search(news_search, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_search_update AFTER UPDATE OF title, text
+    ON news_news BEGIN
+        INSERT INTO news_search(news_search, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_search(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    INSERT INTO news_search(news_search, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0)')
+    """,
+    "INSERT INTO news_search(news_search) VALUES ('rebuild')",
+]
+
+DROP_SEARCH = [
+    'DROP TRIGGER news_search_update',
+    'DROP TRIGGER news_search_delete',
+    'DROP TRIGGER news_search_insert',
+    'DROP TABLE news_search',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_title_date_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SEARCH, DROP_SEARCH),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.15 on 2026-10-18 05:24
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+
+def fill_excerpt(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    last_pk = 0
+    while batch := list(
+        News.objects.filter(pk__gt=last_pk).order_by('pk')
+        .only('pk', 'text')[:BATCH_SIZE]
+    ):
+        for news in batch:
+            news.excerpt = Truncator(news.text).words(15, truncate=' …')
+        News.objects.bulk_update(batch, ['excerpt'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_search'),
+    ]
+
+    operations = [
+        # AddField в SQLite пересоздаёт таблицу: копирует все новости
+        # и теряет триггеры индекса news_search из 0005. ALTER TABLE
+        # ADD COLUMN меняет только схему.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "ALTER TABLE news_news "
+                    "ADD COLUMN excerpt text NOT NULL DEFAULT ''",
+                    'ALTER TABLE news_news DROP COLUMN excerpt',
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='news',
+                    name='excerpt',
+                    field=models.TextField(blank=True, editable=False, help_text='Начало текста для карточки на главной.', verbose_name='Анонс'),
+                ),
+            ],
+        ),
+        migrations.RunPython(fill_excerpt, migrations.RunPython.noop),
+    ]
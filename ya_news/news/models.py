@@ -1,22 +1,137 @@
+from collections import Counter
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.utils.text import Truncator
+
+from .cards import bump_card_version
+
+
+def make_excerpt(text):
+    """Начало текста для карточки: то же, что фильтр truncatewords."""
+    return Truncator(text).words(settings.NEWS_EXCERPT_WORDS, truncate=' …')
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def home_page(self):
+        """
+        Последние новости для главной, их число — в настройках проекта.
+        Карточке нужен только анонс, полный текст не загружается.
+        """
+        return self.defer('text')[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create не вызывает save(), анонс заполняем здесь."""
+        objs = list(objs)
+        for news in objs:
+            news.excerpt = make_excerpt(news.text)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'text' in fields and 'excerpt' not in fields:
+            objs = list(objs)
+            for news in objs:
+                news.excerpt = make_excerpt(news.text)
+            fields = [*fields, 'excerpt']
+        return super().bulk_update(objs, fields, *args, **kwargs)
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
+    excerpt = models.TextField(
+        'Анонс',
+        blank=True,
+        editable=False,
+        help_text='Начало текста для карточки на главной.',
+    )
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', 'id'), name='news_date_id_idx'),
+            models.Index(fields=('title', 'date'), name='news_title_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, update_fields=None, **kwargs):
+        """
+        Анонс пересчитывается вместе с текстом. QuerySet.update()
+        и loaddata его не трогают: для них есть backfill_excerpts.
+
+        Счётчик комментариев меняют только атомарные UPDATE с F(),
+        поэтому при изменении новости он не записывается: иначе
+        устаревшее значение из памяти затёрло бы новые комментарии.
+        """
+        if (update_fields is None and not self._state.adding
+                and not kwargs.get('force_insert')):
+            update_fields = {
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comment_count'
+            }
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = make_excerpt(self.text)
+            if update_fields is not None:
+                update_fields = {*update_fields, 'excerpt'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+def change_comment_counts(per_news, sign=1):
+    """
+    Атомарно меняет счётчики комментариев: один UPDATE на новость.
+
+    per_news — пары (news_id, число комментариев).
+    """
+    for news_id, count in per_news:
+        News.objects.filter(pk=news_id).update(
+            comment_count=F('comment_count') + sign * count
+        )
+        bump_card_version(news_id)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        bulk_create не отправляет post_save, поэтому счётчики
+        комментариев и версии карточек обновляем здесь.
+        """
+        objs = super().bulk_create(objs, *args, **kwargs)
+        change_comment_counts(
+            Counter(comment.news_id for comment in objs).items()
+        )
+        return objs
+
+    def count_per_news(self):
+        return self.order_by().values_list('news_id').annotate(Count('pk'))
+
+    def delete(self):
+        """
+        У комментариев нет получателей post_delete, поэтому Django
+        удаляет их одним DELETE; счётчики уменьшаем по одному UPDATE
+        на новость, а не на комментарий.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            per_news = list(self.count_per_news())
+            deleted = super().delete()
+            change_comment_counts(per_news, sign=-1)
+        return deleted
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -30,8 +145,24 @@ class Comment(models.Model):
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('author', 'id'), name='comment_author_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            deleted = super().delete(*args, **kwargs)
+            change_comment_counts([(self.news_id, 1)], sign=-1)
+        return deleted
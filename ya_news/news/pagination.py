@@ -0,0 +1,130 @@
+"""
+Курсорная (keyset) пагинация комментариев.
+
+Комментарии упорядочены по (created, id); курсор кодирует эту пару,
+поэтому соседние страницы выбираются условием WHERE по индексу,
+без OFFSET.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+CURSOR_TIME_FORMAT = '%Y%m%d%H%M%S%f'
+# Диапазон INTEGER в SQLite: большее число не привязать к запросу.
+MIN_ID = -2 ** 63
+MAX_ID = 2 ** 63 - 1
+
+
+def format_cursor(created, pk):
+    """Курсор: время создания в UTC и id."""
+    created = created.astimezone(timezone.utc)
+    return f'{created.strftime(CURSOR_TIME_FORMAT)}-{pk}'
+
+
+def encode_cursor(comment):
+    return format_cursor(comment.created, comment.pk)
+
+
+def parse_id(value):
+    """Число id из курсора; ValueError, если оно не помещается в INTEGER."""
+    pk = int(value)
+    if not MIN_ID <= pk <= MAX_ID:
+        raise ValueError(f'id вне допустимого диапазона: {value}')
+    return pk
+
+
+def decode_cursor(cursor):
+    """Возвращает пару (created, id) или None для некорректного курсора."""
+    try:
+        created, pk = cursor.split('-')
+        created = datetime.strptime(created, CURSOR_TIME_FORMAT)
+        return created.replace(tzinfo=timezone.utc), parse_id(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def after(position):
+    created, pk = position
+    return Q(created__gt=created) | Q(created=created, pk__gt=pk)
+
+
+def before(position, inclusive=False):
+    created, pk = position
+    pk_lookup = 'pk__lte' if inclusive else 'pk__lt'
+    return Q(created__lt=created) | Q(created=created, **{pk_lookup: pk})
+
+
+class CommentPage:
+    """Страница комментариев и курсоры соседних страниц."""
+
+    def __init__(self, object_list, has_previous, has_next):
+        self.object_list = object_list
+        self.has_previous = has_previous and bool(object_list)
+        self.has_next = has_next and bool(object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0]) if self.has_previous else ''
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1]) if self.has_next else ''
+
+
+def get_comment_page(queryset, params, per_page=None):
+    """
+    Выбирает страницу комментариев по параметрам запроса.
+
+    after — комментарии строго после курсора,
+    before — строго до курсора,
+    at — страница, которая заканчивается комментарием из курсора.
+    Без параметров возвращается первая страница.
+    """
+    per_page = per_page or settings.COMMENTS_COUNT_ON_PAGE
+    forward = queryset.order_by('created', 'pk')
+    backward = queryset.order_by('-created', '-pk')
+    position = decode_cursor(params.get('after'))
+    if position:
+        comments = list(forward.filter(after(position))[:per_page + 1])
+        return CommentPage(
+            comments[:per_page], True, len(comments) > per_page
+        )
+    position = decode_cursor(params.get('before') or params.get('at'))
+    if position:
+        inclusive = 'before' not in params
+        comments = list(
+            backward.filter(before(position, inclusive))[:per_page + 1]
+        )
+        if inclusive:
+            has_next = forward.filter(after(position)).exists()
+        else:
+            has_next = True
+        return CommentPage(
+            comments[per_page - 1::-1], len(comments) > per_page, has_next
+        )
+    comments = list(forward[:per_page + 1])
+    return CommentPage(comments[:per_page], False, len(comments) > per_page)
+
+
+def comment_page_query(comment, per_page=None):
+    """
+    Строка запроса для страницы, на которой находится комментарий.
+
+    Для комментариев с первой страницы курсор не нужен.
+    """
+    per_page = per_page or settings.COMMENTS_COUNT_ON_PAGE
+    position = (comment.created, comment.pk)
+    preceding = comment.__class__.objects.filter(
+        before(position), news_id=comment.news_id
+    ).order_by()[:per_page].count()
+    if preceding < per_page:
+        return ''
+    return f'?at={encode_cursor(comment)}'
@@ -0,0 +1,151 @@
+"""
+Поиск запрещённых слов за один проход по тексту.
+
+Словарь компилируется в автомат Ахо-Корасик один раз; проверка
+комментария стоит O(длина текста) независимо от размера словаря.
+Текст и словарь нормализуются одинаково: нижний регистр, ё -> е,
+латинские и цифровые двойники кириллических букв -> кириллица.
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+    '0': 'о', '3': 'з', '6': 'б', '@': 'а',
+})
+
+
+def normalize(text):
+    return text.lower().translate(HOMOGLYPHS)
+
+
+class WordMatcher:
+    """
+    Автомат Ахо-Корасик по списку слов.
+
+    Совпадение засчитывается, только если слово начинается на границе
+    слова в тексте; окончание не проверяется, чтобы ловить словоформы.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.lengths = [()]
+        for word in words:
+            word = normalize(word.strip())
+            if word:
+                self.add(word)
+        self.build_fail_links()
+
+    def add(self, word):
+        node = 0
+        for char in word:
+            next_node = self.transitions[node].get(char)
+            if next_node is None:
+                next_node = len(self.transitions)
+                self.transitions[node][char] = next_node
+                self.transitions.append({})
+                self.lengths.append(())
+            node = next_node
+        self.lengths[node] += (len(word),)
+
+    def build_fail_links(self):
+        """Обход в ширину: суффиксные ссылки и выходы по ним."""
+        self.fail = [0] * len(self.transitions)
+        queue = list(self.transitions[0].values())
+        for node in queue:
+            for char, child in self.transitions[node].items():
+                fail = self.fail[node]
+                while fail and char not in self.transitions[fail]:
+                    fail = self.fail[fail]
+                fallback = self.transitions[fail].get(char, 0)
+                self.fail[child] = fallback if fallback != child else 0
+                self.lengths[child] += self.lengths[self.fail[child]]
+                queue.append(child)
+
+    def search(self, text):
+        """Возвращает первое найденное слово или None."""
+        text = normalize(text)
+        transitions, fail, lengths = self.transitions, self.fail, self.lengths
+        node = 0
+        for end, char in enumerate(text, start=1):
+            while node and char not in transitions[node]:
+                node = fail[node]
+            node = transitions[node].get(char, 0)
+            for length in lengths[node]:
+                start = end - length
+                if start == 0 or not text[start - 1].isalnum():
+                    return text[start:end]
+        return None
+
+
+class ReloadableWordMatcher:
+    """
+    Матчер, который перечитывает словарь из settings.BAD_WORDS_FILE,
+    когда у файла меняется время изменения или размер.
+
+    Без файла используется встроенный список слов. Если файл временно
+    недоступен, остаётся последний загруженный словарь: об ошибке
+    пишется одно предупреждение, а не трассировка на каждый запрос.
+    """
+
+    def __init__(self, default_words):
+        self.default_words = default_words
+        self.source = None
+        self.matcher = None
+        self.failing = False
+        self.lock = threading.Lock()
+
+    def current(self):
+        path = getattr(settings, 'BAD_WORDS_FILE', None)
+        source = None
+        if path:
+            try:
+                stat = os.stat(path)
+                source = (path, stat.st_mtime_ns, stat.st_size)
+                self.failing = False
+            except OSError as error:
+                self.report(path, error)
+                if self.matcher is not None:
+                    return self.matcher
+        if self.matcher is None or source != self.source:
+            with self.lock:
+                if self.matcher is None or source != self.source:
+                    self.reload(source)
+        return self.matcher
+
+    def reload(self, source):
+        try:
+            words = self.load_words(source)
+        except OSError as error:
+            self.report(source[0], error)
+            if self.matcher is not None:
+                return
+            words, source = self.default_words, None
+        self.matcher = WordMatcher(words)
+        self.source = source
+
+    def report(self, path, error):
+        if not self.failing:
+            self.failing = True
+            logger.warning(
+                'Не удалось прочитать словарь %s, остаётся прежний: %s',
+                path, error,
+            )
+
+    def load_words(self, source):
+        if source is None:
+            return self.default_words
+        with open(source[0], encoding='utf-8') as file:
+            return [
+                line for line in file.read().splitlines()
+                if line.strip() and not line.startswith('#')
+            ]
+
+    def search(self, text):
+        return self.current().search(text)
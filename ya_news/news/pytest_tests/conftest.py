@@ -3,14 +3,34 @@ from datetime import timedelta
 import pytest
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client
 from django.utils import timezone
 
 from news.models import Comment, News
+from yanews.query_budget import assert_query_budget
 
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш общий для процесса, поэтому очищаем его перед каждым тестом."""
+    cache.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """Контекстный менеджер проверки бюджета запросов маршрута."""
+    return assert_query_budget
+
+
+@pytest.fixture
+def etags(settings):
+    """Включает ETag: в настройках они есть только с общим кэшем."""
+    settings.NEWS_ETAGS = True
+
+
 @pytest.fixture
 def news(db):
     return News.objects.create(title='Заголовок', text='Текст')
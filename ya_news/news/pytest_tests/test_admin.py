@@ -0,0 +1,112 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.models import Comment, News
+
+
+@pytest.fixture
+def many_comments(news, test_user):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=test_user, text=f'Комментарий {index}')
+        for index in range(50)
+    )
+
+
+def count_queries(client, url, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return response, [query['sql'] for query in queries]
+
+
+@pytest.mark.django_db
+def test_news_change_page_limits_inline(admin_client, settings, news,
+                                        many_comments):
+    """На странице новости только последние комментарии, и их число
+    не влияет на количество запросов.
+    """
+    settings.ADMIN_COMMENTS_INLINE_LIMIT = 5
+    url = reverse('admin:news_news_change', args=(news.pk,))
+    # Первый запрос заполняет кэш ContentType.
+    count_queries(admin_client, url)
+    response, queries = count_queries(admin_client, url)
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert [form.instance.text for form in formset.forms] == [
+        f'Комментарий {index}' for index in range(49, 44, -1)
+    ]
+    assert 'Все комментарии (50)' in response.content.decode()
+    settings.ADMIN_COMMENTS_INLINE_LIMIT = 20
+    assert len(count_queries(admin_client, url)[1]) == len(queries)
+
+
+@pytest.mark.django_db
+def test_news_changelist_uses_counter(admin_client, news, many_comments):
+    """Список новостей не обращается к таблице комментариев."""
+    response, queries = count_queries(
+        admin_client, reverse('admin:news_news_changelist')
+    )
+    assert not any('news_comment' in sql for sql in queries)
+    assert News.objects.get().comment_count == 50
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', ({}, {'news__id__exact': 'news'}))
+def test_comment_changelist_without_count(admin_client, news, many_comments,
+                                          params):
+    """Список комментариев не считает COUNT(*) по комментариям."""
+    params = {key: news.pk for key in params}
+    response, queries = count_queries(
+        admin_client, reverse('admin:news_comment_changelist'), **params
+    )
+    assert response.context['cl'].result_count == 50
+    assert not any(
+        'COUNT(' in sql and 'news_comment' in sql for sql in queries
+    )
+
+
+@pytest.mark.django_db
+def test_news_change_page_saves_limited_inline(admin_client, settings, news,
+                                               many_comments):
+    """Сохранение новости меняет только показанные комментарии."""
+    settings.ADMIN_COMMENTS_INLINE_LIMIT = 2
+    url = reverse('admin:news_news_change', args=(news.pk,))
+    shown = Comment.objects.order_by('-created', '-id')[:2]
+    data = {
+        'title': news.title,
+        'text': news.text,
+        'date': '01.01.2020',
+        'comment_set-TOTAL_FORMS': 2,
+        'comment_set-INITIAL_FORMS': 2,
+        'comment_set-0-id': shown[0].pk,
+        'comment_set-0-news': news.pk,
+        'comment_set-0-text': 'Исправлено',
+        'comment_set-1-id': shown[1].pk,
+        'comment_set-1-news': news.pk,
+        'comment_set-1-text': shown[1].text,
+        'comment_set-1-DELETE': 'on',
+    }
+    response = admin_client.post(url, data)
+    assert response.status_code == 302
+    assert Comment.objects.get(pk=shown[0].pk).text == 'Исправлено'
+    assert Comment.objects.count() == 49
+    assert News.objects.get().comment_count == 49
+
+
+@pytest.mark.django_db
+def test_comment_change_keeps_news(admin_client, news, comment1):
+    """Комментарий нельзя перенести в другую новость через админку."""
+    other_news = News.objects.create(title='Другая', text='Текст')
+    url = reverse('admin:news_comment_change', args=(comment1.pk,))
+    response = admin_client.post(url, {
+        'news': other_news.pk,
+        'author': comment1.author_id,
+        'text': 'Исправлено',
+    })
+    assert response.status_code == 302
+    comment1.refresh_from_db()
+    assert comment1.news == news
+    assert comment1.text == 'Исправлено'
+    assert News.objects.get(pk=news.pk).comment_count == 1
+    assert News.objects.get(pk=other_news.pk).comment_count == 0
@@ -0,0 +1,84 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from news.models import News
+
+
+def read_json(response):
+    assert response.streaming
+    return json.loads(b''.join(response.streaming_content))
+
+
+def read_ndjson(response):
+    assert response['Content-Type'] == 'application/x-ndjson'
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    return [json.loads(line) for line in lines]
+
+
+@pytest.mark.django_db
+def test_api_news_order_and_cursor(client, news_items, settings):
+    """Новости идут в порядке главной страницы, курсор продолжает выдачу."""
+    settings.API_CHUNK_SIZE = 4
+    url = reverse('news:api_news')
+    rows = read_json(client.get(url))
+    expected = list(
+        News.objects.order_by('-date', 'id').values_list('id', flat=True)
+    )
+    assert [row['id'] for row in rows] == expected
+    first_page = read_ndjson(client.get(url, {'format': 'ndjson', 'limit': 3}))
+    rest = read_ndjson(client.get(
+        url, {'format': 'ndjson', 'after': first_page[-1]['cursor']}
+    ))
+    assert [row['id'] for row in first_page + rest] == expected
+
+
+@pytest.mark.django_db
+def test_api_comments_stream(client, news, test_comments, settings):
+    """Комментарии выгружаются целиком и по курсору."""
+    settings.API_CHUNK_SIZE = 3
+    url = reverse('news:api_comments', args=(news.id,))
+    rows = read_json(client.get(url))
+    assert [row['id'] for row in rows] == [
+        comment.id for comment in test_comments
+    ]
+    assert rows[0]['text'] == test_comments[0].text
+    rest = read_json(client.get(url, {'after': rows[4]['cursor']}))
+    assert [row['id'] for row in rest] == [
+        comment.id for comment in test_comments[5:]
+    ]
+
+
+@pytest.mark.django_db
+def test_api_errors(client, news):
+    """Неизвестная новость — 404, неверные параметры — 400."""
+    missing = client.get(reverse('news:api_comments', args=(news.id + 1,)))
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+    for params in ({'after': 'oops'}, {'format': 'xml'}, {'limit': '-1'},
+                   {'after': '20200101-99999999999999999999999'}):
+        response = client.get(reverse('news:api_news'), params)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+    comments = client.get(
+        reverse('news:api_comments', args=(news.id,)),
+        {'after': '20200101000000000000-99999999999999999999999'},
+    )
+    assert comments.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_api_limit_is_clamped(client, news_items, settings):
+    """Значение limit больше API_MAX_LIMIT урезается до него."""
+    settings.API_MAX_LIMIT = 2
+    rows = read_json(client.get(reverse('news:api_news'), {'limit': '1' * 30}))
+    assert len(rows) == 2
+
+
+@pytest.mark.django_db
+def test_api_empty_stream(client):
+    """Пустая выгрузка — корректный JSON."""
+    assert read_json(client.get(reverse('news:api_news'))) == []
+    assert read_ndjson(
+        client.get(reverse('news:api_news'), {'format': 'ndjson'})
+    ) == []
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import threading
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.db.backends.utils import CursorWrapper
+from django.test import AsyncClient
+from django.urls import reverse
+
+from news.forms import BAD_WORDS, WARNING
+from news.models import Comment
+from yanews.query_budget import QueryBudgetExceeded, count_queries
+
+pytestmark = [
+    pytest.mark.urls('yanews.asgi_urls'),
+    # ORM асинхронных view работает в своём пуле потоков,
+    # поэтому данные теста должны быть закоммичены.
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def form_post(client, url, data):
+    """В Django 3.2 AsyncClient не читает multipart-тело целиком,
+    поэтому форму отправляем как application/x-www-form-urlencoded.
+    """
+    return async_to_sync(client.post)(
+        url, urlencode(data), content_type='application/x-www-form-urlencoded'
+    )
+
+
+@pytest.fixture
+def async_client():
+    return AsyncClient()
+
+
+@pytest.fixture
+def async_user_client(test_user):
+    client = AsyncClient()
+    client.force_login(test_user)
+    return client
+
+
+def test_async_home_page(async_client, etags, news_items):
+    """Асинхронная главная страница и ответ 304 по ETag."""
+    response = async_to_sync(async_client.get)(reverse('news:home'))
+    assert response.status_code == HTTPStatus.OK
+    assert 'News 0' in response.content.decode()
+    not_modified = async_to_sync(async_client.get)(
+        reverse('news:home'), **{'If-None-Match': response['ETag']}
+    )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_async_detail_page(async_client, news, test_comments):
+    """Асинхронная страница новости выводит комментарии."""
+    url = reverse('news:detail', args=(news.id,))
+    response = async_to_sync(async_client.get)(url)
+    assert response.status_code == HTTPStatus.OK
+    assert test_comments[0].text in response.content.decode()
+    missing = async_to_sync(async_client.get)(
+        reverse('news:detail', args=(news.id + 1,))
+    )
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_comment_post(async_client, async_user_client, news):
+    """Публикация комментария через асинхронный view."""
+    url = reverse('news:detail', args=(news.id,))
+    anonymous = form_post(async_client, url, {'text': 'Текст'})
+    assert anonymous.status_code == HTTPStatus.FOUND
+    assert Comment.objects.count() == 0
+
+    response = form_post(async_user_client, url, {'text': 'Текст'})
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == url + '#comments'
+    assert Comment.objects.get().news == news
+
+    response = form_post(
+        async_user_client, url, {'text': f'Ты {BAD_WORDS[0]}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert WARNING in response.content.decode()
+    assert Comment.objects.count() == 1
+
+
+def test_query_budget_counts_orm_pool_queries(settings, news_items):
+    """Запросы асинхронного view из пула потоков ORM входят в бюджет."""
+    settings.DEBUG = True
+    settings.QUERY_BUDGETS = {**settings.QUERY_BUDGETS, 'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded, match='news_news'):
+        async_to_sync(AsyncClient().get)(reverse('news:home'))
+
+
+def test_profiler_records_orm_pool_queries(settings, tmp_path, admin_user,
+                                           news_items):
+    """Профиль асинхронного view содержит SQL из пула потоков ORM."""
+    settings.PROFILE_DIR = tmp_path
+    client = AsyncClient()
+    client.force_login(admin_user)
+    # AsyncClient в Django 3.2 не передаёт data в query_string.
+    response = async_to_sync(client.get)(reverse('news:home') + '?_profile=1')
+    report = json.loads(
+        (tmp_path / f'{response["X-Profile-Id"]}.json').read_text()
+    )
+    assert report['view'] == 'news:home'
+    assert any('news_news' in row['sql'] for row in report['sql'])
+
+
+def test_server_timing_counts_orm_pool_queries(news, test_comments):
+    """В Server-Timing асинхронного view входит SQL из пула потоков ORM."""
+    response = async_to_sync(AsyncClient().get)(
+        reverse('news:detail', args=(news.pk,))
+    )
+    assert 'db;dur=' in response['Server-Timing']
+    assert 'tpl;dur=' in response['Server-Timing']
+
+
+def test_asgi_middleware_chain_is_not_adapted(settings, caplog):
+    """Все middleware асинхронные: цепочку ASGI не переносит в поток."""
+    settings.DEBUG = True
+    handler = ASGIHandler()
+    with caplog.at_level(logging.DEBUG, logger='django.request'):
+        handler.load_middleware(is_async=True)
+    assert not [
+        record.getMessage() for record in caplog.records
+        if 'adapted' in record.getMessage()
+    ]
+    assert asyncio.iscoroutinefunction(handler._middleware_chain)
+
+
+def asgi_get(path):
+    """GET через ASGI-обработчик проекта; тело собирается из сообщений."""
+    from yanews.asgi import YaNewsASGIHandler
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'query_string': query.encode(), 'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(YaNewsASGIHandler())(scope, receive, send)
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return messages[0]['status'], body
+
+
+@pytest.mark.parametrize('debug', (False, True))
+def test_streaming_api_under_asgi(settings, news, test_comments, debug):
+    """Потоковое тело API читается под ASGI целиком, с бюджетом запросов."""
+    settings.DEBUG = debug
+    settings.API_CHUNK_SIZE = 3
+    status, body = asgi_get(reverse('news:api_news'))
+    assert status == HTTPStatus.OK
+    assert [row['id'] for row in json.loads(body)] == [news.pk]
+    status, body = asgi_get(
+        reverse('news:api_comments', args=(news.pk,)) + '?format=ndjson'
+    )
+    assert status == HTTPStatus.OK
+    assert len(body.decode().splitlines()) == len(test_comments)
+
+
+def test_async_home_page_defers_text(news_items):
+    """Асинхронная главная, как и синхронная, не загружает полный текст."""
+    with count_queries() as counter:
+        async_to_sync(AsyncClient().get)(reverse('news:home'))
+    news_queries = [sql for sql in counter.statements if 'news_news' in sql]
+    assert news_queries
+    assert not [sql for sql in news_queries if '"news_news"."text"' in sql]
+
+
+def test_async_queries_run_in_orm_pool(monkeypatch, async_user_client,
+                                       news, test_comments):
+    """Все запросы, в том числе сессии и пользователя, идут из пула ORM."""
+    threads = []
+    execute = CursorWrapper._execute
+
+    def record_thread(self, *args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return execute(self, *args, **kwargs)
+
+    monkeypatch.setattr(CursorWrapper, '_execute', record_thread)
+    for url in (
+        reverse('news:home'), reverse('news:detail', args=(news.id,))
+    ):
+        response = async_to_sync(async_user_client.get)(url)
+        assert response.context['user'].is_authenticated
+    assert threads
+    assert all(name.startswith('news-orm') for name in threads), threads
@@ -1,10 +1,16 @@
+from http import HTTPStatus
+
 import pytest
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from news.cards import card_cache_stats, check_card_cache
 from news.forms import CommentForm
+from news.models import Comment, News
 
 User = get_user_model()
 
@@ -27,6 +33,17 @@ def test_news_order_on_home_page(client, news_items):
     assert all_dates == sorted_dates
 
 
+@pytest.mark.django_db
+def test_home_page_uses_comment_counter(client, news, test_comments):
+    """Главная страница берёт число комментариев из счётчика
+    и не обращается к таблице комментариев.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('news:home'))
+    assert f'Комментариев: {len(test_comments)}' in response.content.decode()
+    assert not any('news_comment' in query['sql'] for query in queries)
+
+
 @pytest.mark.django_db
 def test_comments_order_on_detail_page(client, news, test_comments):
     """Тест проверки порядка отображения комментариев
@@ -56,3 +73,273 @@ def test_form_availability_for_authorized_client(admin_client, news):
     response = admin_client.get(reverse('news:detail', args=[news.id]))
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+def test_comments_keyset_pagination(client, settings, news, test_comments):
+    """Ссылки «Следующие»/«Предыдущие» обходят все комментарии по порядку."""
+    settings.COMMENTS_COUNT_ON_PAGE = 3
+    url = reverse('news:detail', args=[news.id])
+    pages = []
+    page = client.get(url).context['comments_page']
+    pages.append(page)
+    while page.has_next:
+        page = client.get(
+            url, {'after': page.next_cursor}
+        ).context['comments_page']
+        pages.append(page)
+    seen_ids = [comment.id for page in pages for comment in page]
+    assert seen_ids == [comment.id for comment in test_comments]
+    assert all(len(page) <= 3 for page in pages)
+
+    back_ids = []
+    while page.has_previous:
+        page = client.get(
+            url, {'before': page.previous_cursor}
+        ).context['comments_page']
+        back_ids = [comment.id for comment in page] + back_ids
+    assert back_ids == seen_ids[:len(back_ids)]
+    assert len(back_ids) == len(seen_ids) - len(pages[-1])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'cursor',
+    ('bad-cursor', '20200101000000000000-99999999999999999999999'),
+)
+def test_comments_pagination_ignores_bad_cursor(client, news, test_comments,
+                                                cursor):
+    """Некорректный или слишком большой курсор открывает первую страницу."""
+    url = reverse('news:detail', args=[news.id])
+    response = client.get(url, {'after': cursor})
+    page = response.context['comments_page']
+    assert [comment.id for comment in page] == [
+        comment.id for comment in test_comments
+    ]
+
+
+@pytest.fixture
+def card_cache(settings):
+    settings.NEWS_CARD_CACHE = True
+
+
+@pytest.mark.django_db
+def test_home_page_cards_are_cached(client, card_cache, news_items):
+    """Повторный запрос главной страницы берёт карточки из кэша."""
+    url = reverse('news:home')
+    first = client.get(url)
+    second = client.get(url)
+    assert first.content == second.content
+    stats = card_cache_stats()
+    assert stats['misses'] == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert stats['hits'] == settings.NEWS_COUNT_ON_HOME_PAGE
+
+
+@pytest.mark.django_db
+def test_home_page_reads_excerpt_not_text(client):
+    """Карточка показывает анонс, полный текст из базы не читается."""
+    text = ' '.join(f'слово{index}' for index in range(1000))
+    News.objects.create(title='Длинная', text=text)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('news:home'))
+    news_query = next(
+        query['sql'] for query in queries
+        if '"news_news"."title"' in query['sql']
+    )
+    assert '"news_news"."text"' not in news_query
+    assert '"news_news"."excerpt"' in news_query
+    content = response.content.decode()
+    assert 'слово14 …' in content
+    assert 'слово15' not in content
+
+
+@pytest.mark.django_db
+def test_new_comment_invalidates_only_its_card(
+        client, card_cache, news_items, test_user,
+        django_capture_on_commit_callbacks):
+    """Новый комментарий сбрасывает карточку только своей новости."""
+    url = reverse('news:home')
+    client.get(url)
+    commented = News.objects.first()
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=commented, author=test_user, text='Т')
+    response = client.get(url)
+    assert 'Комментариев: 1' in response.content.decode()
+    stats = card_cache_stats()
+    assert stats['misses'] == settings.NEWS_COUNT_ON_HOME_PAGE + 1
+    assert stats['hits'] == settings.NEWS_COUNT_ON_HOME_PAGE - 1
+
+
+@pytest.mark.django_db
+def test_rolled_back_comment_keeps_cards(
+        client, card_cache, news_items, test_user,
+        django_capture_on_commit_callbacks):
+    """Откаченная транзакция не сбрасывает карточки."""
+    url = reverse('news:home')
+    client.get(url)
+    with django_capture_on_commit_callbacks(execute=True), pytest.raises(
+        DatabaseError
+    ):
+        with transaction.atomic():
+            Comment.objects.create(
+                news=News.objects.first(), author=test_user, text='Т'
+            )
+            raise DatabaseError
+    client.get(url)
+    assert card_cache_stats()['hits'] == settings.NEWS_COUNT_ON_HOME_PAGE
+
+
+def test_card_cache_warns_on_process_local_cache(settings):
+    """Кэш карточек на кэше процесса — предупреждение news.W001."""
+    settings.NEWS_CARD_CACHE = True
+    assert [warning.id for warning in check_card_cache(None)] == [
+        'news.W001'
+    ]
+    settings.NEWS_CARD_CACHE = False
+    assert not check_card_cache(None)
+
+
+@pytest.mark.django_db
+def test_conditional_get_on_news_pages(client, etags, news, comment1):
+    """Неизменённая страница отдаёт 304 по ETag; по дате — никогда."""
+    for url in (
+        reverse('news:home'), reverse('news:detail', args=(news.id,))
+    ):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert 'Last-Modified' not in response
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        assert not not_modified.content
+        assert not any(
+            'news_comment"' in query['sql'] for query in queries
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_no_etag_with_process_local_cache(client, news):
+    """С кэшем процесса из настроек страницы отдаются без ETag."""
+    assert not settings.NEWS_ETAGS
+    for url in (
+        reverse('news:home'), reverse('news:detail', args=(news.id,))
+    ):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert 'ETag' not in response
+
+
+@pytest.mark.django_db
+def test_etag_changes_with_comments_and_user(
+        client, admin_client, etags, news, comment1,
+        django_capture_on_commit_callbacks):
+    """Новый комментарий и другой пользователь меняют ETag."""
+    url = reverse('news:detail', args=(news.id,))
+    etag = client.get(url)['ETag']
+    assert admin_client.get(url)['ETag'] != etag
+    comment1.text = 'Изменённый текст'
+    with django_capture_on_commit_callbacks(execute=True):
+        comment1.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('change', ('news_edit', 'comment_delete'))
+def test_detail_etag_changes_on_edit_and_delete(
+        client, etags, news, comment1, change,
+        django_capture_on_commit_callbacks):
+    """Правка новости и удаление комментария дают полный ответ."""
+    url = reverse('news:detail', args=(news.id,))
+    etag = client.get(url)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        if change == 'news_edit':
+            news.text = 'Исправленный текст'
+            news.save()
+        else:
+            comment1.delete()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(client):
+    """Совпадение в заголовке важнее совпадения в тексте,
+    а слово находится в других падежах.
+    """
+    in_text = News.objects.create(
+        title='Погода', text='Выборы в городе прошли спокойно.'
+    )
+    in_title = News.objects.create(
+        title='Выборами недовольны', text='Подробности позже.'
+    )
+    News.objects.create(title='Спорт', text='Матч перенесли.')
+    response = client.get(reverse('news:search'), {'q': 'выборы'})
+    results = response.context['results']
+    assert [news.pk for news in results] == [in_title.pk, in_text.pk]
+    assert '<mark>Выборами</mark>' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_search_escapes_text_and_query_syntax(client):
+    """Текст новости экранируется, а операторы FTS5 в запросе
+    не ломают поиск.
+    """
+    News.objects.create(title='Скрипт', text='<script>alert(1)</script>')
+    response = client.get(reverse('news:search'), {'q': 'script" * ('})
+    content = response.content.decode()
+    assert response.status_code == HTTPStatus.OK
+    assert '<script>' not in content
+    assert '&lt;<mark>script</mark>&gt;' in content
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(client, news):
+    """Индекс обновляется при изменении и удалении новости."""
+    url = reverse('news:search')
+    News.objects.filter(pk=news.pk).update(text='Новый абзац')
+    assert client.get(url, {'q': 'абзац'}).context['results']
+    assert not client.get(url, {'q': 'текст'}).context['results']
+    news.delete()
+    assert not client.get(url, {'q': 'абзац'}).context['results']
+
+
+@pytest.mark.django_db
+def test_search_matches_numbers_exactly(client):
+    """Числа ищутся целиком, а не как префикс."""
+    exact = News.objects.create(title='Итоги 2020', text='Год')
+    News.objects.create(title='Итоги 20201', text='Год')
+    response = client.get(reverse('news:search'), {'q': '2020'})
+    assert [news.pk for news in response.context['results']] == [exact.pk]
+
+
+@pytest.mark.django_db
+def test_search_short_words_are_not_prefixes(client):
+    """Слова короче MIN_PREFIX ищутся целиком, а не как префикс."""
+    evening = News.objects.create(title='Вечер', text='Тихо')
+    url = reverse('news:search')
+    assert not client.get(url, {'q': 'ве'}).context['results']
+    assert [
+        news.pk for news in client.get(url, {'q': 'веч'}).context['results']
+    ] == [evening.pk]
+
+
+@pytest.mark.django_db
+def test_search_triggers_exist():
+    """Триггеры индекса news_search есть после всех миграций."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'trigger' AND tbl_name = 'news_news'"
+        )
+        triggers = {row[0] for row in cursor.fetchall()}
+    assert triggers >= {
+        'news_search_insert', 'news_search_delete', 'news_search_update',
+    }
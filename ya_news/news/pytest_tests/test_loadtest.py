@@ -0,0 +1,48 @@
+import pytest
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import reverse
+
+from news.models import Comment
+from yanews.loadtest import Scenario, Visitor, compare, run_worker
+
+
+@pytest.mark.django_db
+def test_worker_replays_scenarios(news, admin_user):
+    """Сценарии проходят через WSGI-приложение со всеми middleware,
+    включая сессию и CSRF для POST.
+    """
+    detail = reverse('news:detail', args=(news.pk,))
+    scenarios = [
+        Scenario('news:home', 1, lambda rng, visitor: reverse('news:home')),
+        Scenario(
+            'news:detail', 1, lambda rng, visitor: detail, method='POST',
+            user=True, data=lambda rng, visitor: {'text': 'Комментарий'},
+            status=302,
+        ),
+    ]
+    stats = run_worker(
+        WSGIHandler(), scenarios, [Visitor.login(admin_user)], 0.2, seed=0
+    )
+    assert set(stats.latencies) == {
+        'news:home GET anon', 'news:detail POST user'
+    }
+    assert not stats.errors
+    assert Comment.objects.filter(author=admin_user).exists()
+
+
+def test_compare_reports_regressions():
+    """Регрессия — рост p99 или падение rps сверх допуска."""
+    baseline = {
+        'a': {'rps': 100, 'p50': 1, 'p99': 10},
+        'b': {'rps': 100, 'p50': 1, 'p99': 10},
+        'c': {'rps': 100, 'p50': 1, 'p99': 10},
+    }
+    summary = {
+        'a': {'rps': 95, 'p50': 1, 'p99': 11},
+        'b': {'rps': 100, 'p50': 1, 'p99': 15},
+        'c': {'rps': 70, 'p50': 1, 'p99': 10},
+        'd': {'rps': 1, 'p50': 1, 'p99': 1},
+    }
+    lines, regressions = compare(summary, baseline, tolerance=0.2)
+    assert regressions == ['b', 'c']
+    assert lines[-1] == 'd: нет в базовом прогоне'
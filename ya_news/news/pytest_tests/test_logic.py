@@ -1,11 +1,21 @@
+import json
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import engines
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.management.commands import import_news
+from news.models import Comment, News
+from news.profanity import ReloadableWordMatcher, WordMatcher
+from yanews.warmup import warmup
 
 from pytest_django.asserts import assertFormError, assertRedirects
 
@@ -104,3 +114,277 @@ def test_user_cannot_delete_other_users_comment(other_user_and_client,
     assert comment_after_attempt.text == comment1.text
     assert comment_after_attempt.author == comment1.author
     assert comment_after_attempt.news == comment1.news
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_created_and_deleted_comments(
+        other_user_and_client, news, comment1):
+    """Счётчик комментариев растёт при создании и падает при удалении."""
+    url = reverse('news:detail', args=(news.id,))
+    other_user_and_client.post(url, data={'text': 'Текст комментария'})
+    news.refresh_from_db()
+    assert news.comment_count == 2
+    comment1.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_comment_count_after_bulk_operations(news, test_user, test_comments):
+    """Счётчик учитывает bulk_create и удаление через QuerySet."""
+    news.refresh_from_db()
+    assert news.comment_count == len(test_comments)
+    Comment.objects.bulk_create(
+        Comment(news=news, author=test_user, text=f'Bulk {index}')
+        for index in range(3)
+    )
+    news.refresh_from_db()
+    assert news.comment_count == len(test_comments) + 3
+    Comment.objects.filter(news=news).delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_stale_news_save_keeps_comment_count(news, test_user):
+    """Сохранение устаревшего объекта новости не сбрасывает счётчик."""
+    Comment.objects.create(news=news, author=test_user, text='Текст')
+    news.title = 'Новый заголовок'
+    news.save()
+    news.refresh_from_db()
+    assert news.title == 'Новый заголовок'
+    assert news.comment_count == 1
+
+
+@pytest.mark.django_db
+def test_comment_count_after_cascade_delete(news, test_user, test_comments):
+    """Каскадное удаление автора уменьшает счётчик его новостей."""
+    test_user.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_comment_deletes_do_not_update_per_comment(news, test_user,
+                                                   admin_user):
+    """Удаление комментариев — один UPDATE счётчика на новость."""
+    other = News.objects.create(title='Другая', text='Текст')
+    Comment.objects.bulk_create(
+        Comment(news=target, author=author, text='Текст')
+        for target in (news, other)
+        for author in (test_user, admin_user)
+        for _ in range(50)
+    )
+
+    def updates(queries):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE')
+        ]
+
+    with CaptureQueriesContext(connection) as queries:
+        Comment.objects.filter(author=admin_user).delete()
+    assert len(updates(queries)) == 2
+    with CaptureQueriesContext(connection) as queries:
+        test_user.delete()
+    assert len(updates(queries)) == 2
+    assert set(News.objects.values_list('comment_count', flat=True)) == {0}
+    Comment.objects.bulk_create(
+        Comment(news=news, author=admin_user, text='Текст')
+        for _ in range(50)
+    )
+    with CaptureQueriesContext(connection) as queries:
+        news.delete()
+    assert not updates(queries)
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(news, test_comments):
+    """Команда recount_comments восстанавливает испорченный счётчик."""
+    News.objects.update(comment_count=100)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == len(test_comments)
+
+
+@pytest.mark.django_db
+def test_new_comment_redirects_to_its_page(
+        other_user_and_client, settings, news, test_comments):
+    """После публикации пользователь попадает на страницу с комментарием."""
+    settings.COMMENTS_COUNT_ON_PAGE = 3
+    url = reverse('news:detail', args=(news.id,))
+    response = other_user_and_client.post(url, data={'text': 'Последний'})
+    comment = Comment.objects.latest('created')
+    assert response.url.startswith(url + '?at=')
+    assert response.url.endswith('#comments')
+    page = other_user_and_client.get(
+        response.url
+    ).context['comments_page']
+    assert comment in page.object_list
+    assert not page.has_next
+
+
+@pytest.mark.django_db
+def test_edited_comment_redirects_to_its_page(
+        other_user_and_client, settings, news, test_comments):
+    """После редактирования пользователь попадает на страницу с
+    комментарием.
+    """
+    settings.COMMENTS_COUNT_ON_PAGE = 3
+    comment = test_comments[5]
+    response = other_user_and_client.post(
+        reverse('news:edit', args=(comment.id,)), {'text': 'Исправлено'}
+    )
+    page = other_user_and_client.get(
+        response.url
+    ).context['comments_page']
+    assert comment in page.object_list
+    assert page.has_previous and page.has_next
+
+
+@pytest.mark.parametrize('text, is_bad', (
+    ('Ты РЕДИСКА!', True),
+    ('Ты pедиcка', True),
+    ('Какой негодяйка', True),
+    ('Недоредиска — не ругательство', False),
+    ('Обычный комментарий', False),
+))
+def test_bad_words_matcher(text, is_bad):
+    """Матчер учитывает регистр, двойники букв и границы слов."""
+    assert bool(WordMatcher(BAD_WORDS).search(text)) is is_bad
+
+
+@pytest.mark.django_db
+def test_bad_words_file_is_reloaded(other_user_and_client, news, settings,
+                                    tmp_path):
+    """Словарь перечитывается из файла без перезапуска."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь\nбука\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    url = reverse('news:detail', args=(news.id,))
+    response = other_user_and_client.post(url, data={'text': 'Ты бука'})
+    assertFormError(response, 'form', 'text', WARNING)
+    words_file.write_text('злюка\nвреднина\n', encoding='utf-8')
+    other_user_and_client.post(url, data={'text': 'Ты бука'})
+    assert Comment.objects.count() == 1
+
+
+def test_bad_words_file_outage_keeps_loaded_words(settings, tmp_path,
+                                                  caplog):
+    """Пока файл недоступен, работает последний загруженный словарь."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('бука\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    matcher = ReloadableWordMatcher(BAD_WORDS)
+    loaded = matcher.current()
+    hidden = tmp_path / 'hidden.txt'
+    words_file.rename(hidden)
+    for _ in range(3):
+        assert matcher.current() is loaded
+        assert matcher.search('Ты бука')
+    assert len(caplog.records) == 1
+    assert not caplog.records[0].exc_info
+    hidden.rename(words_file)
+    assert matcher.current() is loaded
+
+
+@pytest.mark.django_db
+def test_import_news_fixture_file():
+    """Команда import_news загружает файл в формате фикстур."""
+    fixture = Path(__file__).resolve().parent.parent / 'fixtures/news.json'
+    expected = len(json.loads(fixture.read_text(encoding='utf-8')))
+    call_command('import_news', str(fixture), batch_size=5, stdout=StringIO())
+    assert News.objects.count() == expected
+    call_command('import_news', str(fixture), stdout=StringIO())
+    assert News.objects.count() == expected
+
+
+def test_import_news_reads_json_in_small_chunks(monkeypatch):
+    """Элементы на границах кусков файла дочитываются."""
+    fixture = Path(__file__).resolve().parent.parent / 'fixtures/news.json'
+    text = fixture.read_text(encoding='utf-8')
+    monkeypatch.setattr(import_news, 'READ_SIZE', 7)
+    assert list(import_news.iter_json_array(StringIO(text))) == json.loads(
+        text
+    )
+
+
+def test_import_news_fails_fast_on_malformed_item():
+    """Ошибка в элементе не заставляет дочитывать файл до конца."""
+    valid = json.dumps({'title': 'Новость', 'text': 'Текст'})
+    stream = StringIO(
+        '[' + valid + ', {"title": nope}, ' + ', '.join([valid] * 10000) + ']'
+    )
+    with pytest.raises(CommandError, match=f'символе {len(valid) + 13}'):
+        list(import_news.iter_json_array(stream))
+    assert stream.tell() <= import_news.READ_SIZE
+
+
+@pytest.mark.django_db
+def test_import_news_batch_above_query_params_limit(tmp_path):
+    """Пачка больше лимита параметров SQLite сверяется по частям."""
+    feed = tmp_path / 'feed.ndjson'
+    feed.write_text('\n'.join(
+        json.dumps({'title': f'Новость {index}', 'date': '2024-01-01',
+                    'text': 'Текст'})
+        for index in range(1200)
+    ), encoding='utf-8')
+    call_command('import_news', str(feed), batch_size=2000, stdout=StringIO())
+    output = StringIO()
+    call_command('import_news', str(feed), batch_size=2000, stdout=output)
+    assert News.objects.count() == 1200
+    assert 'без изменений: 1200' in output.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_news_upserts_by_title_and_date(news, tmp_path):
+    """NDJSON: новость с тем же заголовком и датой обновляется."""
+    news.refresh_from_db()
+    feed = tmp_path / 'feed.ndjson'
+    rows = [
+        {'title': news.title, 'date': news.date.isoformat(), 'text': 'Новый'},
+        {'title': 'Свежая', 'date': '2024-01-02', 'text': 'Текст'},
+        {'title': 'Свежая', 'date': '2024-01-02', 'text': 'Последний'},
+    ]
+    feed.write_text(
+        '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows),
+        encoding='utf-8',
+    )
+    output = StringIO()
+    call_command('import_news', str(feed), batch_size=2, stdout=output)
+    news.refresh_from_db()
+    assert news.text == 'Новый'
+    assert News.objects.get(title='Свежая').text == 'Последний'
+    assert 'строк/с' in output.getvalue()
+
+
+@pytest.mark.django_db
+def test_excerpt_follows_text(news):
+    """Анонс пересчитывается в save(), bulk_update и backfill_excerpts."""
+    assert news.excerpt == 'Текст'
+    news.text = 'один два три ' * 10
+    news.save(update_fields=['text'])
+    news.refresh_from_db()
+    assert news.excerpt.endswith('три …')
+    news.text = 'Обновлённый'
+    News.objects.bulk_update([news], ['text'])
+    news.refresh_from_db()
+    assert news.excerpt == 'Обновлённый'
+    News.objects.filter(pk=news.pk).update(text='Мимо save', excerpt='')
+    output = StringIO()
+    call_command('backfill_excerpts', stdout=output)
+    news.refresh_from_db()
+    assert news.excerpt == 'Мимо save'
+    assert 'у 1 новостей' in output.getvalue()
+
+
+def test_warmup_compiles_templates():
+    """Прогрев кладёт шаблоны в кэш cached.Loader до первого запроса."""
+    loader = engines.all()[0].engine.template_loaders[0]
+    loader.reset()
+    report = dict((stage, result) for stage, result, _ in warmup())
+    assert report['шаблоны'] >= 10
+    assert {'news/home.html', 'includes/header.html'} <= set(
+        loader.get_template_cache
+    )
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+
+@pytest.fixture
+def profile_dir(settings, tmp_path):
+    settings.PROFILE_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_staff_request_is_profiled(admin_client, profile_dir, news,
+                                   test_comments):
+    """Профиль содержит SQL-запросы со строкой кода, которая их выполнила."""
+    response = admin_client.get(
+        reverse('news:detail', args=(news.pk,)), HTTP_X_PROFILE='1'
+    )
+    profile_id = response['X-Profile-Id']
+    assert (profile_dir / f'{profile_id}.pstats').is_file()
+    report = json.loads((profile_dir / f'{profile_id}.json').read_text())
+    assert report['view'] == 'news:detail'
+    assert report['sql_count'] == len(report['sql'])
+    sources = {row['source'] for row in report['sql']}
+    assert any(source.startswith('news/') for source in sources)
+    assert report['functions']
+
+
+@pytest.mark.django_db
+def test_profiler_is_staff_only(client, other_user_and_client, profile_dir,
+                                news):
+    """Для обычных пользователей параметр профилирования игнорируется."""
+    for user_client in (client, other_user_and_client):
+        response = user_client.get(reverse('news:home'), {'_profile': '1'})
+        assert 'X-Profile-Id' not in response
+    assert not list(profile_dir.iterdir())
+
+
+@pytest.mark.django_db
+def test_old_profiles_are_removed(admin_client, settings, profile_dir):
+    """На диске остаются только последние PROFILE_KEEP профилей."""
+    settings.PROFILE_KEEP = 2
+    ids = [
+        admin_client.get(reverse('news:home'), {'_profile': '1'})[
+            'X-Profile-Id'
+        ]
+        for _ in range(3)
+    ]
+    assert sorted(path.stem for path in profile_dir.glob('*.json')) == sorted(
+        ids[1:]
+    )
+    assert len(list(profile_dir.glob('*.pstats'))) == 2
+
+
+@pytest.mark.django_db
+def test_profile_keep_zero_disables_profiler(admin_client, settings,
+                                             profile_dir):
+    """PROFILE_KEEP = 0 отключает профилировщик, а не удаляет все профили."""
+    settings.PROFILE_KEEP = 0
+    response = admin_client.get(reverse('news:home'), {'_profile': '1'})
+    assert 'X-Profile-Id' not in response
+    assert not list(profile_dir.iterdir())
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('with_params', (False, True))
+def test_sql_params_only_when_enabled(admin_client, settings, profile_dir,
+                                      news, with_params):
+    """Параметры SQL попадают в профиль только при PROFILE_SQL_PARAMS."""
+    settings.PROFILE_SQL_PARAMS = with_params
+    profile_id = admin_client.get(
+        reverse('news:detail', args=(news.pk,)), HTTP_X_PROFILE='1'
+    )['X-Profile-Id']
+    report = json.loads((profile_dir / f'{profile_id}.json').read_text())
+    params = [row['params'] for row in report['sql']]
+    if with_params:
+        assert repr((news.pk,)) in params
+    else:
+        assert params == [None] * len(params)
+
+
+@pytest.mark.django_db
+def test_profile_download(admin_client, client, profile_dir):
+    """Профили скачивает только сотрудник и только из PROFILE_DIR."""
+    profile_id = admin_client.get(reverse('news:home'), {'_profile': '1'})[
+        'X-Profile-Id'
+    ]
+    url = reverse('profile', args=(f'{profile_id}.json',))
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    assert 'attachment' in response['Content-Disposition']
+    assert client.get(url).status_code == 302
+    bad_name = reverse('profile', args=('..secret.json',))
+    assert admin_client.get(bad_name).status_code == 404
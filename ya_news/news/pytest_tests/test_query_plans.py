@@ -0,0 +1,110 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.pagination import encode_cursor
+
+BAD_PLAN_STEPS = ('USE TEMP B-TREE',)
+# SQLite до 3.36 пишет «SCAN TABLE имя», новее — «SCAN имя».
+SCAN = re.compile(r'SCAN (?:TABLE )?(\w+)')
+INDEXED_SCAN = re.compile(r'USING (?:COVERING )?INDEX|VIRTUAL TABLE')
+
+
+def is_full_scan(step, tables):
+    match = SCAN.match(step)
+    return bool(
+        match and match.group(1) in tables and not INDEXED_SCAN.search(step)
+    )
+
+
+def assert_plans_use_indexes(queries):
+    """Прогоняет EXPLAIN QUERY PLAN для каждого SELECT и ищет
+    полный проход по таблице или сортировку во временном B-дереве.
+    """
+    assert queries, 'Запросы не перехвачены.'
+    tables = set(connection.introspection.table_names())
+    for query in queries:
+        sql = query['sql']
+        if not sql.lstrip().startswith('SELECT'):
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            steps = [row[-1] for row in cursor.fetchall()]
+        for step in steps:
+            assert not is_full_scan(step, tables), (
+                f'Полный проход: {step}\n{sql}'
+            )
+            assert not step.startswith(BAD_PLAN_STEPS), f'{step}\n{sql}'
+
+
+@pytest.mark.parametrize('step, full_scan', (
+    ('SCAN news_news', True),
+    ('SCAN TABLE news_news', True),
+    ('SCAN TABLE news_news AS U0', True),
+    ('SCAN news_news USING INDEX news_date_id_idx', False),
+    ('SCAN TABLE news_news USING COVERING INDEX news_date_id_idx', False),
+    ('SCAN TABLE news_search VIRTUAL TABLE INDEX 0:M1', False),
+    ('SCAN SUBQUERY 1', False),
+    ('SEARCH news_news USING INTEGER PRIMARY KEY (rowid=?)', False),
+))
+def test_full_scan_detection(step, full_scan):
+    """Полный проход распознаётся в выводе старых и новых SQLite."""
+    assert is_full_scan(step, {'news_news', 'news_search'}) == full_scan
+
+
+@pytest.fixture
+def detail_urls(news, test_comments, settings):
+    settings.COMMENTS_COUNT_ON_PAGE = 3
+    url = reverse('news:detail', args=(news.id,))
+    cursor = encode_cursor(test_comments[4])
+    return [
+        url,
+        f'{url}?after={cursor}',
+        f'{url}?before={cursor}',
+        f'{url}?at={cursor}',
+    ]
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN есть в SQLite'
+)
+@pytest.mark.django_db
+class TestQueryPlans:
+
+    def test_home_page(self, client, news_items):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('news:home'))
+        assert_plans_use_indexes(queries)
+
+    def test_detail_pages(self, other_user_and_client, detail_urls):
+        for url in detail_urls:
+            with CaptureQueriesContext(connection) as queries:
+                other_user_and_client.get(url)
+            assert_plans_use_indexes(queries)
+
+    def test_post_comment(self, other_user_and_client, detail_urls, news):
+        with CaptureQueriesContext(connection) as queries:
+            other_user_and_client.post(detail_urls[0], {'text': 'Текст'})
+        assert_plans_use_indexes(queries)
+
+    def test_edit_and_delete_comment(self, other_user_and_client,
+                                     test_comments):
+        comment = test_comments[5]
+        for name in ('news:edit', 'news:delete'):
+            url = reverse(name, args=(comment.id,))
+            with CaptureQueriesContext(connection) as queries:
+                other_user_and_client.get(url)
+            assert_plans_use_indexes(queries)
+        with CaptureQueriesContext(connection) as queries:
+            other_user_and_client.post(
+                reverse('news:edit', args=(comment.id,)), {'text': 'Новый'}
+            )
+        assert_plans_use_indexes(queries)
+
+    def test_search(self, client, news_items):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse('news:search'), {'q': 'news'})
+        assert_plans_use_indexes(queries)
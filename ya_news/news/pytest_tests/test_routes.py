@@ -1,9 +1,20 @@
+import gzip
 from http import HTTPStatus
 
 import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client
 from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 
+from news import urls as news_urls
+from yanews.auth_cache import check_shared_cache
+from yanews.query_budget import QueryBudgetExceeded, count_queries
+from yanews.static_assets import check_vendored_static
+from yanews.urls import auth_urls
+
 
 @pytest.mark.django_db
 def test_pages_availability(client, news):
@@ -11,6 +22,7 @@ def test_pages_availability(client, news):
     urls = [
         ('news:home', None),
         ('news:detail', (news.id,)),
+        ('news:search', None),
         ('users:login', None),
         ('users:logout', None),
         ('users:signup', None),
@@ -64,3 +76,213 @@ def test_redirect_for_anonymous_client(client, comment1):
         redirect_url = f'{login_url}?next={url}'
         response = client.get(url)
         assertRedirects(response, redirect_url)
+
+
+def test_every_route_has_query_budget():
+    """Для каждого маршрута приложения объявлен бюджет запросов."""
+    names = [f'news:{pattern.name}' for pattern in news_urls.urlpatterns]
+    names += [f'users:{pattern.name}' for pattern in auth_urls[0]]
+    missing = [name for name in names if name not in settings.QUERY_BUDGETS]
+    assert not missing
+
+
+@pytest.mark.django_db
+def test_views_meet_query_budgets(client, other_user_and_client, news,
+                                  test_comments, news_items, query_budget):
+    """Страницы укладываются в объявленный бюджет запросов."""
+    comment = test_comments[0]
+    detail_url = reverse('news:detail', args=(news.id,))
+    requests = (
+        ('news:home', client.get, reverse('news:home'), {}),
+        ('news:home', other_user_and_client.get, reverse('news:home'), {}),
+        ('news:detail', client.get, detail_url, {}),
+        ('news:detail', other_user_and_client.get, detail_url, {}),
+        ('news:detail', other_user_and_client.post, detail_url,
+         {'text': 'Текст'}),
+        ('news:edit', other_user_and_client.get,
+         reverse('news:edit', args=(comment.id,)), {}),
+        ('news:edit', other_user_and_client.post,
+         reverse('news:edit', args=(comment.id,)), {'text': 'Новый'}),
+        ('news:delete', other_user_and_client.get,
+         reverse('news:delete', args=(comment.id,)), {}),
+        ('news:delete', other_user_and_client.post,
+         reverse('news:delete', args=(comment.id,)), {}),
+        ('news:search', other_user_and_client.get, reverse('news:search'),
+         {'q': 'news'}),
+        ('users:signup', client.get, reverse('users:signup'), {}),
+        ('users:login', client.get, reverse('users:login'), {}),
+        ('users:logout', other_user_and_client.get,
+         reverse('users:logout'), {}),
+        ('news:api_news', client.get, reverse('news:api_news'), {}),
+        ('news:api_comments', client.get,
+         reverse('news:api_comments', args=(news.id,)), {}),
+    )
+    for url_name, method, url, data in requests:
+        with query_budget(url_name):
+            response = method(url, data)
+            if response.streaming:
+                # Запросы потокового ответа идут при чтении тела.
+                b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_query_budget_middleware_in_debug(settings, news):
+    """В режиме DEBUG превышение бюджета приводит к ошибке."""
+    settings.DEBUG = True
+    settings.QUERY_BUDGETS = {**settings.QUERY_BUDGETS, 'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded):
+        Client().get(reverse('news:home'))
+
+
+@pytest.mark.django_db
+def test_query_budget_middleware_counts_streamed_body(settings, news):
+    """Запросы при чтении потокового тела тоже входят в бюджет."""
+    settings.DEBUG = True
+    settings.QUERY_BUDGETS = {**settings.QUERY_BUDGETS, 'news:api_news': 0}
+    response = Client().get(reverse('news:api_news'))
+    with pytest.raises(QueryBudgetExceeded):
+        b''.join(response.streaming_content)
+
+
+@pytest.fixture
+def collected_static(settings, tmp_path):
+    """
+    Собирает статику во временный STATIC_ROOT: файл стилей
+    и заглушку Bootstrap на месте скачанного vendor_static.
+    """
+    css = tmp_path / 'static' / 'css' / 'site.css'
+    css.parent.mkdir(parents=True)
+    css.write_text('.container { margin: 0 auto; }\n' * 100)
+    bootstrap = tmp_path / 'static' / 'vendor' / 'bootstrap'
+    bootstrap.mkdir(parents=True)
+    (bootstrap / 'bootstrap.min.css').write_text('.bg-light { }\n')
+    settings.STATICFILES_DIRS = [tmp_path / 'static']
+    settings.STATIC_ROOT = tmp_path / 'collected'
+    call_command(
+        'collectstatic', interactive=False, verbosity=0,
+        ignore_patterns=['admin'],
+    )
+    return css.read_bytes()
+
+
+@pytest.mark.django_db
+def test_hashed_static_is_served_compressed(client, collected_static):
+    """Стили получают имя с хешем и отдаются сжатыми."""
+    href = static('css/site.css')
+    assert href.startswith('/static/css/site.')
+    assert href != '/static/css/site.css'
+
+    response = client.get(href, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response.status_code == HTTPStatus.OK
+    assert response['Content-Type'] == 'text/css'
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Vary'] == 'Accept-Encoding'
+    assert 'immutable' in response['Cache-Control']
+    body = b''.join(response.streaming_content)
+    assert gzip.decompress(body) == collected_static
+
+
+@pytest.mark.django_db
+def test_bootstrap_is_served_locally(client, collected_static):
+    """Страница ссылается на свой Bootstrap с хешем в имени, не на CDN."""
+    content = client.get(reverse('news:home')).content.decode()
+    href = static('vendor/bootstrap/bootstrap.min.css')
+    assert href.startswith('/static/vendor/bootstrap/bootstrap.min.')
+    assert f'href="{href}"' in content
+    assert 'cdn.' not in content
+    response = client.get(href)
+    assert response.status_code == HTTPStatus.OK
+    assert response['Content-Type'] == 'text/css'
+    assert 'immutable' in response['Cache-Control']
+
+
+@pytest.mark.django_db
+def test_missing_vendored_static_uses_cdn(client, settings, tmp_path):
+    """Пока файл не скачан, он берётся с CDN с закреплённым хешем."""
+    settings.STATICFILES_DIRS = [tmp_path]
+    assert [warning.id for warning in check_vendored_static(None)] == [
+        'yanews.W003'
+    ]
+    content = client.get(reverse('news:home')).content.decode()
+    url, integrity = settings.VENDORED_STATIC[
+        'vendor/bootstrap/bootstrap.min.css'
+    ]
+    assert f'href="{url}"' in content
+    assert f'integrity="{integrity}"' in content
+
+
+@pytest.mark.django_db
+def test_static_without_hash_or_compression(client, collected_static):
+    """Без Accept-Encoding — исходный файл, без хеша — короткий кэш."""
+    response = client.get(
+        '/static/css/site.css', HTTP_ACCEPT_ENCODING='gzip;q=0',
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert not response.has_header('Content-Encoding')
+    assert 'immutable' not in response['Cache-Control']
+    assert b''.join(response.streaming_content) == collected_static
+
+
+@pytest.fixture
+def cached_auth(settings):
+    """Пользователь из кэша, как с общим кэшем в продакшене."""
+    settings.AUTHENTICATION_BACKENDS = ['yanews.auth_cache.CachedModelBackend']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('engine', (
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.signed_cookies',
+))
+def test_authenticated_request_without_auth_queries(settings, cached_auth,
+                                                    test_user, engine):
+    """Сессия и пользователь читаются из кэша или cookie, не из базы."""
+    settings.SESSION_ENGINE = engine
+    client = Client()
+    client.force_login(test_user)
+    url = reverse('news:home')
+    client.get(url)
+    with count_queries() as counter:
+        response = client.get(url)
+    assert response.context['user'] == test_user
+    assert not [
+        sql for sql in counter.statements
+        if 'FROM "django_session"' in sql or 'FROM "auth_user"' in sql
+    ]
+
+
+@pytest.mark.django_db
+def test_password_change_reaches_cached_user(cached_auth,
+                                             other_user_and_client,
+                                             test_user):
+    """После смены пароля старые сессии сразу перестают действовать."""
+    url = reverse('news:home')
+    assert other_user_and_client.get(url).context['user'] == test_user
+    test_user.set_password('новый-пароль')
+    test_user.save()
+    response = other_user_and_client.get(url)
+    assert not response.context['user'].is_authenticated
+
+
+@pytest.mark.parametrize('cache_backend, session_engine, errors', (
+    ('django.core.cache.backends.locmem.LocMemCache',
+     'django.contrib.sessions.backends.cached_db',
+     ['yanews.E001', 'yanews.E002']),
+    ('django.core.cache.backends.locmem.LocMemCache',
+     'django.contrib.sessions.backends.db', ['yanews.E001']),
+    ('django.core.cache.backends.memcached.PyMemcacheCache',
+     'django.contrib.sessions.backends.cached_db', []),
+))
+def test_auth_cache_requires_shared_cache(settings, cached_auth,
+                                          cache_backend, session_engine,
+                                          errors):
+    """Кэш пользователей и сессий на кэше процесса — ошибка проверки."""
+    settings.CACHES = {'default': {'BACKEND': cache_backend}}
+    settings.SESSION_ENGINE = session_engine
+    assert [error.id for error in check_shared_cache(None)] == errors
+
+
+def test_default_settings_keep_auth_in_database():
+    """С LocMemCache из настроек сессии и пользователи читаются из базы."""
+    assert settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db'
+    assert not check_shared_cache(None)
@@ -0,0 +1,40 @@
+import re
+
+import pytest
+from django.urls import reverse
+
+METRIC = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="[^"]*\((\d+)\)")?')
+
+
+def metrics(response):
+    return {
+        name: (float(duration), int(count) if count else None)
+        for name, duration, count in METRIC.findall(
+            response['Server-Timing']
+        )
+    }
+
+
+@pytest.mark.django_db
+def test_server_timing_on_detail_page(client, news, test_comments):
+    """Страница новости: SQL, шаблоны и общее время."""
+    timing = metrics(client.get(reverse('news:detail', args=(news.pk,))))
+    assert set(timing) == {'db', 'tpl', 'total'}
+    assert timing['db'][1] >= 2
+    assert timing['db'][0] + timing['tpl'][0] <= timing['total'][0]
+
+
+@pytest.mark.django_db
+def test_server_timing_includes_forms(other_user_and_client, news):
+    """Отправка комментария включает валидацию формы."""
+    response = other_user_and_client.post(
+        reverse('news:detail', args=(news.pk,)), {'text': 'Текст'}
+    )
+    assert metrics(response)['form'][1] == 1
+
+
+def test_server_timing_can_be_disabled(client, settings):
+    """SERVER_TIMING = False отключает middleware."""
+    settings.SERVER_TIMING = False
+    response = client.get(reverse('users:login'))
+    assert 'Server-Timing' not in response
@@ -0,0 +1,39 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from news.models import News
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_connection_pragmas():
+    """Соединение открывается с настройками из yanews.sqlite3."""
+    assert pragma('synchronous') == 1
+    assert pragma('busy_timeout') == 5000
+    assert pragma('cache_size') == -64 * 1024
+
+
+@pytest.mark.django_db(transaction=True)
+def test_atomic_takes_write_lock_at_begin():
+    """transaction.atomic начинается с BEGIN IMMEDIATE."""
+    with CaptureQueriesContext(connection) as queries:
+        with transaction.atomic():
+            News.objects.exists()
+    assert queries[0]['sql'] == 'BEGIN IMMEDIATE'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_health_check_closes_broken_connection(monkeypatch):
+    """Неработающее постоянное соединение закрывается между запросами."""
+    closed = []
+    connection.ensure_connection()
+    monkeypatch.setattr(connection, 'is_usable', lambda: False)
+    monkeypatch.setattr(connection, 'close', lambda: closed.append(True))
+    connection.close_if_unusable_or_obsolete()
+    assert closed
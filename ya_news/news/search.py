@@ -0,0 +1,111 @@
+"""
+Полнотекстовый поиск по новостям.
+
+Индекс — виртуальная таблица FTS5 news_search с внешним содержимым
+(content='news_news'): текст хранится только в news_news, а индекс
+поддерживают триггеры из миграции 0005. Триггеры срабатывают и на
+bulk_create/bulk_update, поэтому import_news индекс не обходит.
+Миграция, пересоздающая news_news (AlterField в SQLite), молча удалит
+триггеры; test_search_triggers_exist это ловит.
+
+Токенизатор unicode61 приводит кириллицу к нижнему регистру, но
+морфологию не знает. Поэтому слова запроса урезаются до основы
+и ищутся как префиксы: «новости» находит «новость» и «новостями».
+Результаты упорядочены по rank — это bm25, где совпадение в заголовке
+весит больше (настраивается в миграции).
+"""
+import re
+
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+
+WORD = re.compile(r'\w+')
+# Окончания от длинных к коротким, чтобы «ами» срезалось раньше «и».
+ENDINGS = sorted(
+    (
+        'иями', 'ями', 'ами', 'ией', 'ого', 'его', 'ому', 'ему', 'ыми',
+        'ими', 'ость', 'ости', 'ться', 'тся', 'ешь', 'ет', 'ют', 'ут',
+        'ть', 'ие', 'ия', 'ий', 'ый', 'ой', 'ая', 'яя', 'ое', 'ее', 'ые',
+        'ии', 'ов', 'ев', 'ей', 'ам', 'ям', 'ах', 'ях', 'ом', 'ем', 'ую',
+        'юю', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+    ),
+    key=len,
+    reverse=True,
+)
+MIN_STEM = 3
+# Более короткие слова ищутся целиком: префикс «в*» разворачивается
+# в MATCH по огромной части словаря индекса.
+MIN_PREFIX = 3
+# Управляющие символы не встречаются в тексте новостей; ими размечаем
+# совпадения, а в <mark> превращаем уже после экранирования.
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+
+SEARCH_SQL = f"""
+    SELECT news_news.id, news_news.title, news_news.date,
+           highlight(news_search, 0, %s, %s) AS title_html,
+           snippet(news_search, 1, %s, %s, '…', {SNIPPET_TOKENS})
+               AS snippet_html
+    FROM news_search
+    JOIN news_news ON news_news.id = news_search.rowid
+    WHERE news_search MATCH %s
+    ORDER BY rank
+    LIMIT %s
+"""
+
+
+def stem(word):
+    """Наивный стеммер: отрезает самое длинное окончание."""
+    word = word.lower()
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def term(word):
+    """
+    Слово — префиксом его основы; числа, слова с цифрами и короткие
+    слова — целиком: префиксы «2020*» и «в*» разворачиваются в тысячи
+    терминов индекса.
+    """
+    if not word.isalpha() or len(word) < MIN_PREFIX:
+        return f'"{word.lower()}"'
+    return f'"{stem(word)}"*'
+
+
+def build_match(query):
+    """
+    Выражение MATCH: все слова запроса как префиксы их основ.
+
+    Слова берутся регулярным выражением и заключаются в кавычки,
+    поэтому синтаксис FTS5 (NEAR, OR, скобки) из запроса не проходит.
+    """
+    return ' '.join(term(word) for word in WORD.findall(query))
+
+
+def highlight(fragment):
+    return mark_safe(
+        escape(fragment)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def search_news(query, limit=None):
+    """Новости по запросу с размеченными заголовком и фрагментом текста."""
+    match = build_match(query)
+    if not match:
+        return []
+    limit = limit or settings.NEWS_SEARCH_RESULTS
+    results = list(News.objects.raw(
+        SEARCH_SQL,
+        [MARK_START, MARK_END, MARK_START, MARK_END, match, limit],
+    ))
+    for news in results:
+        news.title_html = highlight(news.title_html)
+        news.snippet_html = highlight(news.snippet_html)
+    return results
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cards import bump_card_version
+from .models import Comment, News, change_comment_counts
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_comment_counts([(instance.news_id, 1)])
+    else:
+        bump_card_version(instance.news_id)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def author_deleted(sender, instance, **kwargs):
+    """
+    Комментарии удаляются методами Comment и CommentQuerySet, а каскадом
+    при удалении новости или автора — одним DELETE без сигналов.
+    Новость при этом удаляется сама, а для автора счётчики его новостей
+    уменьшаем здесь, по одному UPDATE на новость.
+    """
+    change_comment_counts(
+        Comment.objects.filter(author=instance).count_per_news(), sign=-1
+    )
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def news_changed(sender, instance, **kwargs):
+    bump_card_version(instance.pk)
@@ -1,11 +1,12 @@
 from django.urls import path
 
-from news import views
+from news import api, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
     path(
         'delete_comment/<int:pk>/',
@@ -13,4 +14,10 @@ urlpatterns = [
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.news_list, name='api_news'),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.comment_list,
+        name='api_comments'
+    ),
 ]
@@ -1,13 +1,22 @@
-from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .cards import render_cards
+from .conditional import detail_etag, home_etag
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import comment_page_query, get_comment_page
+from .search import search_news
 
 
+@method_decorator(
+    condition(etag_func=home_etag),
+    name='dispatch',
+)
 class NewsList(generic.ListView):
     """Список новостей."""
     model = News
@@ -15,25 +24,56 @@ class NewsList(generic.ListView):
 
     def get_queryset(self):
         """
-        Выводим только несколько последних новостей.
+        Выводим только несколько последних новостей без полного текста.
 
-        Их количество определяется в настройках проекта.
+        Число комментариев берётся из счётчика News.comment_count,
+        таблица комментариев при этом не читается.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.home_page()
 
+    def get_context_data(self, **kwargs):
+        """Карточки новостей берём из кэша фрагментов."""
+        context = super().get_context_data(**kwargs)
+        context['cards'] = render_cards(context['object_list'])
+        return context
+
+
+class NewsSearch(generic.ListView):
+    """Поиск по заголовкам и текстам новостей."""
+    template_name = 'news/search.html'
+    context_object_name = 'results'
+
+    def get_queryset(self):
+        return search_news(self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class CommentPageMixin:
+    """Добавляет в контекст страницу комментариев к новости."""
 
-class NewsDetail(generic.DetailView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_page'] = get_comment_page(
+            self.object.comment_set.select_related('author'),
+            self.request.GET,
+        )
+        return context
+
+
+@method_decorator(
+    condition(etag_func=detail_etag),
+    name='dispatch',
+)
+class NewsDetail(CommentPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +84,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -60,11 +101,16 @@ class NewsComment(
         comment.news = self.object
         comment.author = self.request.user
         comment.save()
+        self.comment = comment
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        """Ведём на страницу, где оказался новый комментарий."""
+        return (
+            reverse('news:detail', kwargs={'pk': self.object.pk})
+            + comment_page_query(self.comment)
+            + '#comments'
+        )
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +129,23 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
-        return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
-        ) + '#comments'
+        """Ведём на страницу новости, где находится комментарий."""
+        return (
+            reverse('news:detail', kwargs={'pk': self.object.news_id})
+            + comment_page_query(self.object)
+            + '#comments'
+        )
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Новость нужна шаблонам редактирования и удаления,
+        поэтому загружаем её тем же запросом.
+        """
+        return self.model.objects.select_related('news').filter(
+            author=self.request.user
+        )
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -2,6 +2,10 @@
 ASGI config for yanews project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed through ``settings.ASGI_ROOT_URLCONF`` so that news
+pages are served by the native async views from ``news.async_views``.
+Streaming bodies (``news.api``) are read in the sync thread, see
+``YaNewsASGIHandler.send_response``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,8 +13,56 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+
+class YaNewsASGIHandler(ASGIHandler):
+
+    async def get_response_async(self, request):
+        request.urlconf = settings.ASGI_ROOT_URLCONF
+        return await super().get_response_async(request)
+
+    async def send_response(self, response, send):
+        """
+        Django 3.2 перебирает тело StreamingHttpResponse прямо в цикле
+        событий, и генератор с ORM (news/api.py) падает
+        с SynchronousOnlyOperation. Здесь фрагменты тела читаются через
+        sync_to_async в общем потоке синхронного кода, где выполнялся
+        view и открыт курсор, а отправляются из цикла событий.
+        """
+        if not response.streaming:
+            return await super().send_response(response, send)
+        parts = iter(response)
+        next_part = sync_to_async(next, thread_sensitive=True)
+        # Заголовки и завершающее сообщение отправляет Django, тело —
+        # send_body перед завершающим сообщением.
+        response.streaming_content = ()
+
+        async def send_body(message):
+            if message['type'] == 'http.response.body' and not message.get(
+                'more_body'
+            ):
+                while (part := await next_part(parts, None)) is not None:
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send({
+                            'type': 'http.response.body',
+                            'body': chunk,
+                            'more_body': True,
+                        })
+            await send(message)
+
+        await super().send_response(response, send_body)
+
+
+django.setup(set_prefix=False)
+
+application = YaNewsASGIHandler()
+
+if settings.WARMUP_ON_STARTUP:
+    from yanews.warmup import warmup
+    warmup()
@@ -0,0 +1,16 @@
+"""
+URLconf для ASGI: те же маршруты, что в yanews/urls.py,
+но главная и страница новости обслуживаются асинхронными view.
+"""
+from django.contrib import admin
+from django.urls import include, path
+
+from . import profiling
+from .urls import auth_urls
+
+urlpatterns = [
+    path('', include('news.async_urls')),
+    path('admin/', admin.site.urls),
+    path('auth/', include(auth_urls)),
+    path('profiles/<str:name>/', profiling.download, name='profile'),
+]
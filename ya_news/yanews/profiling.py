@@ -0,0 +1,214 @@
+"""
+Профилирование отдельных запросов по требованию.
+
+Сотрудник (is_staff) включает профилировщик заголовком X-Profile: 1
+или параметром ?_profile=1. Запрос выполняется под cProfile, каждый
+SQL-запрос записывается с длительностью и строкой кода проекта,
+из которой он выполнен. Результат — файлы <id>.pstats и <id>.json
+в settings.PROFILE_DIR; хранятся последние PROFILE_KEEP профилей,
+PROFILE_KEEP меньше 1 отключает профилировщик. Параметры SQL —
+данные пользователей, поэтому в профиль они попадают только при
+PROFILE_SQL_PARAMS = True. Id профиля возвращается в заголовке
+X-Profile-Id, файлы скачиваются через view download.
+
+Middleware работает и в асинхронной цепочке. cProfile видит только
+поток, в котором включён: под ASGI это цикл событий, и в профиль
+попадают корутины соседних запросов, но не ORM в потоках sync_to_async.
+SQL из этих потоков записывается полностью.
+"""
+import cProfile
+import json
+import pstats
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, Http404
+
+from .execute_wrappers import execute_wrapper
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+PROFILE_NAME = re.compile(r'^[\w-]+\.(pstats|json)$')
+TOP_FUNCTIONS = 40
+PROJECT_DIR = str(Path(__file__).parent)
+
+
+def source_frame():
+    """
+    Первая строка кода приложений в стеке. Пакет проекта пропускаем:
+    в нём обёртки SQL-запросов, а не код, выполняющий запросы.
+    """
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and not filename.startswith(
+            PROJECT_DIR
+        ):
+            relative = filename[len(base_dir) + 1:]
+            return f'{relative}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class SqlRecorder:
+    """Обёртка SQL-запросов с замером каждого запроса."""
+
+    def __init__(self, with_params=False):
+        self.statements = []
+        self.with_params = with_params
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append({
+                'sql': sql,
+                'params': repr(params) if self.with_params else None,
+                'many': many,
+                'ms': round((time.perf_counter() - started) * 1000, 3),
+                'source': source_frame(),
+            })
+
+
+def top_functions(stats):
+    rows = sorted(
+        stats.stats.items(), key=lambda item: item[1][3], reverse=True
+    )[:TOP_FUNCTIONS]
+    return [
+        {
+            'function': f'{filename}:{line}({name})',
+            'calls': calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _)
+        in rows
+    ]
+
+
+def remove_old_profiles(directory, keep):
+    """Имена начинаются со времени, поэтому сортировка — по возрасту."""
+    profiles = sorted(directory.glob('*.json'))
+    for report in profiles[:max(len(profiles) - keep, 0)]:
+        report.unlink(missing_ok=True)
+        report.with_suffix('.pstats').unlink(missing_ok=True)
+
+
+def profile_requested(request):
+    return bool(
+        request.META.get(PROFILE_HEADER) or PROFILE_PARAM in request.GET
+    )
+
+
+def is_staff(request):
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+class ProfilerMiddleware:
+    """
+    Ставится после AuthenticationMiddleware: решение о профилировании
+    принимается по request.user. Пользователь загружается, только если
+    профиль запрошен.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_DIR or settings.PROFILE_KEEP < 1:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.directory = Path(settings.PROFILE_DIR)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not (profile_requested(request) and is_staff(request)):
+            return self.get_response(request)
+        profiler, recorder = self.start()
+        started = time.perf_counter()
+        with execute_wrapper(recorder):
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        return self.finish(request, response, profiler, recorder, started)
+
+    async def __acall__(self, request):
+        if not (
+            profile_requested(request)
+            and await sync_to_async(is_staff)(request)
+        ):
+            return await self.get_response(request)
+        profiler, recorder = self.start()
+        started = time.perf_counter()
+        with execute_wrapper(recorder):
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+        return await sync_to_async(self.finish)(
+            request, response, profiler, recorder, started
+        )
+
+    def start(self):
+        recorder = SqlRecorder(with_params=settings.PROFILE_SQL_PARAMS)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler, recorder
+
+    def finish(self, request, response, profiler, recorder, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        response['X-Profile-Id'] = self.save(
+            request, response, profiler, recorder, total_ms
+        )
+        return response
+
+    def save(self, request, response, profiler, recorder, total_ms):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = '{}-{}'.format(
+            datetime.now().strftime('%Y%m%d-%H%M%S-%f'), uuid.uuid4().hex[:8]
+        )
+        path = self.directory / profile_id
+        profiler.dump_stats(path.with_suffix('.pstats'))
+        match = request.resolver_match
+        report = {
+            'id': profile_id,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'sql_count': len(recorder.statements),
+            'sql_ms': round(sum(row['ms'] for row in recorder.statements), 3),
+            'sql': recorder.statements,
+            'functions': top_functions(pstats.Stats(profiler)),
+        }
+        with open(path.with_suffix('.json'), 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        remove_old_profiles(self.directory, settings.PROFILE_KEEP)
+        return profile_id
+
+
+@staff_member_required
+def download(request, name):
+    if not settings.PROFILE_DIR or not PROFILE_NAME.match(name):
+        raise Http404
+    path = Path(settings.PROFILE_DIR) / name
+    if not path.is_file():
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=name)
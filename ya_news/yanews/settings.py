@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,23 +22,37 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.static_assets.StaticFilesMiddleware',
+    'yanews.server_timing.ServerTimingMiddleware',
+    'yanews.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanews.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
 
+ASGI_ROOT_URLCONF = 'yanews.asgi_urls'
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени для Server-Timing.
+        'BACKEND': 'yanews.server_timing.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Шаблоны компилируются один раз на процесс. В Django 3.2
+            # runserver сбрасывает этот кэш при изменении шаблонов.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -53,12 +68,46 @@ WSGI_APPLICATION = 'yanews.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite с WAL и другими PRAGMA, см. yanews/sqlite3/base.py.
+        'ENGINE': 'yanews.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# В продакшене нужен общий для всех воркеров кэш (Memcached/Redis),
+# иначе версии карточек и счётчики попаданий живут в каждом процессе.
+# Только с общим кэшем включаются кэш карточек, ETag страниц новостей,
+# кэшированные сессии и пользователи. Кэш задают переменные окружения
+# CACHE_BACKEND и CACHE_LOCATION, см. README.md.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
 
+# Сессии и пользователи по умолчанию читаются из базы: выход и смена
+# пароля сразу видны всем воркерам. Кэш для них (yanews/auth_cache.py)
+# включается только с общим кэшем в CACHES; с LocMemCache проверки
+# yanews.E001 и yanews.E002 не дают включить его и вручную.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+if CACHES['default']['BACKEND'] != (
+    'django.core.cache.backends.locmem.LocMemCache'
+):
+    AUTHENTICATION_BACKENDS = ['yanews.auth_cache.CachedModelBackend']
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTH_USER_CACHE_TIMEOUT = 60 * 15
+
 AUTH_PASSWORD_VALIDATORS = []
 
 
@@ -74,9 +123,99 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# collectstatic кладёт сюда файлы с хешем в имени и их сжатые варианты,
+# StaticFilesMiddleware отдаёт их отсюда (yanews/static_assets.py).
+STATIC_ROOT = BASE_DIR / 'collected_static'
+
+STATICFILES_STORAGE = (
+    'yanews.static_assets.CompressedManifestStaticFilesStorage'
+)
+
+SERVE_STATIC = True
+
+# Сторонняя статика для manage.py vendor_static:
+# путь в static/ → (адрес, SRI-хеш).
+VENDORED_STATIC = {
+    'vendor/bootstrap/bootstrap.min.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.0.1/dist/css/bootstrap.min.css',
+        'sha384-+0n0xVW2eSR5OomGNYDnhzAbDsOXxcvSN1TPprVMTNDbiYZCxYbOOl7+AMvyTG2x',
+    ),
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 20
+
+# Кэш карточек главной страницы (news/cards.py). С кэшем процесса
+# карточки в других воркерах не сбрасывались бы, поэтому по умолчанию
+# он включён только с общим кэшем; иначе проверка news.W001.
+NEWS_CARD_CACHE = CACHES['default']['BACKEND'] != (
+    'django.core.cache.backends.locmem.LocMemCache'
+)
+
+NEWS_CARD_CACHE_TIMEOUT = 60 * 60
+
+# ETag страниц новостей (news/conditional.py) строится из версий карточек
+# в кэше; с кэшем процесса другой воркер мог бы ответить 304 на уже
+# изменённую страницу, поэтому ETag включён только с общим кэшем.
+NEWS_ETAGS = NEWS_CARD_CACHE
+
+# Сколько слов текста хранить в News.excerpt для карточки.
+NEWS_EXCERPT_WORDS = 15
+
+NEWS_SEARCH_RESULTS = 20
+
+# Сколько последних комментариев показывать на странице новости в админке.
+ADMIN_COMMENTS_INLINE_LIMIT = 20
+
+# Файл со списком запрещённых слов, по одному в строке. Перечитывается
+# при изменении, без перезапуска. Если не задан, используется
+# news.forms.BAD_WORDS.
+BAD_WORDS_FILE = None
+
+# Размер пула потоков для ORM в асинхронных view (news/async_views.py).
+NEWS_ASYNC_ORM_THREADS = 8
+
+# Сколько строк API читает из базы и кодирует за один раз.
+API_CHUNK_SIZE = 2000
+
+# Наибольшее значение параметра limit в API; большие значения урезаются.
+API_MAX_LIMIT = 10000
+
+# Прогревать шаблоны, маршруты и переводы при загрузке wsgi.py/asgi.py
+# (yanews/warmup.py).
+WARMUP_ON_STARTUP = True
+
+# Заголовок Server-Timing с временем SQL, шаблонов и форм
+# (yanews/server_timing.py).
+SERVER_TIMING = True
+
+# Профили запросов сотрудников (yanews/profiling.py): каталог и сколько
+# последних профилей хранить. None или PROFILE_KEEP = 0 отключают
+# профилировщик. Параметры SQL в профиль пишутся только при
+# PROFILE_SQL_PARAMS = True: это данные пользователей.
+PROFILE_DIR = BASE_DIR / 'profiles'
+PROFILE_KEEP = 50
+PROFILE_SQL_PARAMS = False
+
+# Максимум SQL-запросов на запрос к маршруту, с учётом сессии
+# и пользователя. См. yanews/query_budget.py.
+QUERY_BUDGETS = {
+    'news:home': 4,
+    'news:detail': 6,
+    'news:edit': 5,
+    'news:delete': 6,
+    'news:search': 3,
+    'news:api_news': 1,
+    'news:api_comments': 2,
+    'users:login': 9,
+    'users:logout': 4,
+    'users:signup': 4,
+}
@@ -0,0 +1,96 @@
+"""
+Прогрев процесса перед приёмом запросов.
+
+Первый запрос к свежему процессу платит за разбор шаблонов, сборку
+URL-резолверов, загрузку каталогов перевода для LANGUAGE_CODE
+и часового пояса TIME_ZONE (pytz читает базу поясов лениво).
+warmup() делает всё это заранее: шаблоны проекта и приложений
+компилируются в кэш cached.Loader, регулярные выражения маршрутов
+и словари reverse заполняются, каталоги 'ru', форматы и пояс
+загружаются.
+
+Вызывается из wsgi.py и asgi.py при WARMUP_ON_STARTUP и командой
+manage.py warmup.
+"""
+import time
+
+from django.conf import settings
+from django.template import engines
+from django.template.autoreload import get_template_directories
+from django.template.backends.django import DjangoTemplates
+from django.urls import URLResolver, get_resolver
+from django.utils import formats, timezone, translation
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+def compile_templates():
+    """
+    Компилирует шаблоны из каталогов проекта и приложений. Шаблоны
+    самого Django (админка) не трогаем: они не на горячем пути.
+    """
+    compiled = 0
+    directories = get_template_directories()
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for directory in directories:
+            for path in sorted(directory.rglob('*')):
+                if path.suffix not in TEMPLATE_SUFFIXES:
+                    continue
+                backend.get_template(path.relative_to(directory).as_posix())
+                compiled += 1
+    return compiled
+
+
+def populate_resolver(resolver):
+    """Заполняет reverse-словари и компилирует регулярные выражения."""
+    resolver.reverse_dict
+    resolver.namespace_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        count += 1
+        if isinstance(pattern, URLResolver):
+            count += populate_resolver(pattern)
+    return count
+
+
+def populate_urls():
+    urlconfs = {settings.ROOT_URLCONF}
+    asgi_urlconf = getattr(settings, 'ASGI_ROOT_URLCONF', None)
+    if asgi_urlconf:
+        urlconfs.add(asgi_urlconf)
+    return sum(
+        populate_resolver(get_resolver(urlconf)) for urlconf in urlconfs
+    )
+
+
+def load_translations():
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+        formats.get_format('DATE_FORMAT')
+        formats.get_format_modules(settings.LANGUAGE_CODE)
+    return settings.LANGUAGE_CODE
+
+
+def load_time_zone():
+    return str(timezone.localtime().tzinfo)
+
+
+STAGES = (
+    ('шаблоны', compile_templates),
+    ('маршруты', populate_urls),
+    ('переводы', load_translations),
+    ('часовой пояс', load_time_zone),
+)
+
+
+def warmup():
+    """Возвращает (этап, результат, мс) для каждого этапа."""
+    report = []
+    for name, stage in STAGES:
+        started = time.perf_counter()
+        result = stage()
+        report.append((name, result, (time.perf_counter() - started) * 1000))
+    return report
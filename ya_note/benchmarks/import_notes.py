@@ -0,0 +1,80 @@
+"""
+Скорость import_notes и export_notes на сгенерированном файле.
+
+python -m benchmarks.import_notes --items 200000 --format csv
+
+Каждая десятая заметка повторяет заголовок из небольшого набора,
+поэтому часть slug получает суффиксы.
+"""
+import argparse
+import csv
+import json
+import resource
+import tempfile
+import time
+
+from benchmarks import setup_django, test_database
+
+REPEATED_TITLES = 100
+
+
+def write_feed(file, items, output_format):
+    writer = csv.writer(file) if output_format == 'csv' else None
+    if writer:
+        writer.writerow(('title', 'text'))
+    for index in range(items):
+        title = (
+            f'Частая заметка {index % REPEATED_TITLES}' if index % 10 == 0
+            else f'Заметка номер {index}'
+        )
+        text = 'Текст заметки. ' * 20
+        if writer:
+            writer.writerow((title, text))
+        else:
+            file.write(
+                json.dumps({'title': title, 'text': text}, ensure_ascii=False)
+                + '\n'
+            )
+    file.flush()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--format', choices=('csv', 'ndjson'), default='csv')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    with tempfile.NamedTemporaryFile(
+        'w', suffix=f'.{args.format}', encoding='utf-8', newline=''
+    ) as feed, tempfile.TemporaryDirectory() as directory, test_database(
+        f'{directory}/import.sqlite3'
+    ):
+        write_feed(feed, args.items, args.format)
+        get_user_model().objects.create(username='author')
+        before = peak_rss_mb()
+        call_command(
+            'import_notes', feed.name, author='author',
+            batch_size=args.batch_size,
+        )
+        print(
+            f'Пиковая память: {before:.0f} МБ до импорта, '
+            f'{peak_rss_mb():.0f} МБ после'
+        )
+        started = time.perf_counter()
+        call_command(
+            'export_notes', f'{directory}/export.{args.format}',
+            verbosity=0,
+        )
+        print(f'Выгрузка: {time.perf_counter() - started:.1f} с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Задержка поиска по заметкам автора на большой базе.
+
+python -m benchmarks.search_notes --notes 10000000 --users 100000
+
+Заметки вставляются напрямую в notes_note, индекс FTS5 заполняют
+триггеры — так же, как при обычном создании заметок. Слова заметок
+и запросов берутся из словаря с частотами по Ципфу, так что частые
+слова встречаются в большей части базы. Для случайных авторов
+выполняются запросы из одного-двух слов, последнее иногда
+недописано:
+search  — search_notes(), MATCH по индексу с ограничением автора;
+like    — прежний способ: title LIKE или text LIKE по заметкам автора.
+Печатаются p50 и p99 задержки в миллисекундах.
+"""
+import argparse
+import random
+import tempfile
+import time
+from itertools import accumulate
+
+from benchmarks import percentile, setup_django, test_database
+
+SYLLABLES = (
+    'ба ве ги до ку ла ме ни по ру са те фи хо це ча ша ще ю я ка ро'
+).split()
+VOCABULARY = 20_000
+BATCH = 10_000
+
+
+def vocabulary(rng):
+    """
+    Слова из слогов с частотами по закону Ципфа: первые слова
+    встречаются почти в каждой заметке, как предлоги в живом тексте.
+    Как и в живом языке, частые слова короче редких.
+    """
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(1, 5))))
+    words = sorted(words)
+    rng.shuffle(words)
+    words.sort(key=len)
+    # Накопленные веса: choices не пересчитывает их на каждом вызове.
+    weights = list(accumulate(1 / rank for rank in range(1, VOCABULARY + 1)))
+    return words, weights
+
+
+def note_rows(start, count, users, words, weights, rng):
+    for index in range(start, start + count):
+        title = ' '.join(rng.choices(words, cum_weights=weights, k=3))
+        text = ' '.join(rng.choices(words, cum_weights=weights, k=40))
+        yield (title, text, f'note-{index}', rng.randint(1, users))
+
+
+def fill(connection, notes, users, words, weights, rng):
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO auth_user (id, username, password, is_superuser, '
+            'first_name, last_name, email, is_staff, is_active, date_joined) '
+            "VALUES (%s, %s, '', 0, '', '', '', 0, 1, '2020-01-01')",
+            [(pk, f'user{pk}') for pk in range(1, users + 1)],
+        )
+        for start in range(0, notes, BATCH):
+            cursor.executemany(
+                'INSERT INTO notes_note (title, text, slug, author_id) '
+                'VALUES (%s, %s, %s, %s)',
+                list(note_rows(
+                    start, min(BATCH, notes - start), users, words, weights,
+                    rng,
+                )),
+            )
+    print(
+        f'Заполнение: {notes} заметок, {users} авторов, '
+        f'{time.perf_counter() - started:.0f} с'
+    )
+
+
+def search_like(author_id, query):
+    from django.db.models import Q
+    from notes.models import Note
+    condition = Q()
+    for word in query.split():
+        condition &= Q(title__icontains=word) | Q(text__icontains=word)
+    return list(
+        Note.objects.filter(condition, author_id=author_id)
+        .only('id', 'slug', 'title')[:20]
+    )
+
+
+def measure(name, search, queries):
+    timings = []
+    for author_id, query in queries:
+        started = time.perf_counter()
+        search(author_id, query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f'{name:6}: p50 {percentile(timings, 0.5):7.2f} мс, '
+        f'p99 {percentile(timings, 0.99):7.2f} мс'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import transaction
+    from notes.search import search_notes
+    rng = random.Random(args.seed)
+    words, weights = vocabulary(rng)
+    queries = []
+    for _ in range(args.queries):
+        query = rng.choices(
+            words, cum_weights=weights, k=rng.choice((1, 2))
+        )
+        if len(query[-1]) > 2 and rng.random() < 0.3:
+            # Недописанное последнее слово.
+            query[-1] = query[-1][:rng.randint(2, len(query[-1]))]
+        queries.append((rng.randint(1, args.users), ' '.join(query)))
+    with tempfile.TemporaryDirectory() as directory, test_database(
+        f'{directory}/search.sqlite3'
+    ) as connection:
+        with transaction.atomic():
+            fill(connection, args.notes, args.users, words, weights, rng)
+        measure('search', search_notes, queries)
+        measure('like', search_like, queries)
+
+
+if __name__ == '__main__':
+    main()
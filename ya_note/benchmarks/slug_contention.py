@@ -0,0 +1,112 @@
+"""
+Создание заметок с одинаковым заголовком из нескольких потоков.
+
+python -m benchmarks.slug_contention --writers 8 --seconds 5
+
+Режимы, каждый в отдельном процессе со своей базой в файле:
+probe    — как было: exists() для slug, slug-2, slug-3… по очереди,
+           затем вставка без повтора; гонка даёт IntegrityError;
+allocate — Note.save() с выбором slug одним запросом по диапазону
+           индекса и повтором при IntegrityError (notes/slugs.py).
+
+Печатаются созданные заметки в секунду, среднее число SQL-запросов
+на заметку и число неудачных созданий.
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import setup_django, test_database
+
+MODES = ('probe', 'allocate')
+TITLE = 'Одинаковый заголовок'
+
+
+def create_probe(author):
+    from pytils.translit import slugify
+    from notes.models import Note
+    base = slugify(TITLE)
+    slug, number = base, 1
+    while Note.objects.filter(slug=slug).exists():
+        number += 1
+        slug = f'{base}-{number}'
+    Note.objects.create(title=TITLE, text='Текст', slug=slug, author=author)
+
+
+def create_allocate(author):
+    from notes.models import Note
+    Note.objects.create(title=TITLE, text='Текст', author=author)
+
+
+def worker(create, deadline, author, stats):
+    from django.db import IntegrityError, connection
+    from yanote.query_budget import count_queries
+    done = failed = 0
+    with count_queries() as counter:
+        while time.monotonic() < deadline:
+            try:
+                create(author)
+                done += 1
+            except IntegrityError:
+                failed += 1
+    connection.close()
+    with stats['lock']:
+        stats['done'] += done
+        stats['failed'] += failed
+        stats['queries'] += counter.count
+
+
+def run(mode, writers, seconds):
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    create = create_probe if mode == 'probe' else create_allocate
+    with tempfile.TemporaryDirectory() as directory, test_database(
+        f'{directory}/{mode}.sqlite3'
+    ):
+        author = get_user_model().objects.create(username='Автор')
+        connection.close()
+        stats = {'lock': threading.Lock(), 'done': 0, 'failed': 0,
+                 'queries': 0}
+        deadline = time.monotonic() + seconds
+        threads = [
+            threading.Thread(
+                target=worker, args=(create, deadline, author, stats)
+            )
+            for _ in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    attempts = stats['done'] + stats['failed']
+    print(
+        f'{mode:8}: заметок {stats["done"] / seconds:7.0f}/с, '
+        f'запросов на заметку {stats["queries"] / max(attempts, 1):6.1f}, '
+        f'неудачных созданий {stats["failed"]}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+    if args.mode:
+        run(args.mode, args.writers, args.seconds)
+        return
+    for mode in MODES:
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.slug_contention',
+             '--mode', mode, '--writers', str(args.writers),
+             '--seconds', str(args.seconds)],
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
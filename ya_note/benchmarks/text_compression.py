@@ -0,0 +1,117 @@
+"""
+Сжатие текстов заметок: размер базы и задержки записи и чтения.
+
+python -m benchmarks.text_compression --notes 1000 --sizes 1 4 16 64 256
+
+Для каждого размера текста (в КиБ) заметки с текстом в виде журнала
+приложения создаются через Note.objects.create и читаются по одной
+через Note.objects.get(pk=...).text в двух режимах, каждый в своей
+временной базе в файле:
+plain      — сжатие отключено (порог больше любого текста);
+compressed — порог NOTES_TEXT_COMPRESS_MIN_BYTES из настроек.
+Печатаются размер файла базы после VACUUM, из него — таблицы
+notes_note (индекс поиска хранит свои данные несжатыми), и p50/p99
+записи и чтения в миллисекундах.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks import percentile, setup_django, test_database
+
+LEVELS = ('DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING', 'ERROR')
+MESSAGES = (
+    'Запрос обработан за {ms} мс, пользователь {user}',
+    'Не удалось подключиться к {host}: таймаут {ms} мс',
+    'Задача {task} поставлена в очередь worker-{worker}',
+    'Кэш промахнулся по ключу notes-count:{user}',
+)
+
+
+def log_text(size, rng):
+    """Текст около size байт, похожий на вставленный журнал."""
+    lines, length = [], 0
+    while length < size:
+        line = (
+            f'2026-10-{rng.randint(1, 28):02} '
+            f'{rng.randint(0, 23):02}:{rng.randint(0, 59):02}:'
+            f'{rng.randint(0, 59):02} {rng.choice(LEVELS):7} '
+            + rng.choice(MESSAGES).format(
+                ms=rng.randint(1, 5000), user=rng.randint(1, 10**5),
+                host=f'10.0.{rng.randint(0, 255)}.{rng.randint(0, 255)}',
+                task=rng.getrandbits(32), worker=rng.randint(1, 16),
+            )
+        )
+        lines.append(line)
+        length += len(line.encode()) + 1
+    return '\n'.join(lines)
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return (time.perf_counter() - started) * 1000
+
+
+def run(mode, size, count, seed):
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from notes.models import Note
+    rng = random.Random(seed)
+    texts = [log_text(size, rng) for _ in range(count)]
+    threshold = {} if mode == 'compressed' else {
+        'NOTES_TEXT_COMPRESS_MIN_BYTES': float('inf')
+    }
+    with tempfile.TemporaryDirectory() as directory, test_database(
+        f'{directory}/{mode}.sqlite3'
+    ), override_settings(**threshold):
+        author = get_user_model().objects.create(username='author')
+        writes = sorted(
+            timed(lambda: Note.objects.create(
+                title=f'Журнал {index}', text=text, author=author
+            ))
+            for index, text in enumerate(texts)
+        )
+        pks = list(Note.objects.values_list('pk', flat=True))
+        rng.shuffle(pks)
+        reads = sorted(
+            timed(lambda: Note.objects.get(pk=pk).text) for pk in pks
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            cursor.execute('VACUUM')
+            cursor.execute(
+                "SELECT sum(pgsize) FROM dbstat WHERE name = 'notes_note'"
+            )
+            table_size = cursor.fetchone()[0]
+        database_size = os.path.getsize(connection.settings_dict['NAME'])
+    print(
+        f'{size // 1024:4} КиБ {mode:10}: база {database_size / 2**20:6.1f} '
+        f'МБ, notes_note {table_size / 2**20:6.1f} МБ, '
+        f'запись p50 {percentile(writes, 0.5):6.2f} '
+        f'p99 {percentile(writes, 0.99):6.2f} мс, чтение p50 '
+        f'{percentile(reads, 0.5):6.2f} p99 {percentile(reads, 0.99):6.2f} мс'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=1000)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=(1, 4, 16, 64, 256),
+        help='Размеры текстов в КиБ.',
+    )
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django()
+    for size in args.sizes:
+        for mode in ('plain', 'compressed'):
+            run(mode, size * 1024, args.notes, args.seed)
+
+
+if __name__ == '__main__':
+    main()
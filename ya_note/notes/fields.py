@@ -0,0 +1,85 @@
+"""
+Текстовое поле со сжатием больших значений.
+
+Тексты от NOTES_TEXT_COMPRESS_MIN_BYTES байт в UTF-8 при сохранении
+сжимаются zlib и хранятся в той же колонке как BLOB: первый байт —
+формат (ZLIB), дальше сжатые данные. Короткие тексты и тексты, которые
+от сжатия не уменьшаются, остаются строкой.
+
+Из базы значение попадает в модель как есть и распаковывается при
+первом обращении к атрибуту; распакованный текст запоминается
+в экземпляре. Если к тексту не обращались, сохранение записывает
+хранимое значение без повторного сжатия.
+
+values() и values_list() возвращают хранимое значение, его распаковывает
+decompress(). В SQL то же делает функция note_text(), которую
+notes/signals.py регистрирует на каждом соединении SQLite.
+
+Через note_text() триггеры поискового индекса читают текст, поэтому
+изменять notes_note можно только из соединений с этой функцией:
+из manage.py dbshell и других программ запись падает с «no such
+function: note_text». Подробности — в миграции 0004.
+"""
+import zlib
+
+from django.conf import settings
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+ZLIB = b'\x01'
+ZLIB_LEVEL = 6
+
+
+def compress(text):
+    """Хранимое значение текста: строка или BLOB с байтом формата."""
+    data = text.encode()
+    if len(data) < settings.NOTES_TEXT_COMPRESS_MIN_BYTES:
+        return text
+    packed = ZLIB + zlib.compress(data, ZLIB_LEVEL)
+    return packed if len(packed) < len(data) else text
+
+
+def decompress(value):
+    """Текст из хранимого значения; строки и None возвращаются как есть."""
+    if not isinstance(value, bytes):
+        return value
+    if value[:1] != ZLIB:
+        raise ValueError(f'Неизвестный формат сжатого текста: {value[:1]!r}')
+    return zlib.decompress(value[1:]).decode()
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """
+    Распаковывает хранимое значение при первом чтении атрибута.
+
+    В отличие от DeferredAttribute, дескриптор данных: иначе значение
+    из __dict__ экземпляра читалось бы в обход __get__.
+    """
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, bytes):
+            value = decompress(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+
+class CompressedTextField(models.TextField):
+    descriptor_class = CompressedTextDescriptor
+
+    def pre_save(self, model_instance, add):
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, bytes):
+            return value
+        return super().pre_save(model_instance, add)
+
+    def get_db_prep_save(self, value, connection):
+        if isinstance(value, bytes):
+            return value
+        value = super().get_db_prep_save(value, connection)
+        return value if value is None else compress(value)
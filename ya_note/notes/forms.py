@@ -1,28 +1,31 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from pytils.translit import slugify
+
+from yanote.server_timing import TimedFormMixin
 
 from .models import Note
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
 
-class NoteForm(forms.ModelForm):
+class NoteForm(TimedFormMixin, forms.ModelForm):
     """Форма для создания или обновления заметки."""
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
 
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+    def validate_unique(self):
+        """
+        Уникальность slug обеспечивает индекс: занятый slug даёт
+        IntegrityError при сохранении, и NoteFormMixin превращает его
+        в ошибку поля. Запрос exists() перед вставкой не делаем.
+        """
+        exclude = [
+            field.name for field in self.instance._meta.fields
+            if field.name not in self.fields or field.name == 'slug'
+        ]
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self.add_error(None, error)
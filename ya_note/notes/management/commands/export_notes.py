@@ -0,0 +1,75 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand
+
+from notes.fields import decompress
+from notes.models import Note
+
+from .import_notes import FORMATS, detect_format
+
+FIELDS = ('title', 'text', 'slug', 'author')
+
+
+class OutputStream:
+    """Поток поверх OutputWrapper, который не добавляет окончания строк."""
+
+    def __init__(self, output):
+        self.output = output
+
+    def write(self, text):
+        self.output.write(text, ending='')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает заметки в CSV или NDJSON в формате import_notes. '
+        'Заметки читаются из базы порциями, а не целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл для выгрузки; по умолчанию stdout.',
+        )
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--author', help='Только заметки пользователя.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, path, **options):
+        output_format = options['format'] or (
+            'ndjson' if path == '-' else detect_format(path)
+        )
+        notes = Note.objects.order_by('pk')
+        if options['author']:
+            notes = notes.filter(author__username=options['author'])
+        rows = (
+            (title, decompress(text), slug, author)
+            for title, text, slug, author in notes.values_list(
+                'title', 'text', 'slug', 'author__username'
+            ).iterator(chunk_size=options['chunk_size'])
+        )
+        if path == '-':
+            exported = self.write(
+                OutputStream(self.stdout), rows, output_format
+            )
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                exported = self.write(stream, rows, output_format)
+        self.stderr.write(f'Выгружено заметок: {exported}')
+
+    def write(self, stream, rows, output_format):
+        count = 0
+        if output_format == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(FIELDS)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+            return count
+        for row in rows:
+            stream.write(
+                json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n'
+            )
+            count += 1
+        return count
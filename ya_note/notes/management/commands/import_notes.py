@@ -0,0 +1,205 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, reset_queries, transaction
+
+from notes.models import Note
+from notes.pagination import forget_notes_count
+from notes.slugs import slugify_title
+
+FORMATS = ('csv', 'ndjson')
+
+User = get_user_model()
+
+
+def iter_csv(stream):
+    """Строки CSV с заголовком title,text[,slug][,author]."""
+    yield from csv.DictReader(stream)
+
+
+def iter_ndjson(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                raise CommandError(f'Строка {line_number}: {error}')
+
+
+def detect_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'ndjson'
+
+
+def batched(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+class SlugAllocator:
+    """
+    Свободные slug в памяти: все занятые slug читаются один раз, дальше
+    запросов нет. Для основ с суффиксами помнится последний номер,
+    поэтому тысячи заметок с одним заголовком не перебирают slug-2,
+    slug-3… заново.
+    """
+
+    def __init__(self):
+        self.max_length = Note._meta.get_field('slug').max_length
+        self.taken = set()
+        self.next_number = {}
+        self.last_pk = 0
+        self.refresh()
+
+    def refresh(self):
+        """Дочитывает заметки, созданные после прошлого чтения."""
+        rows = Note.objects.filter(pk__gt=self.last_pk).values_list(
+            'pk', 'slug'
+        ).order_by('pk')
+        for pk, slug in rows.iterator(chunk_size=10_000):
+            self.taken.add(slug)
+            self.last_pk = pk
+
+    def allocate(self, slug, title):
+        """
+        Возвращает свободный slug: явный, если он не занят. Основа
+        укорачивается так, чтобы вместе с суффиксом уместиться
+        в max_length.
+        """
+        if slug and slug not in self.taken:
+            self.taken.add(slug)
+            return slug
+        base = slug or slugify_title(title, self.max_length)
+        number = self.next_number.get(base, 1)
+        candidate = base
+        while candidate in self.taken:
+            number += 1
+            suffix = f'-{number}'
+            candidate = base[:self.max_length - len(suffix)] + suffix
+        if number > 1:
+            self.next_number[base] = number
+        self.taken.add(candidate)
+        return candidate
+
+    def release(self, slugs):
+        self.taken.difference_update(slugs)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует заметки из CSV или NDJSON с полями title, text '
+        'и необязательными slug и author. Занятые и пустые slug '
+        'заменяются свободными, некорректная заметка останавливает импорт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл CSV или NDJSON.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='По умолчанию определяется по расширению файла.',
+        )
+        parser.add_argument(
+            '--author',
+            help='Имя пользователя-автора для всех заметок; иначе '
+                 'берётся из поля author.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Сколько заметок вставлять в одной транзакции.',
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        self.authors = {}
+        self.default_author = (
+            self.author_id(options['author']) if options['author'] else None
+        )
+        self.allocator = SlugAllocator()
+        self.created = self.renamed = 0
+        started = time.perf_counter()
+        reader = iter_csv if (
+            options['format'] or detect_format(path)
+        ) == 'csv' else iter_ndjson
+        with open(path, encoding='utf-8', newline='') as stream:
+            for batch in batched(reader(stream), batch_size):
+                self.import_batch(batch)
+                # При DEBUG=True Django копит текст запросов в памяти.
+                reset_queries()
+                if options['verbosity'] > 1:
+                    self.report(started, self.stderr)
+        self.report(started, self.stdout)
+
+    def author_id(self, username):
+        if username not in self.authors:
+            try:
+                self.authors[username] = User.objects.values_list(
+                    'pk', flat=True
+                ).get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {username!r} не найден.')
+        return self.authors[username]
+
+    def to_note(self, row):
+        try:
+            title, text = row['title'], row['text']
+            author = row.get('author')
+        except (KeyError, TypeError, AttributeError) as error:
+            raise CommandError(f'Некорректная заметка {row!r}: {error}')
+        if not isinstance(title, str) or not isinstance(text, str):
+            raise CommandError(f'Некорректная заметка {row!r}.')
+        if self.default_author is None and not author:
+            raise CommandError(f'У заметки {row!r} не указан author.')
+        note = Note(
+            title=title,
+            text=text,
+            slug=(row.get('slug') or '').strip(),
+            author_id=self.default_author or self.author_id(author),
+        )
+        # Те же проверки полей, что у формы: slug из букв, цифр, «-»
+        # и «_» не длиннее max_length, иначе адрес заметки не строится.
+        try:
+            note.clean_fields(exclude=['author'])
+        except ValidationError as error:
+            raise CommandError(
+                f'Некорректная заметка {row!r}: {error.message_dict}'
+            )
+        return note
+
+    def import_batch(self, rows):
+        notes = [self.to_note(row) for row in rows]
+        wanted = [note.slug for note in notes]
+        try:
+            self.insert(notes, wanted)
+        except IntegrityError:
+            # Slug заняла заметка, созданная после чтения занятых slug.
+            self.allocator.release(note.slug for note in notes)
+            self.allocator.refresh()
+            self.insert(notes, wanted)
+        # bulk_create не отправляет post_save.
+        for author_id in {note.author_id for note in notes}:
+            forget_notes_count(author_id)
+        self.created += len(notes)
+        self.renamed += sum(
+            1 for note, slug in zip(notes, wanted)
+            if slug and note.slug != slug
+        )
+
+    def insert(self, notes, wanted):
+        for note, slug in zip(notes, wanted):
+            note.slug = self.allocator.allocate(slug, note.title)
+        with transaction.atomic():
+            Note.objects.bulk_create(notes)
+
+    def report(self, started, output):
+        elapsed = time.perf_counter() - started
+        rate = self.created / elapsed if elapsed else 0
+        output.write(
+            f'Создано: {self.created}, slug заменён: {self.renamed}; '
+            f'{elapsed:.1f} с ({rate:.0f} заметок/с)'
+        )
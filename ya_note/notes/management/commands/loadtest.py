@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from notes.models import Note
+from yanote.loadtest import LoadTestCommand, Scenario, Visitor
+
+
+class Command(LoadTestCommand):
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument(
+            '--notes', type=int, default=50, help='Заметок у пользователя'
+        )
+
+    def seed(self, **options):
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(username=f'loadtest{index}')
+            for index in range(options['users'])
+        )
+        users = list(User.objects.order_by('pk'))
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {user.pk}-{index}',
+                text='Текст заметки',
+                slug=f'note-{user.pk}-{index}',
+                author=user,
+            )
+            for user in users
+            for index in range(options['notes'])
+        )
+        own_notes = {user.pk: [] for user in users}
+        for slug, author_id in Note.objects.values_list('slug', 'author_id'):
+            own_notes[author_id].append(slug)
+        visitors = [
+            Visitor.login(user, notes=own_notes[user.pk]) for user in users
+        ]
+        return self.scenarios(), visitors
+
+    def scenarios(self):
+        def fixed(name):
+            return lambda rng, visitor: reverse(name)
+
+        def own_note(name):
+            def path(rng, visitor):
+                slug = rng.choice(visitor.objects['notes'])
+                return reverse(name, args=(slug,))
+            return path
+
+        def new_note(rng, visitor):
+            return {
+                'title': f'Новая заметка {rng.getrandbits(64):x}',
+                'text': 'Текст заметки',
+            }
+
+        def edited_note(rng, visitor):
+            return {
+                'title': 'Исправленная заметка',
+                'text': 'Новый текст',
+                'slug': rng.choice(visitor.objects['notes']),
+            }
+
+        return [
+            Scenario('notes:home', 15, fixed('notes:home')),
+            Scenario('notes:home', 5, fixed('notes:home'), user=True),
+            Scenario('notes:list', 25, fixed('notes:list'), user=True),
+            Scenario('notes:detail', 25, own_note('notes:detail'), user=True),
+            Scenario('notes:add', 5, fixed('notes:add'), user=True),
+            Scenario(
+                'notes:add', 5, fixed('notes:add'), method='POST',
+                user=True, data=new_note, status=302,
+            ),
+            Scenario('notes:edit', 4, own_note('notes:edit'), user=True),
+            Scenario(
+                'notes:edit', 3, own_note('notes:edit'), method='POST',
+                user=True, data=edited_note, status=302,
+            ),
+            Scenario('notes:delete', 2, own_note('notes:delete'), user=True),
+            Scenario('notes:success', 2, fixed('notes:success'), user=True),
+            Scenario('notes:login', 2, fixed('notes:login')),
+            Scenario('users:login', 2, fixed('users:login')),
+            Scenario('users:signup', 1, fixed('users:signup')),
+        ]
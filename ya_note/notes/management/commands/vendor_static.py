@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from yanote.static_assets import download
+
+
+class Command(BaseCommand):
+    help = (
+        'Скачивает стороннюю статику из VENDORED_STATIC в static/ '
+        'и проверяет SRI-хеши.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Скачать заново уже сохранённые файлы',
+        )
+
+    def handle(self, *args, **options):
+        directory = settings.STATICFILES_DIRS[0]
+        for name, (url, integrity) in settings.VENDORED_STATIC.items():
+            path = directory / name
+            if path.exists() and not options['force']:
+                self.stdout.write(f'{name}: уже есть')
+                continue
+            try:
+                data = download(url, integrity)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'{name}: {error}')
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            self.stdout.write(f'{name}: {len(data)} байт')
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Индекс FTS5 с внешним содержимым: тексты лежат только в notes_note.
+# Колонка author_id индексируется как обычный токен, и поиск ограничен
+# автором прямо в MATCH: FTS5 пересекает список заметок автора со
+# списками слов и не перебирает заметки других пользователей.
+# prefix='2 3 4 5' хранит префиксы из 2–5 символов: запрос «моло*»
+# читает один список, как обычное слово, а не сливает списки всех слов
+# на «моло» по всей базе.
+CREATE_SEARCH = [
+    """
+    CREATE VIRTUAL TABLE notes_search USING fts5(
+        author_id, title, text,
+        content='notes_note', content_rowid='id',
+        tokenize='unicode61', prefix='2 3 4 5'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_search_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_search(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_search_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_search(notes_search, rowid, author_id, title, text)
+        VALUES ('delete', old.id, old.author_id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_search_update AFTER UPDATE OF author_id, title, text
+    ON notes_note BEGIN
+        INSERT INTO notes_search(notes_search, rowid, author_id, title, text)
+        VALUES ('delete', old.id, old.author_id, old.title, old.text);
+        INSERT INTO notes_search(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO notes_search(notes_search) VALUES ('rebuild')",
+]
+
+DROP_SEARCH = [
+    'DROP TRIGGER notes_search_update',
+    'DROP TRIGGER notes_search_delete',
+    'DROP TRIGGER notes_search_insert',
+    'DROP TABLE notes_search',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SEARCH, DROP_SEARCH),
+    ]
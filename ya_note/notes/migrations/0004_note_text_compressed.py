@@ -0,0 +1,114 @@
+from importlib import import_module
+
+from django.db import migrations
+
+import notes.fields
+from notes.fields import compress
+
+BATCH_SIZE = 1000
+
+search_0003 = import_module('notes.migrations.0003_note_search')
+
+# Сжатый текст — BLOB, и индекс должен видеть распакованный. Триггеры
+# передают note_text(text), а highlight() и snippet() читают тексты
+# из представления notes_search_content, а не из notes_note напрямую.
+# note_text() регистрирует notes/signals.py.
+#
+# Встроенной распаковки zlib в SQLite нет, поэтому note_text() есть
+# только в соединениях, которые открывает Django. Из других программ
+# (manage.py dbshell, sqlite3, скрипты восстановления из SQL-дампа)
+# INSERT, UPDATE и DELETE в notes_note и чтение notes_search_content
+# падают с «no such function: note_text». Чтение notes_note работает
+# везде, копии через .backup и VACUUM INTO триггеров не вызывают.
+# Стороннему соединению функцию регистрирует
+# conn.create_function('note_text', 1, notes.fields.decompress).
+CREATE_SEARCH = [
+    """
+    CREATE VIEW notes_search_content AS
+    SELECT id, author_id, title, note_text(text) AS text FROM notes_note
+    """,
+    """
+    CREATE VIRTUAL TABLE notes_search USING fts5(
+        author_id, title, text,
+        content='notes_search_content', content_rowid='id',
+        tokenize='unicode61', prefix='2 3 4 5'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_search_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_search(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, note_text(new.text));
+    END
+    """,
+    """
+    CREATE TRIGGER notes_search_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_search(notes_search, rowid, author_id, title, text)
+        VALUES ('delete', old.id, old.author_id, old.title,
+                note_text(old.text));
+    END
+    """,
+    """
+    CREATE TRIGGER notes_search_update AFTER UPDATE OF author_id, title, text
+    ON notes_note BEGIN
+        INSERT INTO notes_search(notes_search, rowid, author_id, title, text)
+        VALUES ('delete', old.id, old.author_id, old.title,
+                note_text(old.text));
+        INSERT INTO notes_search(rowid, author_id, title, text)
+        VALUES (new.id, new.author_id, new.title, note_text(new.text));
+    END
+    """,
+    "INSERT INTO notes_search(notes_search) VALUES ('rebuild')",
+]
+
+DROP_SEARCH = search_0003.DROP_SEARCH + ['DROP VIEW notes_search_content']
+
+
+def compress_texts(apps, schema_editor):
+    Note = apps.get_model('notes', 'Note')
+    last_pk = 0
+    while batch := list(
+        Note.objects.filter(pk__gt=last_pk).order_by('pk')
+        .values_list('pk', 'text')[:BATCH_SIZE]
+    ):
+        stored = (
+            (pk, compress(text)) for pk, text in batch
+            if isinstance(text, str)
+        )
+        # Байты CompressedTextField записывает как есть.
+        notes = [
+            Note(pk=pk, text=value) for pk, value in stored
+            if isinstance(value, bytes)
+        ]
+        Note.objects.bulk_update(notes, ['text'])
+        last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_search'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            search_0003.DROP_SEARCH + CREATE_SEARCH,
+            DROP_SEARCH + search_0003.CREATE_SEARCH,
+        ),
+        # Колонка остаётся text: SQLite хранит в ней и BLOB. AlterField
+        # пересоздал бы таблицу и потерял триггеры индекса.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='note',
+                    name='text',
+                    field=notes.fields.CompressedTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+                ),
+            ],
+        ),
+        migrations.RunPython(compress_texts, migrations.RunPython.noop),
+        migrations.RunSQL(
+            migrations.RunSQL.noop,
+            "UPDATE notes_note SET text = note_text(text) "
+            "WHERE typeof(text) = 'blob'",
+        ),
+    ]
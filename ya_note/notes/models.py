@@ -1,6 +1,11 @@
 from django.conf import settings
-from django.db import models
-from pytils.translit import slugify
+from django.db import IntegrityError, models, transaction
+
+from .fields import CompressedTextField
+from .slugs import free_slug, slugify_title
+
+# Сколько раз выбирать slug заново, если его заняла параллельная заметка.
+SLUG_ATTEMPTS = 5
 
 
 class Note(models.Model):
@@ -10,7 +15,8 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    # Большие тексты хранятся сжатыми, см. notes/fields.py.
+    text = CompressedTextField(
         'Текст',
         help_text='Добавьте подробностей'
     )
@@ -27,11 +33,39 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            # Keyset-пагинация списка заметок, см. notes/pagination.py.
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Пустой slug выбирается из заголовка, см. notes/slugs.py.
+        Занятый явный slug приводит к IntegrityError.
+        """
+        if self.slug:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+            return
+        base = slugify_title(
+            self.title, self._meta.get_field('slug').max_length
+        )
+        others = Note.objects.all()
+        if self.pk is not None:
+            others = others.exclude(pk=self.pk)
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    self.slug = free_slug(others, base)
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Повторяем, только если slug успела занять другая заметка.
+                taken = others.filter(slug=self.slug).exists()
+                self.slug = ''
+                if attempt == SLUG_ATTEMPTS or not taken:
+                    raise
@@ -0,0 +1,120 @@
+"""
+Курсорная (keyset) пагинация списка заметок.
+
+Заметки пользователя упорядочены по id, курсор — id крайней заметки
+страницы. Соседние страницы выбираются условием author_id = ? AND
+id > ? по индексу (author, id), без OFFSET, поэтому сотая тысяча
+заметок открывается так же быстро, как первая.
+
+Общее число заметок не считается COUNT(*) на каждой странице:
+оно кэшируется на автора и сбрасывается сигналами notes/signals.py
+после фиксации транзакции. Если все заметки поместились на одну
+страницу, число известно и без запроса.
+
+Кэш процесса (LocMemCache) для счётчика не годится: заметка, созданная
+в одном воркере, не сбросит число в остальных. Поэтому
+NOTES_COUNT_CACHE по умолчанию включён только с общим кэшем, а без
+него заметки считаются не дальше NOTES_COUNT_LIMIT: запрос читает
+не больше NOTES_COUNT_LIMIT + 1 строк индекса, а на странице
+выводится «1000+».
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Диапазон INTEGER в SQLite: большее число не привязать к запросу.
+MIN_ID = -2 ** 63
+MAX_ID = 2 ** 63 - 1
+
+
+def count_key(author_id):
+    return f'notes-count:{author_id}'
+
+
+def forget_notes_count(author_id):
+    transaction.on_commit(lambda: cache.delete(count_key(author_id)))
+
+
+def decode_cursor(cursor):
+    """Возвращает id из курсора или None для некорректного курсора."""
+    try:
+        pk = int(cursor)
+    except (TypeError, ValueError):
+        return None
+    if not MIN_ID <= pk <= MAX_ID:
+        return None
+    return pk
+
+
+class NotePage:
+    """Страница заметок и курсоры соседних страниц."""
+
+    def __init__(self, object_list, has_previous, has_next,
+                 complete=False):
+        self.object_list = object_list
+        self.has_previous = has_previous and bool(object_list)
+        self.has_next = has_next and bool(object_list)
+        # На странице все заметки автора.
+        self.complete = complete
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def previous_cursor(self):
+        return self.object_list[0].pk if self.has_previous else ''
+
+    @property
+    def next_cursor(self):
+        return self.object_list[-1].pk if self.has_next else ''
+
+
+def get_note_page(queryset, params, per_page=None):
+    """
+    Выбирает страницу заметок по параметрам запроса.
+
+    after — заметки с id больше курсора, before — с id меньше.
+    Без параметров возвращается первая страница.
+    """
+    per_page = per_page or settings.NOTES_PER_PAGE
+    after = decode_cursor(params.get('after'))
+    if after is not None:
+        notes = list(
+            queryset.filter(pk__gt=after).order_by('pk')[:per_page + 1]
+        )
+        return NotePage(notes[:per_page], True, len(notes) > per_page)
+    before = decode_cursor(params.get('before'))
+    if before is not None:
+        notes = list(
+            queryset.filter(pk__lt=before).order_by('-pk')[:per_page + 1]
+        )
+        return NotePage(
+            notes[per_page - 1::-1], len(notes) > per_page, True
+        )
+    notes = list(queryset.order_by('pk')[:per_page + 1])
+    has_next = len(notes) > per_page
+    return NotePage(notes[:per_page], False, has_next, complete=not has_next)
+
+
+def notes_count(queryset, author_id, page):
+    """
+    Число заметок автора: из страницы, из кэша или COUNT(*).
+
+    Без кэша — ограниченный COUNT(*): больше NOTES_COUNT_LIMIT заметок
+    выводится строкой вида «1000+».
+    """
+    if page.complete:
+        return len(page)
+    if not settings.NOTES_COUNT_CACHE:
+        limit = settings.NOTES_COUNT_LIMIT
+        count = queryset.order_by()[:limit + 1].count()
+        return f'{limit}+' if count > limit else count
+    key = count_key(author_id)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.NOTES_COUNT_CACHE_TIMEOUT)
+    return count
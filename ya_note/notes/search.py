@@ -0,0 +1,97 @@
+"""
+Полнотекстовый поиск по заметкам пользователя.
+
+Индекс — виртуальная таблица FTS5 notes_search с внешним содержимым
+(content='notes_search_content'), её поддерживают триггеры из миграции
+0004: создание, редактирование и удаление заметки, в том числе через
+import_notes, сразу видны в поиске. Текст может храниться сжатым
+(notes/fields.py), поэтому представление notes_search_content
+и триггеры читают его через SQL-функцию note_text(). Её регистрирует
+notes/signals.py только на соединениях Django: из dbshell и других
+программ запись в notes_note падает с «no such function: note_text»,
+подробности — в миграции 0004.
+
+Каждый запрос ограничен автором в самом выражении MATCH
+(author_id : "42"), поэтому FTS5 находит только заметки этого
+пользователя, а условие на notes_note.author_id лишь страхует.
+Слова запроса ищутся как префиксы: «замет» находит «заметка»
+и «заметками». Сначала идут заметки, где все слова есть в заголовке,
+затем остальные, внутри — от новых к старым. bm25 здесь не подходит:
+для IDF он читает списки слов по всей базе, и на частых словах запрос
+одного автора замедлялся с ростом числа чужих заметок.
+"""
+import re
+
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+WORD = re.compile(r'\w+')
+# Длины префиксов в индексе, prefix='2 3 4 5' в миграциях 0003 и 0004.
+MIN_PREFIX = 2
+# Управляющие символы не встречаются в тексте заметок; ими размечаем
+# совпадения, а в <mark> превращаем уже после экранирования.
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+
+SEARCH_SQL = f"""
+    SELECT notes_note.id, notes_note.slug, notes_note.title,
+           highlight(notes_search, 1, %s, %s) AS title_html,
+           snippet(notes_search, 2, %s, %s, '…', {SNIPPET_TOKENS})
+               AS snippet_html
+    FROM notes_search
+    JOIN notes_note ON notes_note.id = notes_search.rowid
+    WHERE notes_search MATCH %s AND notes_note.author_id = %s
+    ORDER BY notes_search.rowid IN (
+        SELECT rowid FROM notes_search WHERE notes_search MATCH %s
+    ) DESC, notes_search.rowid DESC
+    LIMIT %s
+"""
+
+
+def term(word):
+    """
+    Слово — префиксом, числа, слова с цифрами и однобуквенные слова —
+    целиком: префиксы «2020*» и «в*» разворачиваются в тысячи терминов
+    индекса, которых нет в индексе префиксов.
+    """
+    if len(word) < MIN_PREFIX or not word.isalpha():
+        return f'"{word.lower()}"'
+    return f'"{word.lower()}"*'
+
+
+def build_match(author_id, terms, columns='{title text}'):
+    """
+    Выражение MATCH: все слова в колонках columns заметок автора.
+    Слова берутся регулярным выражением и заключаются в кавычки,
+    поэтому синтаксис FTS5 из запроса не проходит.
+    """
+    return f'author_id : "{int(author_id)}" AND {columns} : ({terms})'
+
+
+def highlight(fragment):
+    return mark_safe(
+        escape(fragment)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def search_notes(author_id, query, limit=None):
+    """Заметки автора по запросу с размеченными заголовком и фрагментом."""
+    terms = ' '.join(term(word) for word in WORD.findall(query))
+    if not terms:
+        return []
+    limit = limit or settings.NOTES_SEARCH_RESULTS
+    results = list(Note.objects.raw(
+        SEARCH_SQL,
+        [MARK_START, MARK_END, MARK_START, MARK_END,
+         build_match(author_id, terms), author_id,
+         build_match(author_id, terms, 'title'), limit],
+    ))
+    for note in results:
+        note.title_html = highlight(note.title_html)
+        note.snippet_html = highlight(note.snippet_html)
+    return results
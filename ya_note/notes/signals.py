@@ -0,0 +1,34 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .fields import decompress
+from .models import Note
+from .pagination import forget_notes_count
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, **kwargs):
+    if created:
+        forget_notes_count(instance.author_id)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    forget_notes_count(instance.author_id)
+
+
+@receiver(connection_created)
+def register_note_text(sender, connection, **kwargs):
+    """
+    Функция note_text(text) распаковывает сжатый текст заметки в SQL:
+    через неё индекс notes_search читает тексты, см. миграцию 0004.
+
+    Соединения не из Django её не имеют, и триггеры notes_note в них
+    не выполняются: писать в notes_note из dbshell или внешних скриптов
+    можно, только зарегистрировав функцию так же.
+    """
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            'note_text', 1, decompress, deterministic=True
+        )
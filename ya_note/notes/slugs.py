@@ -0,0 +1,51 @@
+"""
+Выбор свободного slug для заметки.
+
+Если slug занят, к нему добавляется суффикс: slug, slug-2, slug-3…
+Занятые варианты читаются одним запросом по диапазону уникального
+индекса: slug >= base AND slug < base + '.'. Среди символов slug
+меньше точки только дефис, поэтому в диапазон попадают ровно base
+и base-….
+
+Проверка перед вставкой не защищает от параллельной заметки с тем же
+заголовком, поэтому Note.save() полагается на уникальный индекс
+и при IntegrityError выбирает slug заново.
+"""
+import re
+from functools import lru_cache
+
+from pytils.translit import slugify
+
+# Сколько символов slug оставить под суффикс вида -99999.
+SUFFIX_RESERVE = 6
+# Основа для заголовков, в которых нет ни одной буквы или цифры.
+DEFAULT_BASE = 'note'
+
+
+@lru_cache(maxsize=1024)
+def slugify_title(title, max_length):
+    """
+    Основа slug из заголовка. Длинная основа укорачивается, чтобы
+    суффикс поместился в max_length.
+    """
+    base = slugify(title)[:max_length]
+    if len(base) > max_length - SUFFIX_RESERVE:
+        base = base[:max_length - SUFFIX_RESERVE].rstrip('-')
+    return base or DEFAULT_BASE
+
+
+def free_slug(queryset, base):
+    """Наименьший свободный из base, base-2, base-3… за один запрос."""
+    taken = queryset.filter(
+        slug__gte=base, slug__lt=base + '.'
+    ).values_list('slug', flat=True)
+    suffix = re.compile(rf'^{re.escape(base)}(?:-(\d+))?$')
+    numbers = set()
+    for slug in taken:
+        match = suffix.match(slug)
+        if match:
+            numbers.add(int(match[1] or 1))
+    number = 1
+    while number in numbers:
+        number += 1
+    return base if number == 1 else f'{base}-{number}'
@@ -0,0 +1,10 @@
+from django import template
+
+from yanote import static_assets
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendored_stylesheet(name):
+    return static_assets.vendored_stylesheet(name)
@@ -1,5 +1,8 @@
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notes.forms import NoteForm
@@ -58,3 +61,139 @@ class NoteContentTests(TestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+
+@override_settings(NOTES_PER_PAGE=3)
+class NotesListPaginationTests(TestCase):
+    """Курсорная пагинация списка заметок, notes/pagination.py."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.client.force_login(self.author)
+        self.notes = [
+            Note.objects.create(
+                title=f'Заметка {index}', text='Длинный текст',
+                author=self.author,
+            )
+            for index in range(7)
+        ]
+        Note.objects.create(
+            title='Чужая', text='Текст',
+            author=User.objects.create_user(username='other'),
+        )
+
+    def get_page(self, **params):
+        response = self.client.get(reverse('notes:list'), params)
+        return response, list(response.context['object_list'])
+
+    def test_pages_follow_cursors(self):
+        response, first = self.get_page()
+        self.assertEqual(first, self.notes[:3])
+        page = response.context['page']
+        response, second = self.get_page(after=page.next_cursor)
+        self.assertEqual(second, self.notes[3:6])
+        page = response.context['page']
+        response, third = self.get_page(after=page.next_cursor)
+        self.assertEqual(third, self.notes[6:])
+        self.assertFalse(response.context['page'].has_next)
+        page = response.context['page']
+        _, back = self.get_page(before=page.previous_cursor)
+        self.assertEqual(back, self.notes[3:6])
+        _, fallback = self.get_page(after='мусор')
+        self.assertEqual(fallback, self.notes[:3])
+
+    def test_oversized_cursor_opens_first_page(self):
+        for params in ({'after': 10 ** 25}, {'before': -10 ** 25}):
+            with self.subTest(**params):
+                response, notes = self.get_page(**params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(notes, self.notes[:3])
+
+    @override_settings(NOTES_COUNT_CACHE=True)
+    def test_list_query_skips_text_and_count_is_cached(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.context['notes_count'], 7)
+        statements = [query['sql'] for query in queries]
+        select = next(sql for sql in statements if 'LIMIT' in sql)
+        self.assertNotIn('"notes_note"."text"', select)
+        self.assertEqual(sum('COUNT(*)' in sql for sql in statements), 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('notes:list'), {'after': 3})
+        self.assertFalse(
+            [query for query in queries if 'COUNT(*)' in query['sql']]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Note.objects.create(title='Новая', text='', author=self.author)
+        response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.context['notes_count'], 8)
+
+    def test_count_is_not_cached_in_process_local_cache(self):
+        self.client.get(reverse('notes:list'), {'after': 3})
+        Note.objects.create(title='Новая', text='', author=self.author)
+        response = self.client.get(reverse('notes:list'), {'after': 3})
+        self.assertEqual(response.context['notes_count'], 8)
+
+    @override_settings(NOTES_COUNT_LIMIT=5)
+    def test_count_without_cache_is_bounded(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('notes:list'))
+        self.assertEqual(response.context['notes_count'], '5+')
+        self.assertContains(response, 'Всего заметок: 5+')
+        count = next(
+            query['sql'] for query in queries if 'COUNT(*)' in query['sql']
+        )
+        self.assertIn('LIMIT 6', count)
+
+
+class NoteSearchTests(TestCase):
+    """Полнотекстовый поиск по своим заметкам, notes/search.py."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.client.force_login(self.author)
+        self.in_title = Note.objects.create(
+            title='Молоко', text='Проверить срок годности',
+            author=self.author,
+        )
+        self.in_text = Note.objects.create(
+            title='Покупки', text='Купить молоко и хлеб',
+            author=self.author,
+        )
+        self.foreign = Note.objects.create(
+            title='Молоко соседа', text='Молоко',
+            author=User.objects.create_user(username='other'),
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse('notes:search'), {'q': query})
+        return list(response.context['results'])
+
+    def test_title_match_ranks_first_and_other_authors_hidden(self):
+        self.assertEqual(self.search('молоко'), [self.in_title, self.in_text])
+
+    def test_prefix_match_and_highlight(self):
+        results = self.search('молок')
+        self.assertEqual(len(results), 2)
+        self.assertIn('<mark>Молоко</mark>', results[0].title_html)
+        self.assertIn('<mark>молоко</mark>', results[1].snippet_html)
+        # Однобуквенное слово ищется целиком, а не как префикс.
+        self.assertEqual(self.search('м'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.in_text.text = 'Купить сыр'
+        self.in_text.save()
+        self.assertEqual(self.search('сыр'), [self.in_text])
+        self.assertEqual(self.search('молоко'), [self.in_title])
+        self.in_title.delete()
+        self.assertEqual(self.search('молоко'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        for query in ('"', 'молоко OR', 'author_id : 1', '*', ''):
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse('notes:search'), {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search('title : молоко'), [])
@@ -1,11 +1,23 @@
+import json
+import tempfile
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notes.forms import WARNING
+from notes import slugs
 from notes.models import Note
+from notes.search import search_notes
 
 from pytils.translit import slugify
 
@@ -120,6 +132,48 @@ class NoteTestCase(TestCase):
         expected_slug = slugify(TEST_TITLE)
         self.assertEqual(new_note.slug, expected_slug)
 
+    def test_empty_slug_gets_free_suffix(self):
+        """
+        Заметки с одинаковым заголовком без slug получают slug, slug-2,
+        slug-3, а занятые варианты читаются одним запросом.
+        """
+        url = reverse('notes:add')
+        self.form_data.pop('slug')
+        base = slugify(TEST_TITLE)
+        for expected in (base, f'{base}-2', f'{base}-3'):
+            with self.subTest(expected=expected):
+                with CaptureQueriesContext(connection) as queries:
+                    self.author_client.post(url, data=self.form_data)
+                self.assertEqual(Note.objects.latest('id').slug, expected)
+                selects = [
+                    query['sql'] for query in queries
+                    if 'FROM "notes_note"' in query['sql']
+                ]
+                self.assertEqual(len(selects), 1)
+
+    def test_slug_taken_concurrently_is_chosen_again(self):
+        """
+        Если slug заняли между выбором и вставкой, срабатывает
+        уникальный индекс и slug выбирается заново.
+        """
+        free_slug = slugs.free_slug
+        stale = iter([EXISTING_SLUG])
+
+        def racing_free_slug(queryset, base):
+            return next(stale, None) or free_slug(queryset, base)
+
+        note = Note(title='Existing slug', text=TEST_TEXT, author=self.author)
+        with mock.patch('notes.models.free_slug', racing_free_slug):
+            note.save()
+        self.assertEqual(note.slug, f'{EXISTING_SLUG}-2')
+
+    def test_long_title_leaves_room_for_suffix(self):
+        title = 'a' * 100
+        first = Note.objects.create(title=title, text='', author=self.author)
+        second = Note.objects.create(title=title, text='', author=self.author)
+        self.assertEqual(len(first.slug), 100 - slugs.SUFFIX_RESERVE)
+        self.assertEqual(second.slug, first.slug + '-2')
+
     def test_author_can_edit_note(self):
         """
         Тест на возможность автора редактировать свою заметку.
@@ -175,3 +229,193 @@ class NoteTestCase(TestCase):
         response = self.not_author_client.post(url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), 1)
+
+
+class ImportExportTestCase(TestCase):
+    """Команды import_notes и export_notes."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.author = User.objects.create_user(username='author')
+        Note.objects.create(
+            title='Заметка', text='Текст', slug='zametka', author=self.author
+        )
+
+    def call(self, name, *args, **options):
+        output = StringIO()
+        call_command(name, *args, stdout=output, stderr=output, **options)
+        return output.getvalue()
+
+    def test_import_resolves_slug_conflicts(self):
+        feed = self.directory / 'feed.ndjson'
+        rows = [
+            {'title': 'Заметка', 'text': 'Первая'},
+            {'title': 'Заметка', 'text': 'Вторая'},
+            {'title': 'Другая', 'text': 'С занятым slug', 'slug': 'zametka'},
+            {'title': 'Своя', 'text': 'Со свободным slug', 'slug': 'svoya-1'},
+        ]
+        feed.write_text(
+            '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows),
+            encoding='utf-8',
+        )
+        output = self.call(
+            'import_notes', str(feed), author='author', batch_size=3
+        )
+        self.assertEqual(
+            list(Note.objects.order_by('pk').values_list('slug', flat=True)),
+            ['zametka', 'zametka-2', 'zametka-3', 'zametka-4', 'svoya-1'],
+        )
+        self.assertIn('Создано: 4, slug заменён: 1', output)
+
+    def test_export_then_import_round_trip(self):
+        other = User.objects.create_user(username='other')
+        Note.objects.create(
+            title='Чужая, с "кавычками"', text='Строка\nвторая',
+            author=other,
+        )
+        Note.objects.create(
+            title='Большая', text='Строка лога\n' * 1000, author=other
+        )
+        expected = list(Note.objects.order_by('pk').values_list(
+            'title', 'text', 'slug', 'author__username'
+        ))
+        export = self.directory / 'notes.csv'
+        self.call('export_notes', str(export))
+        Note.objects.all().delete()
+        self.call('import_notes', str(export))
+        self.assertEqual(
+            list(Note.objects.order_by('pk').values_list(
+                'title', 'text', 'slug', 'author__username'
+            )),
+            expected,
+        )
+
+    def test_import_rejects_invalid_slug(self):
+        feed = self.directory / 'feed.ndjson'
+        rows = [
+            {'title': 'Первая', 'text': 'Текст', 'slug': 'pervaya'},
+            {'title': 'Вторая', 'text': 'Текст', 'slug': 'hello world/2'},
+            {'title': 'Третья', 'text': 'Текст', 'slug': 'a' * 101},
+        ]
+        for row in rows[1:]:
+            with self.subTest(slug=row['slug']):
+                feed.write_text(
+                    json.dumps(rows[0]) + '\n' + json.dumps(row),
+                    encoding='utf-8',
+                )
+                with self.assertRaisesMessage(CommandError, 'slug'):
+                    self.call('import_notes', str(feed), author='author')
+                self.assertFalse(Note.objects.filter(slug='pervaya').exists())
+
+    def test_import_suffix_fits_max_length(self):
+        long_slug = 'a' * 100
+        Note.objects.create(
+            title='Длинная', text='Текст', slug=long_slug, author=self.author
+        )
+        feed = self.directory / 'feed.csv'
+        feed.write_text(f'title,text,slug\nКопия,Текст,{long_slug}\n')
+        self.call('import_notes', str(feed), author='author')
+        note = Note.objects.get(title='Копия')
+        self.assertEqual(note.slug, 'a' * 98 + '-2')
+        self.client.force_login(self.author)
+        self.assertEqual(
+            self.client.get(reverse('notes:list')).status_code, HTTPStatus.OK
+        )
+
+    def test_export_to_stdout(self):
+        output = StringIO()
+        call_command('export_notes', stdout=output, stderr=StringIO())
+        lines = output.getvalue().splitlines()
+        self.assertEqual([json.loads(line)['slug'] for line in lines],
+                         ['zametka'])
+        output = StringIO()
+        call_command('export_notes', format='csv', stdout=output,
+                     stderr=StringIO())
+        self.assertEqual(output.getvalue().splitlines()[0],
+                         'title,text,slug,author')
+
+    def test_import_unknown_author(self):
+        feed = self.directory / 'feed.csv'
+        feed.write_text('title,text,author\nЗаметка,Текст,nobody\n')
+        with self.assertRaisesMessage(CommandError, 'nobody'):
+            self.call('import_notes', str(feed))
+
+
+@override_settings(NOTES_TEXT_COMPRESS_MIN_BYTES=100)
+class CompressedTextTestCase(TestCase):
+    """Сжатие больших текстов заметок, notes/fields.py."""
+
+    LARGE_TEXT = 'Строка журнала с ошибкой\n' * 100
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.large = Note.objects.create(
+            title='Журнал', text=self.LARGE_TEXT, author=self.author
+        )
+        self.small = Note.objects.create(
+            title='Короткая', text='Короткий текст', author=self.author
+        )
+
+    def stored_types(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT slug, typeof(text) FROM notes_note ORDER BY id'
+            )
+            return cursor.fetchall()
+
+    def test_large_text_is_stored_compressed(self):
+        self.assertEqual(
+            self.stored_types(),
+            [(self.large.slug, 'blob'), (self.small.slug, 'text')],
+        )
+        self.assertEqual(
+            Note.objects.get(pk=self.large.pk).text, self.LARGE_TEXT
+        )
+
+    def test_text_is_decompressed_on_access(self):
+        note = Note.objects.get(pk=self.large.pk)
+        self.assertIsInstance(note.__dict__['text'], bytes)
+        # Сохранение без обращения к тексту не распаковывает его.
+        note.title = 'Новый заголовок'
+        note.save()
+        self.assertIsInstance(note.__dict__['text'], bytes)
+        self.assertEqual(note.text, self.LARGE_TEXT)
+        self.assertIsInstance(note.__dict__['text'], str)
+        note.text = 'Теперь коротко'
+        note.save()
+        self.assertEqual(self.stored_types()[0], (note.slug, 'text'))
+
+    def test_edit_page_and_search_see_plain_text(self):
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('notes:edit', args=(self.large.slug,))
+        )
+        self.assertEqual(
+            response.context['form'].initial['text'], self.LARGE_TEXT
+        )
+        results = search_notes(self.author.pk, 'ошибк')
+        self.assertEqual(results, [self.large])
+        self.assertIn('<mark>ошибкой</mark>', results[0].snippet_html)
+        self.large.delete()
+        self.assertEqual(search_notes(self.author.pk, 'ошибк'), [])
+
+
+class SQLiteConnectionTestCase(TransactionTestCase):
+    """Настройки соединения из yanote.sqlite3."""
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+
+    def test_atomic_takes_write_lock_at_begin(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Note.objects.exists()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
@@ -1,13 +1,25 @@
+import asyncio
+import gzip
+import json
+import tempfile
 from http import HTTPStatus
+from pathlib import Path
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
-from django.urls import reverse
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client, TestCase, override_settings
+from django.urls import get_resolver, reverse
 
 from notes.models import Note
+from yanote.auth_cache import check_shared_cache
+from yanote.query_budget import QueryBudgetMixin, count_queries
+from yanote.static_assets import check_vendored_static
 
 
-class YaNoteRouteTests(TestCase):
+class YaNoteRouteTests(QueryBudgetMixin, TestCase):
     def setUp(self):
         # Создание пользователей
         self.author_user = User.objects.create_user(
@@ -77,3 +89,245 @@ class YaNoteRouteTests(TestCase):
                 expected_redirect_url = f"{login_url}?next={url}"
                 response = self.client.get(url)
                 self.assertRedirects(response, expected_redirect_url)
+
+    def test_every_route_has_query_budget(self):
+        """Для каждого маршрута объявлен бюджет запросов."""
+        resolver = get_resolver()
+        for namespace in ('notes', 'users'):
+            _, namespace_resolver = resolver.namespace_dict[namespace]
+            for name in namespace_resolver.reverse_dict:
+                if not isinstance(name, str):
+                    continue
+                with self.subTest(name=name):
+                    self.assertIn(
+                        f'{namespace}:{name}', settings.QUERY_BUDGETS
+                    )
+
+    def test_views_meet_query_budgets(self):
+        """Страницы укладываются в объявленный бюджет запросов."""
+        slug_kwargs = {'slug': self.note.slug}
+        form_data = {'title': 'Новая заметка', 'text': 'Текст'}
+        requests = (
+            ('notes:home', self.client.get, {}, {}),
+            ('notes:home', self.author_client.get, {}, {}),
+            ('notes:list', self.author_client.get, {}, {}),
+            ('notes:add', self.author_client.get, {}, {}),
+            ('notes:add', self.author_client.post, {}, form_data),
+            ('notes:success', self.author_client.get, {}, {}),
+            ('notes:detail', self.author_client.get, slug_kwargs, {}),
+            ('notes:edit', self.author_client.get, slug_kwargs, {}),
+            ('notes:edit', self.author_client.post, slug_kwargs,
+             {**form_data, 'slug': self.note.slug}),
+            ('notes:delete', self.author_client.get, slug_kwargs, {}),
+            ('notes:delete', self.author_client.post, slug_kwargs, {}),
+            ('users:signup', self.client.get, {}, {}),
+            ('users:logout', self.reader_client.get, {}, {}),
+        )
+        for url_name, method, kwargs, data in requests:
+            with self.subTest(url_name=url_name, data=data):
+                with self.assertWithinQueryBudget(url_name):
+                    method(reverse(url_name, kwargs=kwargs), data)
+
+
+class AsgiMiddlewareTests(TestCase):
+    """Собственные middleware проекта работают в асинхронной цепочке."""
+
+    @override_settings(DEBUG=True)
+    def test_asgi_middleware_chain_is_not_adapted(self):
+        handler = ASGIHandler()
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            handler.load_middleware(is_async=True)
+        self.assertTrue(
+            asyncio.iscoroutinefunction(handler._middleware_chain)
+        )
+
+
+class ProfilerTests(TestCase):
+    """Профилирование запросов сотрудников, yanote/profiling.py."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.profile_dir = Path(directory.name)
+        settings_override = override_settings(PROFILE_DIR=self.profile_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.staff_user = User.objects.create_user(
+            username='staff', is_staff=True
+        )
+        self.user = User.objects.create_user(username='user')
+
+    def test_staff_request_is_profiled(self):
+        self.client.force_login(self.staff_user)
+        response = self.client.get(
+            reverse('notes:list'), HTTP_X_PROFILE='1'
+        )
+        profile_id = response['X-Profile-Id']
+        report = json.loads(
+            (self.profile_dir / f'{profile_id}.json').read_text()
+        )
+        self.assertEqual(report['view'], 'notes:list')
+        self.assertTrue(
+            (self.profile_dir / f'{profile_id}.pstats').is_file()
+        )
+        response = self.client.get(
+            reverse('profile', args=(f'{profile_id}.pstats',))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_sql_params_are_not_saved_by_default(self):
+        self.client.force_login(self.staff_user)
+        profile_id = self.client.get(
+            reverse('notes:list'), HTTP_X_PROFILE='1'
+        )['X-Profile-Id']
+        report = json.loads(
+            (self.profile_dir / f'{profile_id}.json').read_text()
+        )
+        self.assertTrue(report['sql'])
+        self.assertEqual({row['params'] for row in report['sql']}, {None})
+
+    @override_settings(PROFILE_KEEP=0)
+    def test_profile_keep_zero_disables_profiler(self):
+        self.client.force_login(self.staff_user)
+        response = self.client.get(reverse('notes:list'), HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(list(self.profile_dir.iterdir()))
+
+    def test_other_users_are_not_profiled(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('notes:list'), {'_profile': '1'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(list(self.profile_dir.iterdir()))
+
+
+class ServerTimingTests(TestCase):
+    """Заголовок Server-Timing, yanote/server_timing.py."""
+
+    def test_add_note_timing(self):
+        user = User.objects.create_user(username='author')
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse('notes:add'), {'title': 'Заметка', 'text': 'Текст'}
+        )
+        timing = response['Server-Timing']
+        for metric in ('db;', 'form;', 'total;'):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+        response = self.client.get(reverse('notes:list'))
+        self.assertIn('tpl;', response['Server-Timing'])
+
+
+class StaticFilesTests(TestCase):
+    """Статика с хешем в имени и сжатием, yanote/static_assets.py."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        css = root / 'static' / 'css' / 'site.css'
+        css.parent.mkdir(parents=True)
+        css.write_text('.container { margin: 0 auto; }\n' * 100)
+        self.css = css.read_bytes()
+        # Заглушка на месте Bootstrap, скачанного vendor_static.
+        bootstrap = root / 'static' / 'vendor' / 'bootstrap'
+        bootstrap.mkdir(parents=True)
+        (bootstrap / 'bootstrap.min.css').write_text('.bg-light { }\n')
+        self.root = root
+        settings_override = override_settings(
+            STATICFILES_DIRS=[root / 'static'],
+            STATIC_ROOT=root / 'collected',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command(
+            'collectstatic', interactive=False, verbosity=0,
+            ignore_patterns=['admin'],
+        )
+
+    def test_hashed_css_is_served_compressed(self):
+        href = static('css/site.css')
+        self.assertNotEqual(href, '/static/css/site.css')
+        response = self.client.get(href, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), self.css
+        )
+
+    def test_bootstrap_is_served_locally(self):
+        content = self.client.get(reverse('notes:home')).content.decode()
+        href = static('vendor/bootstrap/bootstrap.min.css')
+        self.assertTrue(
+            href.startswith('/static/vendor/bootstrap/bootstrap.min.')
+        )
+        self.assertIn(f'href="{href}"', content)
+        self.assertNotIn('cdn.', content)
+        response = self.client.get(href)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_missing_vendored_static_uses_cdn(self):
+        self.assertEqual(check_vendored_static(None), [])
+        (self.root / 'empty').mkdir()
+        with override_settings(STATICFILES_DIRS=[self.root / 'empty']):
+            self.assertEqual(
+                [warning.id for warning in check_vendored_static(None)],
+                ['yanote.W003'],
+            )
+            content = self.client.get(reverse('notes:home')).content.decode()
+        url, integrity = settings.VENDORED_STATIC[
+            'vendor/bootstrap/bootstrap.min.css'
+        ]
+        self.assertIn(f'href="{url}"', content)
+        self.assertIn(f'integrity="{integrity}"', content)
+
+
+@override_settings(
+    AUTHENTICATION_BACKENDS=['yanote.auth_cache.CachedModelBackend'],
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+)
+class CachedAuthTests(TestCase):
+    """Сессия и пользователь из кэша, yanote/auth_cache.py."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.client.force_login(self.user)
+
+    def test_no_session_and_user_queries(self):
+        url = reverse('notes:list')
+        self.client.get(url)
+        with count_queries() as counter:
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        for sql in counter.statements:
+            with self.subTest(sql=sql):
+                self.assertNotIn('FROM "django_session"', sql)
+                self.assertNotIn('FROM "auth_user"', sql)
+
+    def test_deactivation_reaches_cache(self):
+        url = reverse('notes:list')
+        self.user.is_active = False
+        self.user.save()
+        self.assertRedirects(
+            self.client.get(url), f'{reverse("users:login")}?next={url}'
+        )
+
+    def test_process_local_cache_fails_check(self):
+        self.assertEqual(
+            [error.id for error in check_shared_cache(None)],
+            ['yanote.E001', 'yanote.E002'],
+        )
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(
+        AUTHENTICATION_BACKENDS=settings.AUTHENTICATION_BACKENDS,
+        SESSION_ENGINE=settings.SESSION_ENGINE,
+    )
+    def test_default_settings_keep_auth_in_database(self):
+        self.assertEqual(
+            settings.SESSION_ENGINE, 'django.contrib.sessions.backends.db'
+        )
+        self.assertEqual(check_shared_cache(None), [])
@@ -1,9 +1,13 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError
+from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .forms import WARNING, NoteForm
 from .models import Note
+from .pagination import get_note_page, notes_count
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -26,22 +30,35 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Сохранение заметки: занятый slug становится ошибкой формы."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
-        return super().form_valid(form)
+        note = form.save(commit=False)
+        if note.author_id is None:
+            note.author = self.request.user
+        slug = note.slug
+        try:
+            note.save()
+        except IntegrityError:
+            if not slug or not Note.objects.filter(slug=slug).exclude(
+                pk=note.pk
+            ).exists():
+                raise
+            form.add_error('slug', slug + WARNING)
+            return self.form_invalid(form)
+        self.object = note
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -50,9 +67,38 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """Список заметок пользователя по страницам."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        """Шаблону нужны только id, slug и заголовок."""
+        return super().get_queryset().only('id', 'slug', 'title')
+
+    def get_context_data(self, **kwargs):
+        page = get_note_page(self.object_list, self.request.GET)
+        context = super().get_context_data(object_list=page.object_list)
+        context['page'] = page
+        context['notes_count'] = notes_count(
+            self.object_list, self.request.user.pk, page
+        )
+        return context
+
+
+class NoteSearch(LoginRequiredMixin, generic.ListView):
+    """Поиск по заголовкам и текстам своих заметок."""
+    template_name = 'notes/search.html'
+    context_object_name = 'results'
+
+    def get_queryset(self):
+        return search_notes(
+            self.request.user.pk, self.request.GET.get('q', '')
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
@@ -0,0 +1,115 @@
+"""
+Пользователь запроса из кэша.
+
+AuthenticationMiddleware на каждом запросе авторизованного пользователя
+загружает его из auth_user по id из сессии. CachedModelBackend читает
+пользователя из кэша и идёт в базу только при промахе. Запись сквозная:
+post_save кладёт в кэш сохранённый объект — в том числе после входа
+(last_login) и смены пароля, так что проверка хеша сессии сразу видит
+новый пароль. post_delete и выход удаляют запись.
+
+QuerySet.update() сигналов не отправляет: после массового изменения
+пользователей записи устаревают до AUTH_USER_CACHE_TIMEOUT.
+
+Сессии выбираются через SESSION_ENGINE: cached_db читает их из кэша,
+signed_cookies хранит в подписанной cookie, и тогда запрос
+авторизованного пользователя в установившемся режиме не обращается
+к базе вовсе.
+
+Кэш каждого процесса (LocMemCache) для этого не годится: выход,
+смена пароля и блокировка в одном воркере не видны остальным, пока
+не истечёт запись. Проверка check_shared_cache считает ошибкой
+CachedModelBackend и кэшируемые сессии на таком кэше.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_logged_out
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+User = get_user_model()
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, у которого get_user() читает через кэш."""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User._default_manager.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, **kwargs):
+    """Объект с отложенными полями не кэшируем, а удаляем запись."""
+    if raw or instance.get_deferred_fields():
+        cache.delete(user_cache_key(instance.pk))
+        return
+    cache.set(
+        user_cache_key(instance.pk), instance,
+        settings.AUTH_USER_CACHE_TIMEOUT,
+    )
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(user_logged_out)
+def forget_user(sender, request, user, **kwargs):
+    if user is not None:
+        cache.delete(user_cache_key(user.pk))
+
+
+def is_process_local(alias):
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_CACHES
+
+
+@checks.register(checks.Tags.security)
+def check_shared_cache(app_configs, **kwargs):
+    """Кэш пользователей и сессий должен быть общим для всех воркеров."""
+    errors = []
+    backend = f'{__name__}.CachedModelBackend'
+    if backend in settings.AUTHENTICATION_BACKENDS and is_process_local(
+        DEFAULT_CACHE_ALIAS
+    ):
+        errors.append(checks.Error(
+            f'{backend} хранит пользователей в кэше каждого процесса.',
+            hint='Настройте в CACHES общий кэш (Memcached, Redis) или '
+                 'уберите бэкенд из AUTHENTICATION_BACKENDS.',
+            id='yanote.E001',
+        ))
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES and (
+        is_process_local(settings.SESSION_CACHE_ALIAS)
+    ):
+        errors.append(checks.Error(
+            f'{settings.SESSION_ENGINE} хранит сессии в кэше каждого '
+            'процесса.',
+            hint='Настройте в CACHES общий кэш (Memcached, Redis) или '
+                 "используйте SESSION_ENGINE 'db'.",
+            id='yanote.E002',
+        ))
+    return errors
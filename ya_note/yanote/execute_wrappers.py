@@ -0,0 +1,51 @@
+"""
+Обёртки SQL-запросов, действующие в контексте запроса, а не потока.
+
+connection.execute_wrapper() ставит обёртку на соединение текущего
+потока. Под ASGI запрос выполняет ORM в других потоках: sync_to_async
+и пул ORM_EXECUTOR асинхронных view, и такие запросы обёртка потока
+не видит. Здесь обёртки хранятся в ContextVar: контекст копируется
+в потоки sync_to_async и run_orm, а диспетчер, установленный на каждое
+соединение, применяет обёртки текущего контекста.
+
+Диспетчер ставится первым в execute_wrappers при создании соединения
+(сигнал connection_created) и на соединения потока, импортировавшего
+модуль, — поэтому connection.execute_wrapper() продолжает работать
+как прежде.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+context_wrappers = ContextVar('context_wrappers', default=())
+
+
+def dispatch(execute, sql, params, many, context):
+    for wrapper in reversed(context_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+def install(sender=None, connection=None, **kwargs):
+    # execute_wrapper() снимает последнюю обёртку списка, поэтому
+    # диспетчер вставляется в начало.
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, dispatch)
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """Аналог connection.execute_wrapper для всех потоков запроса."""
+    token = context_wrappers.set((*context_wrappers.get(), wrapper))
+    try:
+        yield
+    finally:
+        context_wrappers.reset(token)
+
+
+connection_created.connect(install)
+for existing in connections.all():
+    install(connection=existing)
@@ -0,0 +1,387 @@
+"""
+Нагрузочное тестирование WSGI-приложения внутри процесса.
+
+Сценарий — маршрут с весом, методом, путём и данными. Рабочие потоки
+или процессы случайно выбирают сценарии по весам и вызывают
+WSGI-приложение напрямую, без сети, со всеми middleware. Задержки
+собираются по имени маршрута, итог сравнивается с базовым JSON.
+
+Команды manage.py loadtest в приложениях описывают данные и сценарии,
+а запуск, статистика и сравнение живут здесь.
+"""
+import io
+import json
+import random
+import tempfile
+import time
+from abc import ABCMeta, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.utils.crypto import get_random_string
+
+# Границы корзин гистограммы задержек, мс.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+HISTOGRAM_WIDTH = 40
+# Значение подходит и для cookie, и для заголовка X-CSRFToken.
+CSRF_TOKEN = get_random_string(64)
+
+
+class Scenario:
+    """
+    Запрос к маршруту url_name.
+
+    path и data — вызываемые объекты, получающие генератор случайных
+    чисел и посетителя; user=False — анонимный запрос. Генераторы для
+    path и data начинают с одного состояния, поэтому одинаковый выбор
+    в них даёт один и тот же объект: форма редактирования отправляется
+    в тот же адрес, по которому выбрана заметка или комментарий.
+    """
+
+    def __init__(self, url_name, weight, path, method='GET', data=None,
+                 user=False, status=200):
+        self.url_name = url_name
+        self.weight = weight
+        self.path = path
+        self.method = method
+        self.data = data
+        self.user = user
+        self.status = status
+
+    @property
+    def label(self):
+        who = 'user' if self.user else 'anon'
+        return f'{self.url_name} {self.method} {who}'
+
+
+class Visitor:
+    """Авторизованный пользователь: cookie сессии и его объекты."""
+
+    def __init__(self, session_key, **objects):
+        self.session_key = session_key
+        self.objects = objects
+
+    @classmethod
+    def login(cls, user, **objects):
+        client = Client()
+        client.force_login(user)
+        return cls(
+            client.cookies[settings.SESSION_COOKIE_NAME].value, **objects
+        )
+
+
+ANONYMOUS = Visitor(None)
+
+
+def make_environ(method, path, data, visitor):
+    body = urlencode(data or {}, doseq=True).encode()
+    cookies = {'csrftoken': CSRF_TOKEN}
+    if visitor.session_key:
+        cookies[settings.SESSION_COOKIE_NAME] = visitor.session_key
+    path, _, query = path.partition('?')
+    return {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': '; '.join(f'{k}={v}' for k, v in cookies.items()),
+        'HTTP_X_CSRFTOKEN': CSRF_TOKEN,
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def call(application, environ):
+    """Выполняет запрос и возвращает код ответа."""
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line.split()[0]))
+
+    response = application(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, 'close'):
+            response.close()
+    return status[0]
+
+
+class Stats:
+    """Задержки (мс) и ошибки по сценариям."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, label, latency, ok):
+        self.latencies[label].append(latency)
+        if not ok:
+            self.errors[label] += 1
+
+    def merge(self, other):
+        for label, values in other.latencies.items():
+            self.latencies[label].extend(values)
+        for label, count in other.errors.items():
+            self.errors[label] += count
+        return self
+
+    def summary(self, duration):
+        result = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            result[label] = {
+                'requests': len(values),
+                'rps': round(len(values) / duration, 1),
+                'p50': round(percentile(values, 0.50), 2),
+                'p90': round(percentile(values, 0.90), 2),
+                'p99': round(percentile(values, 0.99), 2),
+                'max': round(values[-1], 2),
+                'errors': self.errors[label],
+            }
+        return result
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+def histogram(values):
+    """Строки текстовой гистограммы задержек по корзинам BUCKETS."""
+    counts = [0] * (len(BUCKETS) + 1)
+    for value in values:
+        index = next(
+            (i for i, bound in enumerate(BUCKETS) if value <= bound),
+            len(BUCKETS),
+        )
+        counts[index] += 1
+    top = max(counts) or 1
+    lines = []
+    for index, count in enumerate(counts):
+        if not count:
+            continue
+        bound = (
+            f'≤{BUCKETS[index]} мс' if index < len(BUCKETS)
+            else f'>{BUCKETS[-1]} мс'
+        )
+        bar = '█' * max(1, round(count / top * HISTOGRAM_WIDTH))
+        lines.append(f'{bound:>10} {bar} {count}')
+    return lines
+
+
+def run_worker(application, scenarios, visitors, duration, seed):
+    rng = random.Random(seed)
+    weights = [scenario.weight for scenario in scenarios]
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        visitor = rng.choice(visitors) if scenario.user else ANONYMOUS
+        state = rng.random()
+        path = scenario.path(random.Random(state), visitor)
+        data = (
+            scenario.data(random.Random(state), visitor)
+            if scenario.data else None
+        )
+        environ = make_environ(scenario.method, path, data, visitor)
+        started = time.perf_counter()
+        status = call(application, environ)
+        latency = (time.perf_counter() - started) * 1000
+        stats.add(scenario.label, latency, status == scenario.status)
+    connection.close()
+    return stats
+
+
+# Задание для процессов пула. Сценарии содержат lambda и не
+# сериализуются, поэтому процессы получают их при fork через глобал.
+JOB = None
+
+
+def run_job(seed):
+    return run_worker(*JOB, seed)
+
+
+def run(application, scenarios, visitors, duration, workers, pool='thread'):
+    """Прогоняет нагрузку и возвращает объединённую статистику."""
+    global JOB
+    JOB = (application, scenarios, visitors, duration)
+    if pool == 'process':
+        # Открытые соединения не должны достаться дочерним процессам.
+        connections.close_all()
+        executor = ProcessPoolExecutor(workers, mp_context=get_context('fork'))
+    else:
+        executor = ThreadPoolExecutor(workers)
+    with executor:
+        stats = Stats()
+        for result in executor.map(run_job, range(workers)):
+            stats.merge(result)
+    return stats
+
+
+def compare(summary, baseline, tolerance):
+    """
+    Строки сравнения с базовым прогоном и список регрессий:
+    p99 выросла или пропускная способность упала больше чем на tolerance.
+    """
+    lines, regressions = [], []
+    for label, current in summary.items():
+        before = baseline.get(label)
+        if not before:
+            lines.append(f'{label}: нет в базовом прогоне')
+            continue
+        changes = {
+            key: (current[key] - before[key]) / before[key]
+            for key in ('rps', 'p50', 'p99') if before[key]
+        }
+        lines.append(f'{label}: ' + ', '.join(
+            f'{key} {before[key]} → {current[key]} ({change:+.0%})'
+            for key, change in changes.items()
+        ))
+        if (
+            changes.get('p99', 0) > tolerance
+            or changes.get('rps', 0) < -tolerance
+        ):
+            regressions.append(label)
+    return lines, regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(path, summary):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(summary, file, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def temporary_database(path):
+    """Отдельная база в файле path, рабочая база не затрагивается."""
+    connection.settings_dict['TEST']['NAME'] = str(path)
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True
+    )
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def production_settings():
+    """Замеры без DEBUG: без журнала запросов и проверок бюджета."""
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'localhost']
+
+
+class LoadTestCommand(BaseCommand, metaclass=ABCMeta):
+    """
+    Основа команд loadtest: подклассы добавляют параметры масштаба
+    и реализуют seed(**options), возвращающий сценарии и посетителей.
+    """
+    help = (
+        'Нагрузочный прогон маршрутов во временной базе: пропускная '
+        'способность и задержки по маршрутам, сравнение с базовым JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread'
+        )
+        parser.add_argument('--baseline', help='JSON для сравнения')
+        parser.add_argument(
+            '--save-baseline', help='Куда сохранить итоги прогона'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p99 и падение rps, доля',
+        )
+        parser.add_argument(
+            '--debug', action='store_true',
+            help='Не отключать DEBUG на время прогона',
+        )
+        parser.add_argument(
+            '--no-histograms', action='store_false', dest='histograms'
+        )
+
+    @abstractmethod
+    def seed(self, **options):
+        """Данные во временной базе; возвращает (сценарии, посетители)."""
+
+    def handle(self, *args, **options):
+        baseline = options['baseline'] and load_baseline(options['baseline'])
+        if not options['debug']:
+            production_settings()
+        from django.core.wsgi import get_wsgi_application
+        with tempfile.TemporaryDirectory() as directory, temporary_database(
+            f'{directory}/loadtest.sqlite3'
+        ):
+            scenarios, visitors = self.seed(**options)
+            connections.close_all()
+            stats = run(
+                get_wsgi_application(), scenarios, visitors,
+                options['duration'], options['workers'], options['pool'],
+            )
+        summary = stats.summary(options['duration'])
+        self.report(stats, summary, options)
+        if options['save_baseline']:
+            save_baseline(options['save_baseline'], summary)
+        if baseline:
+            lines, regressions = compare(
+                summary, baseline, options['tolerance']
+            )
+            self.stdout.write('\nСравнение с базовым прогоном:')
+            self.stdout.write('\n'.join(lines))
+            if regressions:
+                raise CommandError(
+                    'Регрессия: ' + ', '.join(regressions)
+                )
+
+    def report(self, stats, summary, options):
+        total = sum(row['requests'] for row in summary.values())
+        self.stdout.write(
+            f'{total} запросов за {options["duration"]:.0f} с, '
+            f'{total / options["duration"]:.0f} запросов/с, '
+            f'{options["workers"]} × {options["pool"]}\n'
+        )
+        self.stdout.write(
+            f'{"маршрут":40} {"запросов":>8} {"rps":>7} {"p50":>7} '
+            f'{"p90":>7} {"p99":>7} {"max":>8} {"ошибок":>6}'
+        )
+        for label, row in summary.items():
+            line = (
+                f'{label:40} {row["requests"]:8} {row["rps"]:7} '
+                f'{row["p50"]:7} {row["p90"]:7} {row["p99"]:7} '
+                f'{row["max"]:8} {row["errors"]:6}'
+            )
+            style = self.style.ERROR if row['errors'] else str
+            self.stdout.write(style(line))
+        if options['histograms']:
+            for label in summary:
+                self.stdout.write(f'\n{label}')
+                self.stdout.write('\n'.join(histogram(stats.latencies[label])))
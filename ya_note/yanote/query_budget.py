@@ -0,0 +1,131 @@
+"""
+Бюджет SQL-запросов на маршрут.
+
+Бюджеты объявляются в settings.QUERY_BUDGETS по имени маршрута
+('notes:home': 2, ...). В режиме DEBUG их проверяет QueryBudgetMiddleware,
+в тестах — контекстный менеджер assert_query_budget и примесь
+QueryBudgetMixin для TestCase.
+"""
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .execute_wrappers import execute_wrapper
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """Обёртка SQL-запросов, считающая запросы."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Считает запросы контекста, в том числе из потоков sync_to_async."""
+    counter = QueryCounter()
+    with execute_wrapper(counter):
+        yield counter
+
+
+def get_budget(url_name):
+    try:
+        return settings.QUERY_BUDGETS[url_name]
+    except KeyError:
+        raise QueryBudgetExceeded(
+            f'Для маршрута {url_name} не объявлен бюджет запросов.'
+        )
+
+
+def check_budget(url_name, counter):
+    budget = get_budget(url_name)
+    if counter.count > budget:
+        raise QueryBudgetExceeded(
+            f'{url_name}: {counter.count} запросов при бюджете {budget}:\n'
+            + '\n'.join(counter.statements)
+        )
+
+
+def counted_stream(content, url_name, counter):
+    """
+    Тело потокового ответа читает сервер уже после выхода из middleware,
+    поэтому запросы внутри него считаются здесь, до последнего фрагмента.
+    Обёртка ставится на чтение каждого фрагмента: под ASGI фрагменты
+    могут читаться через sync_to_async, каждый в своей копии контекста.
+    """
+    content = iter(content)
+    while True:
+        with execute_wrapper(counter):
+            part = next(content, None)
+        if part is None:
+            break
+        yield part
+    check_budget(url_name, counter)
+
+
+@contextmanager
+def assert_query_budget(url_name):
+    with count_queries() as counter:
+        yield counter
+    check_budget(url_name, counter)
+
+
+class QueryBudgetMiddleware:
+    """
+    Проверяет бюджет запросов в режиме DEBUG.
+
+    Ставится первым в MIDDLEWARE, чтобы учитывать и запросы сессии
+    и пользователя. Работает и в синхронной, и в асинхронной цепочке.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with count_queries() as counter:
+            response = self.get_response(request)
+        return self.check(request, response, counter)
+
+    async def __acall__(self, request):
+        with count_queries() as counter:
+            response = await self.get_response(request)
+        return self.check(request, response, counter)
+
+    def check(self, request, response, counter):
+        match = request.resolver_match
+        if not match or match.view_name not in settings.QUERY_BUDGETS:
+            return response
+        if response.streaming:
+            response.streaming_content = counted_stream(
+                response.streaming_content, match.view_name, counter
+            )
+        else:
+            check_budget(match.view_name, counter)
+        return response
+
+
+class QueryBudgetMixin:
+    """Примесь для TestCase."""
+
+    def assertWithinQueryBudget(self, url_name):  # noqa: N802
+        return assert_query_budget(url_name)
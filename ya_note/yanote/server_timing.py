@@ -0,0 +1,156 @@
+"""
+Заголовок Server-Timing с разбивкой времени ответа.
+
+db    — выполнение SQL, через обёртку из execute_wrappers.py;
+tpl   — рендеринг шаблонов, через бэкенд DjangoTemplates ниже;
+form  — валидация форм с TimedFormMixin;
+total — весь ответ внутри Django, вместе с middleware.
+
+Замеры копятся в ContextVar текущего запроса и стоят пару вызовов
+perf_counter, поэтому заголовок можно оставлять в продакшене.
+Сигнала о рендеринге с длительностью в Django нет (template_rendered
+отправляется только в тестах), поэтому шаблоны замеряет бэкенд.
+Тело StreamingHttpResponse отдаётся после заголовков и в total
+не входит. Контекст запроса копируется в потоки sync_to_async и пула
+ORM асинхронных view, поэтому их SQL и шаблоны тоже учитываются.
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends import django as django_backend
+
+from .execute_wrappers import execute_wrapper
+
+METRICS = (
+    ('db', 'SQL'),
+    ('tpl', 'Templates'),
+    ('form', 'Forms'),
+)
+
+current_timing = ContextVar('current_timing', default=None)
+
+
+class Timing:
+    """Суммарные длительности (с) и число замеров по метрикам."""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds
+        self.counts[name] += 1
+
+    def header(self, total):
+        parts = [
+            f'{name};dur={self.durations[name] * 1000:.2f};'
+            f'desc="{description} ({self.counts[name]})"'
+            for name, description in METRICS
+            if self.counts[name]
+        ]
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+
+@contextmanager
+def measure(name):
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+def time_sql(execute, sql, params, many, context):
+    with measure('db'):
+        return execute(sql, params, many, context)
+
+
+class ServerTimingMiddleware:
+    """
+    Ставится первым в MIDDLEWARE, чтобы total включал все middleware.
+    Работает и в синхронной, и в асинхронной цепочке.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timing = Timing()
+        token = current_timing.set(timing)
+        started = time.perf_counter()
+        try:
+            with execute_wrapper(time_sql):
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.add_header(response, timing, started)
+
+    async def __acall__(self, request):
+        timing = Timing()
+        token = current_timing.set(timing)
+        started = time.perf_counter()
+        try:
+            with execute_wrapper(time_sql):
+                response = await self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        return self.add_header(response, timing, started)
+
+    def add_header(self, response, timing, started):
+        response['Server-Timing'] = timing.header(
+            time.perf_counter() - started
+        )
+        return response
+
+
+class Template:
+    """Шаблон бэкенда с замером render()."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with measure('tpl'):
+            return self.template.render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """
+    Замеряются шаблоны, полученные через бэкенд: шаблоны страниц
+    и render_to_string. {% include %} входит во время шаблона-родителя.
+    """
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name))
+
+
+class TimedFormMixin:
+    """Примесь для форм: время full_clean попадает в метрику form."""
+
+    def full_clean(self):
+        with measure('form'):
+            super().full_clean()
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,11 +23,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.static_assets.StaticFilesMiddleware',
+    'yanote.server_timing.ServerTimingMiddleware',
+    'yanote.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanote.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -35,10 +40,18 @@ ROOT_URLCONF = 'yanote.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени для Server-Timing.
+        'BACKEND': 'yanote.server_timing.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Шаблоны компилируются один раз на процесс. В Django 3.2
+            # runserver сбрасывает этот кэш при изменении шаблонов.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -54,11 +67,43 @@ WSGI_APPLICATION = 'yanote.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite с WAL и другими PRAGMA, см. yanote/sqlite3/base.py.
+        'ENGINE': 'yanote.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# В продакшене нужен общий для всех воркеров кэш (Memcached/Redis).
+# Только с ним включаются кэш числа заметок, кэшированные сессии
+# и пользователи. Кэш задают переменные окружения CACHE_BACKEND
+# и CACHE_LOCATION, см. README.md.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Сессии и пользователи по умолчанию читаются из базы: выход и смена
+# пароля сразу видны всем воркерам. Кэш для них (yanote/auth_cache.py)
+# включается только с общим кэшем в CACHES; с LocMemCache проверки
+# yanote.E001 и yanote.E002 не дают включить его и вручную.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+if CACHES['default']['BACKEND'] != (
+    'django.core.cache.backends.locmem.LocMemCache'
+):
+    AUTHENTICATION_BACKENDS = ['yanote.auth_cache.CachedModelBackend']
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTH_USER_CACHE_TIMEOUT = 60 * 15
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -83,7 +128,84 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# collectstatic кладёт сюда файлы с хешем в имени и их сжатые варианты,
+# StaticFilesMiddleware отдаёт их отсюда (yanote/static_assets.py).
+STATIC_ROOT = BASE_DIR / 'collected_static'
+
+STATICFILES_STORAGE = (
+    'yanote.static_assets.CompressedManifestStaticFilesStorage'
+)
+
+SERVE_STATIC = True
+
+# Сторонняя статика для manage.py vendor_static:
+# путь в static/ → (адрес, SRI-хеш).
+VENDORED_STATIC = {
+    'vendor/bootstrap/bootstrap.min.css': (
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.0.1/dist/css/bootstrap.min.css',
+        'sha384-+0n0xVW2eSR5OomGNYDnhzAbDsOXxcvSN1TPprVMTNDbiYZCxYbOOl7+AMvyTG2x',
+    ),
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Прогревать шаблоны, маршруты и переводы при загрузке wsgi.py/asgi.py
+# (yanote/warmup.py).
+WARMUP_ON_STARTUP = True
+
+# Заголовок Server-Timing с временем SQL, шаблонов и форм
+# (yanote/server_timing.py).
+SERVER_TIMING = True
+
+# Профили запросов сотрудников (yanote/profiling.py): каталог и сколько
+# последних профилей хранить. None или PROFILE_KEEP = 0 отключают
+# профилировщик. Параметры SQL в профиль пишутся только при
+# PROFILE_SQL_PARAMS = True: это данные пользователей.
+PROFILE_DIR = BASE_DIR / 'profiles'
+PROFILE_KEEP = 50
+PROFILE_SQL_PARAMS = False
+
+# Заметок на странице списка и сколько хранить в кэше их общее число
+# (notes/pagination.py). Число кэшируется только в общем кэше: с кэшем
+# процесса остальные воркеры показывали бы устаревшее значение.
+NOTES_PER_PAGE = 50
+NOTES_COUNT_CACHE = CACHES['default']['BACKEND'] != (
+    'django.core.cache.backends.locmem.LocMemCache'
+)
+NOTES_COUNT_CACHE_TIMEOUT = 60 * 60
+# Без общего кэша заметки в списке считаются до этого числа.
+NOTES_COUNT_LIMIT = 1000
+
+NOTES_SEARCH_RESULTS = 20
+
+# Тексты заметок от этого размера в байтах хранятся сжатыми zlib.
+NOTES_TEXT_COMPRESS_MIN_BYTES = 2048
+
+# Максимум SQL-запросов на запрос к маршруту, с учётом сессии
+# и пользователя. См. yanote/query_budget.py.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:add': 6,
+    'notes:edit': 6,
+    'notes:detail': 3,
+    'notes:delete': 4,
+    'notes:list': 4,
+    'notes:search': 3,
+    'notes:success': 2,
+    'notes:login': 9,
+    'notes:logout': 4,
+    'notes:password_change': 6,
+    'notes:password_change_done': 2,
+    'notes:password_reset': 4,
+    'notes:password_reset_done': 2,
+    'notes:password_reset_confirm': 5,
+    'notes:password_reset_complete': 2,
+    'users:login': 9,
+    'users:logout': 4,
+    'users:signup': 4,
+}
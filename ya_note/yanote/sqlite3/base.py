@@ -0,0 +1,63 @@
+"""
+Бэкенд SQLite с настройкой соединения для рабочей нагрузки.
+
+При открытии соединения выставляются PRAGMA из OPTIONS['pragmas']
+(по умолчанию PRAGMAS): журнал WAL позволяет читать во время записи,
+synchronous=NORMAL в режиме WAL не теряет целостность при сбое.
+
+OPTIONS['transaction_mode'] задаёт вид BEGIN для transaction.atomic.
+С IMMEDIATE блокировка записи берётся в начале транзакции и ожидание
+идёт через busy_timeout; с обычным BEGIN транзакция, начавшая
+с чтения, при записи сразу получает «database is locked».
+
+CONN_HEALTH_CHECKS, как в новых версиях Django, проверяет постоянное
+соединение перед повторным использованием в начале и конце запроса.
+"""
+from django.db import DatabaseError
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', PRAGMAS)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except (DatabaseError, base.Database.Error):
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if (
+            self.connection is not None
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.in_atomic_block
+            and not self.is_usable()
+        ):
+            self.close()
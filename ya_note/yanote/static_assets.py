@@ -0,0 +1,261 @@
+"""
+Статика без CDN и отдельного статического сервера.
+
+Сторонние стили лежат в static/vendor и скачиваются один раз командой
+manage.py vendor_static по VENDORED_STATIC с проверкой SRI-хеша.
+base.html подключает их тегом {% vendored_stylesheet %}: скачанный
+файл — через {% static %}, а пока его нет — с CDN с тем же хешем
+в integrity. Проверка check_vendored_static предупреждает о таких
+файлах.
+collectstatic через CompressedManifestStaticFilesStorage кладёт
+в STATIC_ROOT копии с хешем содержимого в имени и рядом сжатые
+варианты .gz и, если установлен пакет brotli, .br.
+
+StaticFilesMiddleware отдаёт файлы из STATIC_ROOT до остальных
+middleware: выбирает вариант по Accept-Encoding, а файлам с хешем
+в имени ставит Cache-Control immutable на год — при изменении
+содержимого меняется и имя.
+"""
+import base64
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, StaticFilesStorage, staticfiles_storage,
+)
+from django.core import checks
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = ('.css', '.js', '.map', '.svg', '.json', '.txt')
+# Маленькие файлы не сжимаем: выигрыш меньше заголовков.
+MIN_COMPRESS_SIZE = 512
+# Сжатый вариант сохраняется, если он меньше исходника хотя бы на 5%.
+MIN_COMPRESS_RATIO = 0.95
+# Варианты в порядке предпочтения: (Content-Encoding, суффикс файла).
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+# Имена без хеша могут смениться содержимым при следующем деплое.
+MUTABLE_CACHE = 'public, max-age=60'
+
+
+def compress_file(path):
+    """Пишет .gz и .br рядом с path. Возвращает число вариантов."""
+    data = path.read_bytes()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return 0
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    written = 0
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data) * MIN_COMPRESS_RATIO:
+            path.with_name(path.name + suffix).write_bytes(compressed)
+            written += 1
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage со сжатием при collectstatic.
+
+    Пока collectstatic не запускали (разработка, тесты), манифеста нет,
+    и url() отдаёт имена без хеша, а не падает с ValueError.
+    """
+
+    def url(self, name, force=False):
+        if not self.hashed_files and not force:
+            return StaticFilesStorage.url(self, name)
+        return super().url(name, force)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Сжимаем итоговые файлы из манифеста: промежуточные имена
+        # проходов по вложенным ссылкам CSS уже удалены.
+        for name in sorted(paths):
+            if not name.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            compress_file(Path(self.path(name)))
+            hashed_name = self.hashed_files.get(
+                self.hash_key(self.clean_name(name))
+            )
+            if hashed_name:
+                compress_file(Path(self.path(hashed_name)))
+
+
+def download(url, integrity):
+    """Скачивает url и сверяет содержимое с SRI-хешем вида sha384-..."""
+    algorithm, _, expected = integrity.partition('-')
+    with urlopen(url, timeout=30) as response:
+        data = response.read()
+    digest = base64.b64encode(hashlib.new(algorithm, data).digest()).decode()
+    if digest != expected:
+        raise ValueError(f'{url}: хеш {algorithm}-{digest}, ожидался '
+                         f'{integrity}')
+    return data
+
+
+@checks.register(checks.Tags.staticfiles)
+def check_vendored_static(app_configs, **kwargs):
+    """Файлы из VENDORED_STATIC, которые ещё берутся с CDN."""
+    return [
+        checks.Warning(
+            f'{name} из VENDORED_STATIC нет среди статических файлов, '
+            'он загружается с CDN.',
+            hint='Скачайте его командой manage.py vendor_static '
+                 'и закоммитьте.',
+            id='yanote.W003',
+        )
+        for name in settings.VENDORED_STATIC
+        if not finders.find(name)
+    ]
+
+
+def vendored_stylesheet(name):
+    """Тег <link> на скачанный файл или, пока его нет, на CDN."""
+    if finders.find(name):
+        return format_html('<link rel="stylesheet" href="{}">', static(name))
+    url, integrity = settings.VENDORED_STATIC[name]
+    return format_html(
+        '<link rel="stylesheet" href="{}" integrity="{}" '
+        'crossorigin="anonymous">',
+        url, integrity,
+    )
+
+
+class StaticFile:
+    """Файл из STATIC_ROOT и его сжатые варианты."""
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.content_type = (
+            mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        )
+        self.mtime = path.stat().st_mtime
+        self.cache_control = IMMUTABLE_CACHE if immutable else MUTABLE_CACHE
+        self.variants = [
+            (encoding, path.with_name(path.name + suffix))
+            for encoding, suffix in ENCODINGS
+            if path.with_name(path.name + suffix).is_file()
+        ]
+
+    def choose(self, accept_encoding):
+        """Путь и Content-Encoding лучшего варианта для клиента."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, path in self.variants:
+            if encoding in accepted:
+                return path, encoding
+        return self.path, None
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def index_static_root(root):
+    """Словарь имя → StaticFile по содержимому root."""
+    manifest = getattr(staticfiles_storage, 'hashed_files', {})
+    hashed = set(manifest.values())
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    files = {}
+    for path in sorted(root.rglob('*')):
+        if path.is_file() and not path.name.endswith(suffixes):
+            name = path.relative_to(root).as_posix()
+            files[name] = StaticFile(path, immutable=name in hashed)
+    return files
+
+
+class StaticFilesMiddleware:
+    """
+    Ставится первым в MIDDLEWARE: статике не нужны сессии,
+    пользователь и замеры. Список файлов читается при запуске,
+    поэтому после collectstatic процесс нужно перезапустить.
+    Работает и в синхронной, и в асинхронной цепочке.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = urlparse(settings.STATIC_URL).path
+        root = Path(settings.STATIC_ROOT)
+        self.files = index_static_root(root) if root.is_dir() else {}
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        static_file = self.find(request)
+        if static_file is None:
+            return self.get_response(request)
+        return self.serve(request, static_file)
+
+    async def __acall__(self, request):
+        static_file = self.find(request)
+        if static_file is None:
+            return await self.get_response(request)
+        return self.serve(request, static_file)
+
+    def find(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+        ):
+            return self.files.get(request.path_info[len(self.prefix):])
+        return None
+
+    def serve(self, request, static_file):
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), static_file.mtime
+        ):
+            response = HttpResponseNotModified()
+        else:
+            path, encoding = static_file.choose(
+                request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+            response = FileResponse(
+                open(path, 'rb'), content_type=static_file.content_type
+            )
+            del response['Content-Disposition']
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Cache-Control'] = static_file.cache_control
+        response['Last-Modified'] = http_date(static_file.mtime)
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response